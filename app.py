@@ -1,18 +1,21 @@
-import threading
 from flask import Flask, request, jsonify
 from dotenv import load_dotenv
 load_dotenv()
 from github import Github
-from utils.pr_processor import process_pull_request
+from utils.pr_processor import process_pull_request, scan_risky_packages
 from utils.signature_verifier import verify_signature
 from utils.risky_issue_creator import create_risky_issue
 from utils.comment_agent import handle_issue_comment
-from auth import get_installation_access_token, APP_SLUG
+from utils.scan_scheduler import scan_scheduler, SchedulerSaturated, estimate_cost
+from utils import http_client
+from utils.license_summaries import start_prewarm
+from auth import with_installation_token, APP_SLUG
 
 app = Flask(__name__)
+start_prewarm()
 
 def handle_event(payload):
-    # this runs in its own thread, so it won’t block the HTTP response
+    # this runs on a scan worker (utils.scan_scheduler), so it won’t block the HTTP response
     print("▶️  Background handler starting…")
     pr = payload.get("pull_request", {})
     action = payload.get("action")
@@ -24,11 +27,54 @@ def handle_event(payload):
     else:
         print("ℹ️ Ignoring non‑PR event.")
 
+def handle_merge(payload):
+    # Post-merge audit; runs on a scan worker at the lowest priority, after interactive checks.
+    with_installation_token(payload["installation"]["id"], lambda access_token: _audit_merge(payload, access_token))
+
+def _audit_merge(payload, access_token):
+    pr = payload["pull_request"]
+    repo = Github(access_token).get_repo(pr["base"]["repo"]["full_name"])
+
+    risky_packages = scan_risky_packages(repo, pr, access_token)
+    if risky_packages:
+        create_risky_issue(repo, pr["number"], risky_packages)
+    else:
+        print("No risky packages detected. No issue created.")
+
+def enqueue(fn, payload, job_class, coalesce_key=None, after_key=None):
+    repo_full_name = payload["repository"]["full_name"]
+    options = dict(
+        delivery_id=request.headers.get("X-GitHub-Delivery"),
+        installation_id=payload.get("installation", {}).get("id"),
+        job_class=job_class,
+        cost=estimate_cost(repo_full_name, job_class),
+    )
+    try:
+        if after_key is not None:
+            status = scan_scheduler.submit_after(after_key, fn, payload, **options)
+        else:
+            status = scan_scheduler.submit(fn, payload, coalesce_key=coalesce_key, **options)
+    except SchedulerSaturated as e:
+        print(f"🚦 {e}")
+        return jsonify({"status": "rejected", "reason": str(e)}), e.status_code, {"Retry-After": "60"}
+    return jsonify({"status": status}), 200 if status == "duplicate" else 202
+
+
 @app.route("/health", methods=["GET"])
 def health_check():
     return "OK", 200
 
 
+@app.route("/metrics/scheduler", methods=["GET"])
+def scheduler_metrics():
+    return jsonify(scan_scheduler.metrics()), 200
+
+
+@app.route("/metrics/http", methods=["GET"])
+def http_metrics():
+    return jsonify(http_client.latency_stats()), 200
+
+
 @app.route("/webhook", methods=["POST"])
 def github_webhook():
     verify_signature(request)
@@ -37,31 +83,18 @@ def github_webhook():
 
     if payload.get("action") in ["opened", "reopened", "synchronize"] and "pull_request" in payload:
         print(f"🚀 Webhook Thread: action={payload.get('action')}, repo={payload['repository']['full_name']}")
-        threading.Thread(target=handle_event, args=(payload,)).start()
-        return jsonify({"status": "accepted"}), 202
-        # process_pull_request(payload)
+        # A newer event for the same PR supersedes queued or running scans of it.
+        pr = payload["pull_request"]
+        return enqueue(handle_event, payload, "interactive",
+                       coalesce_key=(payload["repository"]["full_name"], pr["number"]))
     elif payload.get("action") == "closed" and "pull_request" in payload:
         pr = payload["pull_request"]
         if pr.get("merged"):
-            print(f"PR #{pr['number']} merged. Checking for risky packages...")
-            installation = payload["installation"]
-            installation_id = installation["id"]
-
-            access_token = get_installation_access_token(installation_id)
-            github_client = Github(access_token)
-
-            repo_full_name = pr["base"]["repo"]["full_name"]
-            pr_number = pr["number"]
-
-            repo = github_client.get_repo(repo_full_name)
-
-            from utils.pr_processor import scan_risky_packages
-
-            risky_packages = scan_risky_packages(repo, pr_number)
-            if risky_packages:
-                create_risky_issue(repo, pr_number, risky_packages)
-            else:
-                print("No risky packages detected. No issue created.")
+            print(f"PR #{pr['number']} merged. Queuing risky package audit...")
+            # Runs once the PR's queued or running check scan is done, so it can reuse that result.
+            return enqueue(handle_merge, payload, "audit",
+                           after_key=(payload["repository"]["full_name"], pr["number"]))
+        print(f"ℹ️ PR #{pr['number']} closed without merging.")
 
     elif payload.get("action") == "created" and "comment" in payload:
         comment = payload["comment"]
@@ -73,8 +106,7 @@ def github_webhook():
             return jsonify({"status": "ignored"}), 200
 
         print(f"💬 Handling issue comment by {login}")
-        threading.Thread(target=handle_issue_comment, args=(payload,)).start()
-        return jsonify({"status": "accepted"}), 202
+        return enqueue(handle_issue_comment, payload, "comment")
 
     else:
         print("Ignoring non-PR webhook event.")
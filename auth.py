@@ -1,8 +1,11 @@
 import jwt
 import time
-import requests
 import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
 from dotenv import load_dotenv
+from utils import http_client
 load_dotenv()
 
 APP_ID = os.getenv('GITHUB_APP_ID')
@@ -15,10 +18,21 @@ private_key_base64 = os.getenv('GITHUB_PRIVATE_KEY_BASE64')
 PRIVATE_KEY = base64.b64decode(private_key_base64).decode('utf-8') if private_key_base64 else None
 
 
+# Installation tokens live for an hour. They are reused until TOKEN_REFRESH_MARGIN
+# seconds before expiry, and tokens in active use are renewed in the background
+# TOKEN_REFRESH_AHEAD seconds before that, so jobs rarely wait on a token request.
+TOKEN_REFRESH_MARGIN = int(os.getenv("GITHUB_TOKEN_REFRESH_MARGIN", "300"))
+TOKEN_REFRESH_AHEAD = int(os.getenv("GITHUB_TOKEN_REFRESH_AHEAD", "600"))
+TOKEN_IDLE_SECONDS = 3600  # stop renewing tokens nobody asked for in this long
+# Optional SQLite file shared by worker processes (e.g. gunicorn workers), so they
+# don't each mint their own tokens. Unset keeps tokens in memory only.
+TOKEN_STORE_PATH = os.getenv("GITHUB_TOKEN_STORE")
+
 _cached_jwt = None
 _jwt_expiration = 0  # Epoch time
+_jwt_lock = threading.Lock()
 
-def generate_jwt():
+def _generate_jwt_locked():
     global _cached_jwt, _jwt_expiration
     now = int(time.time())
     payload = {
@@ -30,19 +44,227 @@ def generate_jwt():
     _jwt_expiration = now + (8 * 60)  # Refresh 1 min before expiry
     return _cached_jwt
 
+def generate_jwt():
+    with _jwt_lock:
+        return _generate_jwt_locked()
+
 def get_jwt():
-    global _cached_jwt, _jwt_expiration
-    now = int(time.time())
-    if _cached_jwt is None or now >= _jwt_expiration:
-        return generate_jwt()
-    return _cached_jwt
+    with _jwt_lock:
+        if _cached_jwt is None or int(time.time()) >= _jwt_expiration:
+            return _generate_jwt_locked()
+        return _cached_jwt
 
-def get_installation_access_token(installation_id):
+
+class _TokenStore:
+    """Installation tokens in a local SQLite file, readable only by this user."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = None
+
+    def _conn(self):
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            fd = os.open(self.path, os.O_CREAT | os.O_RDWR, 0o600)
+            os.close(fd)
+            self._db = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS installation_tokens ("
+                " installation_id TEXT PRIMARY KEY, token TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.commit()
+        return self._db
+
+    def get(self, installation_id):
+        with self._lock:
+            try:
+                return self._conn().execute(
+                    "SELECT token, expires_at FROM installation_tokens WHERE installation_id = ?",
+                    (str(installation_id),)
+                ).fetchone()
+            except sqlite3.Error as e:
+                print(f"⚠️ Token store read failed: {e}")
+                return None
+
+    def set(self, installation_id, token, expires_at):
+        with self._lock:
+            try:
+                self._conn().execute(
+                    "INSERT OR REPLACE INTO installation_tokens (installation_id, token, expires_at) VALUES (?, ?, ?)",
+                    (str(installation_id), token, expires_at)
+                )
+                self._conn().commit()
+            except sqlite3.Error as e:
+                print(f"⚠️ Token store write failed: {e}")
+
+    def delete(self, installation_id):
+        with self._lock:
+            try:
+                self._conn().execute("DELETE FROM installation_tokens WHERE installation_id = ?", (str(installation_id),))
+                self._conn().commit()
+            except sqlite3.Error as e:
+                print(f"⚠️ Token store write failed: {e}")
+
+
+def _request_installation_token(installation_id):
     headers = {
         "Authorization": f"Bearer {get_jwt()}",
         "Accept": "application/vnd.github+json"
     }
     url = f"https://api.github.com/app/installations/{installation_id}/access_tokens"
-    r = requests.post(url, headers=headers)
+    r = http_client.post(url, headers=headers, idempotent=True)
     r.raise_for_status()
-    return r.json()["token"]
+    data = r.json()
+    expires_at = datetime.strptime(data["expires_at"], "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc).timestamp()
+    return data["token"], expires_at
+
+
+class TokenBroker:
+    """
+    Hands out installation tokens: cached per installation until shortly before
+    expiry, minted at most once at a time per installation, and renewed ahead of
+    expiry by a background thread while they are in use.
+    """
+
+    def __init__(self, store=None):
+        self.store = store
+        self._tokens = {}  # installation id -> (token, expires_at)
+        self._installations = {}  # token -> installation id, so a rejected token can be renewed
+        self._last_used = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+        self._refresher = None
+        self.stats = {"hits": 0, "minted": 0, "refreshed_ahead": 0, "renewed": 0}
+
+    def _installation_lock(self, installation_id):
+        with self._lock:
+            return self._locks.setdefault(installation_id, threading.Lock())
+
+    def _usable(self, entry, margin=TOKEN_REFRESH_MARGIN):
+        return entry is not None and entry[1] - time.time() > margin
+
+    def get(self, installation_id):
+        self._last_used[installation_id] = time.time()
+        self._start_refresher()
+        entry = self._tokens.get(installation_id)
+        if self._usable(entry):
+            self.stats["hits"] += 1
+            return entry[0]
+        with self._installation_lock(installation_id):
+            entry = self._tokens.get(installation_id)
+            if not self._usable(entry) and self.store is not None:
+                entry = self.store.get(installation_id)
+            if self._usable(entry):
+                self._remember(installation_id, tuple(entry))
+                self.stats["hits"] += 1
+                return entry[0]
+            return self._mint(installation_id)
+
+    def _remember(self, installation_id, entry):
+        # Replaced tokens stay mapped for a while, so late 401s on them still find the new token.
+        if len(self._installations) > 4 * len(self._tokens) + 100:
+            self._installations = {token: i for i, (token, _) in self._tokens.items()}
+        self._tokens[installation_id] = entry
+        self._installations[entry[0]] = installation_id
+
+    def _mint(self, installation_id):
+        token, expires_at = _request_installation_token(installation_id)
+        self._remember(installation_id, (token, expires_at))
+        if self.store is not None:
+            self.store.set(installation_id, token, expires_at)
+        self.stats["minted"] += 1
+        return token
+
+    def invalidate(self, installation_id):
+        """Drop a token GitHub rejected (e.g. the installation's permissions changed)."""
+        self._tokens.pop(installation_id, None)
+        if self.store is not None:
+            self.store.delete(installation_id)
+
+    def renew(self, rejected_token):
+        """
+        Replace a token GitHub answered 401 for: drop it everywhere and mint a new one,
+        once per rejected token however many callers report it. None for unknown tokens.
+        """
+        installation_id = self._installations.get(rejected_token)
+        if installation_id is None:
+            return None
+        with self._installation_lock(installation_id):
+            current = self._tokens.get(installation_id)
+            if current is not None and current[0] != rejected_token and self._usable(current):
+                return current[0]  # someone else already renewed it
+            print(f"🔑 GitHub rejected the token for installation {installation_id}, minting a new one")
+            self.invalidate(installation_id)
+            self.stats["renewed"] += 1
+            return self._mint(installation_id)
+
+    def _start_refresher(self):
+        if self._refresher is None:
+            with self._lock:
+                if self._refresher is None:
+                    self._refresher = threading.Thread(target=self._refresh_loop, name="token-refresher", daemon=True)
+                    self._refresher.start()
+
+    def _refresh_loop(self):
+        while True:
+            time.sleep(60)
+            self.refresh_due()
+
+    def refresh_due(self):
+        """Mint new tokens for installations in active use whose token is within the refresh-ahead window."""
+        now = time.time()
+        for installation_id, entry in list(self._tokens.items()):
+            if now - self._last_used.get(installation_id, 0) > TOKEN_IDLE_SECONDS:
+                continue
+            if self._usable(entry, TOKEN_REFRESH_MARGIN + TOKEN_REFRESH_AHEAD):
+                continue
+            try:
+                with self._installation_lock(installation_id):
+                    if not self._usable(self._tokens.get(installation_id), TOKEN_REFRESH_MARGIN + TOKEN_REFRESH_AHEAD):
+                        self._mint(installation_id)
+                        self.stats["refreshed_ahead"] += 1
+            except Exception as e:
+                print(f"⚠️ Could not refresh token for installation {installation_id}: {e}")
+
+
+token_broker = TokenBroker(_TokenStore(TOKEN_STORE_PATH) if TOKEN_STORE_PATH else None)
+
+
+def get_installation_access_token(installation_id):
+    return token_broker.get(installation_id)
+
+
+def is_unauthorized(error) -> bool:
+    """True for a 401 from GitHub, raised by PyGithub (GithubException) or requests (HTTPError)."""
+    response = getattr(error, "response", None)
+    return getattr(error, "status", None) == 401 or getattr(response, "status_code", None) == 401
+
+
+def with_installation_token(installation_id, fn):
+    """
+    Run fn(token) with the installation's token. If GitHub rejects the token (401),
+    e.g. after it was revoked or the installation's permissions changed, the token
+    is renewed and fn runs once more.
+    """
+    token = get_installation_access_token(installation_id)
+    try:
+        return fn(token)
+    except Exception as e:
+        if not is_unauthorized(e):
+            raise
+        return fn(token_broker.renew(token) or get_installation_access_token(installation_id))
+
+
+def authorized_get(url, access_token, headers=None, **kwargs):
+    """GET through utils.http_client with an installation token, renewing the token once on a 401."""
+    headers = dict(headers or {})
+    headers["Authorization"] = f"token {access_token}"
+    response = http_client.get(url, headers=headers, **kwargs)
+    if response.status_code == 401:
+        fresh = token_broker.renew(access_token)
+        if fresh is not None:
+            response.close()
+            headers["Authorization"] = f"token {fresh}"
+            response = http_client.get(url, headers=headers, **kwargs)
+    return response
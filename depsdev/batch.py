@@ -0,0 +1,72 @@
+import os
+from typing import Dict, List, Set, Tuple
+from utils import http_client
+from parsers.python_parser import canonicalize_name
+
+# Point at a local stand-in server (e.g. http://localhost:8080) for testing.
+DEPSDEV_API_BASE = os.getenv("DEPSDEV_API_BASE", "https://api.deps.dev").rstrip("/")
+BATCH_SIZE = int(os.getenv("DEPSDEV_BATCH_SIZE", "5000"))  # deps.dev's per-request maximum
+
+SYSTEMS = {"maven": "MAVEN", "pypi": "PYPI", "npm": "NPM"}
+
+
+def query_depsdev_licenses_batch(keys: List[Tuple[str, str, str]]) -> Tuple[Dict[Tuple[str, str, str], list], Set[Tuple[str, str, str]]]:
+    """
+    Look up many (ecosystem, name, version) keys with POST /v3alpha/versionbatch.
+    Returns ({key: licenses}, answered): the licenses deps.dev knows, and the set
+    of keys whose batch completed. Keys in a failed batch are not "answered", so
+    callers can still try deps.dev for them one by one.
+    """
+    found = {}
+    answered = set()
+    calls = 0
+    keys = [key for key in dict.fromkeys(keys) if key[0] in SYSTEMS]
+    for start in range(0, len(keys), BATCH_SIZE):
+        chunk = keys[start:start + BATCH_SIZE]
+        # Several spellings of one PyPI name share a version key; answer all of them.
+        by_version_key = {}
+        for eco, name, version in chunk:
+            version_key = (SYSTEMS[eco], canonicalize_name(name) if eco == "pypi" else name, version)
+            by_version_key.setdefault(version_key, []).append((eco, name, version))
+        body = {
+            "requests": [
+                {"versionKey": {"system": system, "name": name, "version": version}}
+                for system, name, version in by_version_key
+            ]
+        }
+        page_token = None
+        complete = False
+        while True:
+            if page_token:
+                body["pageToken"] = page_token
+            calls += 1
+            try:
+                response = http_client.post(f"{DEPSDEV_API_BASE}/v3alpha/versionbatch", json=body, idempotent=True)
+            except Exception as e:
+                print(f"⚠️ DepsDev batch request failed: {e}")
+                break
+            if response.status_code != 200:
+                print(f"⚠️ DepsDev batch API failed: {response.status_code}")
+                break
+
+            data = response.json()
+            for item in data.get("responses", []):
+                version_key = (item.get("request") or {}).get("versionKey") or {}
+                requested = by_version_key.get(
+                    (version_key.get("system", "").upper(), version_key.get("name"), version_key.get("version")), []
+                )
+                licenses = (item.get("version") or {}).get("licenses") or []
+                if licenses:
+                    for key in requested:
+                        found[key] = licenses
+
+            page_token = data.get("nextPageToken")
+            if not page_token:
+                complete = True
+                break
+
+        if complete:
+            answered.update(chunk)
+
+    print(f"📦 DepsDev batch resolved {len(found)}/{len(keys)} versions in {calls} request(s)")
+    return found, answered
@@ -0,0 +1,254 @@
+import os
+import json
+import time
+import sqlite3
+import re
+import threading
+import functools
+import inspect
+from collections import OrderedDict
+
+from parsers.python_parser import canonicalize_name
+from depsdev.singleflight import license_flights
+
+CACHE_DIR = os.getenv("LICENSE_CACHE_DIR", "./cache")
+CACHE_DB = os.path.join(CACHE_DIR, "license_cache.sqlite")
+
+# Licenses of a published version never change, so positive results live long.
+# Empty / "Unknown" results are kept briefly so a registry hiccup is retried soon.
+DEFAULT_TTL = int(os.getenv("LICENSE_CACHE_TTL", str(30 * 24 * 3600)))
+NEGATIVE_TTL = int(os.getenv("LICENSE_CACHE_NEGATIVE_TTL", str(6 * 3600)))
+MEMORY_MAX_ENTRIES = int(os.getenv("LICENSE_CACHE_MEMORY_ENTRIES", "20000"))
+DISK_MAX_ENTRIES = int(os.getenv("LICENSE_CACHE_DISK_ENTRIES", "500000"))
+# A disk hit refreshes accessed_at (the disk LRU order) at most this often.
+TOUCH_INTERVAL = int(os.getenv("LICENSE_CACHE_TOUCH_INTERVAL", "3600"))
+
+
+def normalize_name(ecosystem: str, name: str) -> str:
+    name = name.strip()
+    if ecosystem == "pypi":
+        return canonicalize_name(name)
+    if ecosystem == "npm":
+        return name.lower()
+    return name
+
+
+class TieredCache:
+    """
+    Two-tier key/value cache: an in-memory LRU in front of a SQLite table.
+    Values must be JSON serialisable. Safe to share between threads: the lock
+    only guards the in-memory LRU, and each thread talks to SQLite over its
+    own connection.
+    """
+
+    def __init__(self, namespace: str, db_path: str = CACHE_DB,
+                 memory_max_entries: int = MEMORY_MAX_ENTRIES,
+                 disk_max_entries: int = DISK_MAX_ENTRIES,
+                 default_ttl: int = DEFAULT_TTL):
+        self.namespace = namespace
+        self.db_path = db_path
+        self.memory_max_entries = memory_max_entries
+        self.disk_max_entries = disk_max_entries
+        self.default_ttl = default_ttl
+        self._memory = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._schema_ready = False
+        self._writes_since_evict = 0
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+    def _conn(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            db = sqlite3.connect(self.db_path, timeout=30)
+            if not self._schema_ready:
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS cache_entries ("
+                    " namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,"
+                    " expires_at REAL NOT NULL, accessed_at REAL NOT NULL,"
+                    " PRIMARY KEY (namespace, key))"
+                )
+                db.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_cache_entries_accessed"
+                    " ON cache_entries (namespace, accessed_at)"
+                )
+                db.commit()
+                self._schema_ready = True
+            self._local.db = db
+        return db
+
+    def _remember(self, key, expires_at, value):
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_max_entries:
+            self._memory.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            hit = self._memory.get(key)
+            if hit is not None:
+                if hit[0] > now:
+                    self._memory.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    return hit[1]
+                del self._memory[key]
+
+        try:
+            row = self._conn().execute(
+                "SELECT value, expires_at, accessed_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, key)
+            ).fetchone()
+        except sqlite3.Error as e:
+            print(f"⚠️ License cache read failed: {e}")
+            row = None
+
+        if row is None or row[1] <= now:
+            with self._lock:
+                self.stats["misses"] += 1
+            return None
+
+        value = json.loads(row[0])
+        with self._lock:
+            # A concurrent set() may have stored something newer meanwhile.
+            if key not in self._memory:
+                self._remember(key, row[1], value)
+            self.stats["disk_hits"] += 1
+        if now - row[2] > TOUCH_INTERVAL:
+            self._touch(key, now)
+        return value
+
+    def _touch(self, key: str, now: float):
+        # Disk eviction is LRU to within TOUCH_INTERVAL; a write per hit would
+        # serialise every reader on SQLite's write lock.
+        db = self._conn()
+        try:
+            db.execute(
+                "UPDATE cache_entries SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                (now, self.namespace, key)
+            )
+            db.commit()
+        except sqlite3.Error as e:
+            # Only LRU bookkeeping; a busy database must not turn a hit into an error.
+            print(f"⚠️ License cache touch failed: {e}")
+            try:
+                db.rollback()
+            except sqlite3.Error:
+                pass
+
+    def set(self, key: str, value, ttl: int = None):
+        now = time.time()
+        expires_at = now + (self.default_ttl if ttl is None else ttl)
+        with self._lock:
+            self._remember(key, expires_at, value)
+        try:
+            db = self._conn()
+            db.execute(
+                "INSERT OR REPLACE INTO cache_entries (namespace, key, value, expires_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (self.namespace, key, json.dumps(value), expires_at, now)
+            )
+            db.commit()
+            with self._lock:
+                self._writes_since_evict += 1
+                evict = self._writes_since_evict >= 1000
+                if evict:
+                    self._writes_since_evict = 0
+            if evict:
+                self._evict_disk(now)
+        except sqlite3.Error as e:
+            print(f"⚠️ License cache write failed: {e}")
+
+    def _evict_disk(self, now):
+        db = self._conn()
+        db.execute(
+            "DELETE FROM cache_entries WHERE namespace = ? AND expires_at <= ?",
+            (self.namespace, now)
+        )
+        count = db.execute(
+            "SELECT COUNT(*) FROM cache_entries WHERE namespace = ?", (self.namespace,)
+        ).fetchone()[0]
+        overflow = count - self.disk_max_entries
+        if overflow > 0:
+            db.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND key IN ("
+                " SELECT key FROM cache_entries WHERE namespace = ?"
+                " ORDER BY accessed_at ASC LIMIT ?)",
+                (self.namespace, self.namespace, overflow)
+            )
+            with self._lock:
+                self.stats["evictions"] += overflow
+        db.commit()
+
+    def hit_rate(self) -> float:
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        total = hits + self.stats["misses"]
+        return hits / total if total else 0.0
+
+
+license_cache = TieredCache("licenses")
+
+
+_EXACT_VERSION = re.compile(r"^[0-9][0-9A-Za-z.+_-]*$")
+
+
+def is_exact_version(version: str) -> bool:
+    """Ranges, 'latest' and unresolved versions can change meaning over time."""
+    return bool(version) and bool(_EXACT_VERSION.match(version.strip()))
+
+
+def license_cache_key(ecosystem: str, name: str, version: str) -> str:
+    return f"{ecosystem}:{normalize_name(ecosystem, name)}@{version.strip()}"
+
+
+def license_flight_key(ecosystem: str, name: str, version: str, **options) -> str:
+    """Single-flight key: the cache key plus every option that changes the answer (e.g. use_depsdev)."""
+    key = license_cache_key(ecosystem, name, version)
+    return key + "".join(f"|{option}={options[option]}" for option in sorted(options))
+
+
+def get_cached_license(ecosystem: str, name: str, version: str):
+    cached = license_cache.get(license_cache_key(ecosystem, name, version))
+    if cached is None:
+        return None
+    return cached[0], cached[1]
+
+
+def store_license(ecosystem: str, name: str, version: str, licenses: list, source: str):
+    ttl = DEFAULT_TTL if licenses and is_exact_version(version) else NEGATIVE_TTL
+    license_cache.set(license_cache_key(ecosystem, name, version), [licenses, source], ttl=ttl)
+
+
+def cached_license_lookup(ecosystem: str):
+    """
+    Decorator for the depsdev query functions: (name, version) -> (licenses, source).
+    Results are stored under (ecosystem, normalized name, version), and
+    concurrent misses for the same key share one outbound call.
+    The undecorated lookup stays reachable as `.uncached` for callers that
+    have already consulted the cache themselves.
+    """
+    def decorator(fn):
+        signature = inspect.signature(fn)
+        parameters = list(signature.parameters)
+
+        def fetch(name, version, *args, **kwargs):
+            licenses, source = fn(name, version, *args, **kwargs)
+            store_license(ecosystem, name, version, licenses, source)
+            return licenses, source
+
+        @functools.wraps(fn)
+        def wrapper(name: str, version: str, *args, **kwargs):
+            cached = get_cached_license(ecosystem, name, version)
+            if cached is not None:
+                return cached
+            bound = signature.bind(name, version, *args, **kwargs)
+            bound.apply_defaults()
+            options = {k: v for k, v in bound.arguments.items() if k not in parameters[:2]}
+            return license_flights.do(license_flight_key(ecosystem, name, version, **options),
+                                      fetch, name, version, *args, **kwargs)
+        wrapper.uncached = fn
+        return wrapper
+    return decorator
@@ -1,19 +1,100 @@
-import requests
+import os
+import json
+import time
+from utils import http_client
+from depsdev.cache import cached_license_lookup, TieredCache
+from depsdev.semver import is_exact, max_satisfying
+from depsdev.singleflight import packument_flights
 
+try:
+    import ijson  # streams the version list out of large packuments
+except ImportError:
+    ijson = None
+
+NPM_REGISTRY = os.getenv("NPM_REGISTRY", "https://registry.npmjs.org").rstrip("/")
+# Abbreviated ("corgi") metadata: versions and dist info only, much smaller than the full packument.
+ABBREVIATED_ACCEPT = "application/vnd.npm.install-v1+json; q=1.0, application/json; q=0.8"
+# Version lists are revalidated with If-None-Match after this many seconds.
+PACKUMENT_FRESH_SECONDS = int(os.getenv("NPM_PACKUMENT_FRESH_SECONDS", "3600"))
+
+packument_cache = TieredCache("npm_packuments", memory_max_entries=2000)
+
+
+def _escape(package: str) -> str:
+    # Scoped names are requested as @scope%2Fname, the way the npm CLI does.
+    return package.replace("/", "%2F")
+
+
+def _version_list(response) -> list:
+    if ijson is not None:
+        versions = []
+        for prefix, event, value in ijson.parse(response.raw):
+            if prefix == "versions" and event == "map_key":
+                versions.append(value)
+        return versions
+    return list(json.loads(response.content).get("versions", {}).keys())
+
+
+def get_npm_versions(package: str) -> list:
+    """All published versions of `package`, from the abbreviated packument, cached by ETag."""
+    cached = packument_cache.get(package.lower())
+    if cached and time.time() - cached["checked_at"] < PACKUMENT_FRESH_SECONDS:
+        return cached["versions"]
+    # Every range of a popular package needs the same packument; fetch it once.
+    return packument_flights.do(package.lower(), _fetch_versions, package, cached)
+
+
+def _fetch_versions(package: str, cached) -> list:
+    headers = {"Accept": ABBREVIATED_ACCEPT, "Accept-Encoding": "gzip"}
+    if cached and cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+    with http_client.get(f"{NPM_REGISTRY}/{_escape(package)}", headers=headers, stream=True) as response:
+        if response.status_code == 304 and cached:
+            cached["checked_at"] = time.time()
+            packument_cache.set(package.lower(), cached)
+            return cached["versions"]
+        if response.status_code != 200:
+            print(f"NPM API failed: {response.status_code}")
+            return cached["versions"] if cached else []
+        response.raw.decode_content = True
+        versions = _version_list(response)
+        etag = response.headers.get("ETag")
+
+    packument_cache.set(package.lower(), {"etag": etag, "versions": versions, "checked_at": time.time()})
+    return versions
+
+
+def _license_names(doc: dict) -> list:
+    license_info = doc.get("license")
+    if isinstance(license_info, str):
+        return [license_info]
+    if isinstance(license_info, dict):
+        return [license_info.get("type", "Unknown")]
+    # Old packages use a "licenses" array.
+    legacy = doc.get("licenses")
+    if isinstance(legacy, list):
+        return [l.get("type", "Unknown") if isinstance(l, dict) else str(l) for l in legacy]
+    return []
+
+
+@cached_license_lookup("npm")
 def query_npm_license(package: str, version: str):
-    package_url = f"https://registry.npmjs.org/{package}"
-    response = requests.get(package_url)
+    version = (version or "").strip()
+    if version in ("", "*", "latest"):
+        resolved = "latest"  # dist-tag, served by the per-version endpoint
+    elif is_exact(version):
+        resolved = version.lstrip("=v")
+    else:
+        resolved = max_satisfying(get_npm_versions(package), version)
+        if resolved is None:
+            print(f"⚠️ No published version of {package} satisfies {version}")
+            return [], "NPM"
+
+    # Per-version document: a few KB instead of the full packument. Unlike the
+    # packument, this route only matches the unescaped @scope/name form.
+    response = http_client.get(f"{NPM_REGISTRY}/{package}/{resolved}")
     if response.status_code != 200:
         print(f"NPM API failed: {response.status_code}")
         return [], "NPM"
-    data = response.json()
-    versions = data.get("versions", {})
-    if version in versions:
-        license_info = versions[version].get("license")
-        if license_info:
-            if isinstance(license_info, str):
-                return [license_info], "NPM"
-            if isinstance(license_info, dict):
-                return [license_info.get("type", "Unknown")], "NPM"
-    return [], "NPM"
-
+    licenses = _license_names(response.json())
+    return licenses, "NPM"
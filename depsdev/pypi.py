@@ -1,28 +1,35 @@
-import requests
+from utils import http_client
+from depsdev.cache import cached_license_lookup, is_exact_version
+from depsdev.batch import DEPSDEV_API_BASE
+from parsers.python_parser import canonicalize_name
 import os
 
 GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")  # optional for GitHub API auth
 
-def query_pypi_license(package: str, version: str):
-    # Try DepsDev first
-    depsdev_url = f"https://api.deps.dev/v3alpha/systems/pypi/packages/{package}/versions/{version}"
-    depsdev_response = requests.get(depsdev_url)
-    if depsdev_response.status_code == 200:
+@cached_license_lookup("pypi")
+def query_pypi_license(package: str, version: str, use_depsdev: bool = True):
+    package = canonicalize_name(package)
+    exact = is_exact_version(version)
+
+    # Try DepsDev first, unless a batch lookup already missed
+    depsdev_url = f"{DEPSDEV_API_BASE}/v3alpha/systems/pypi/packages/{package}/versions/{version}"
+    depsdev_response = http_client.get(depsdev_url) if use_depsdev and exact else None
+    if depsdev_response is not None and depsdev_response.status_code == 200:
         data = depsdev_response.json()
         licenses = data.get("licenses", [])
         if licenses:
             return licenses, "DepsDev"
 
-    # Fallback to PyPI
-    pypi_url = f"https://pypi.org/pypi/{package}/json"
-    pypi_response = requests.get(pypi_url)
+    # Fallback to PyPI; the versioned document is much smaller than the full release history
+    pypi_url = f"https://pypi.org/pypi/{package}/{version}/json" if exact else f"https://pypi.org/pypi/{package}/json"
+    pypi_response = http_client.get(pypi_url)
     if pypi_response.status_code != 200:
         print(f"PyPI API failed: {pypi_response.status_code}")
         return [], "PyPI"
     
     data = pypi_response.json()
     info = data.get("info", {})
-    license_name = info.get("license")
+    license_name = info.get("license_expression") or info.get("license")
     if license_name:
         return [license_name], "PyPI"
 
@@ -42,7 +49,7 @@ def query_pypi_license(package: str, version: str):
         if GITHUB_TOKEN:
             headers["Authorization"] = f"Bearer {GITHUB_TOKEN}" 
 
-        github_response = requests.get(repo_api_url, headers=headers)
+        github_response = http_client.get(repo_api_url, headers=headers)
         if github_response.status_code == 200:
             github_data = github_response.json()
             license_info = github_data.get("license", {})
@@ -0,0 +1,165 @@
+import re
+from typing import Iterable, List, Optional, Tuple
+
+# Just enough of node-semver to pick a version for the ranges found in package.json.
+
+_VERSION = re.compile(
+    r"^\s*v?(\d+)\.(\d+)\.(\d+)(?:-([0-9A-Za-z.-]+))?(?:\+[0-9A-Za-z.-]+)?\s*$"
+)
+_PARTIAL = re.compile(r"^\s*v?(\d+|[xX*])(?:\.(\d+|[xX*]))?(?:\.(\d+|[xX*]))?(?:-([0-9A-Za-z.-]+))?\s*$")
+_COMPARATOR = re.compile(r"^(<=|>=|<|>|=|\^|~>?)?\s*(.+)$")
+
+
+def parse_version(version: str) -> Optional[Tuple]:
+    """(major, minor, patch, prerelease tuple) or None. Release sorts above its prereleases."""
+    match = _VERSION.match(version or "")
+    if not match:
+        return None
+    major, minor, patch, pre = match.groups()
+    pre_key = tuple(int(p) if p.isdigit() else p for p in pre.split(".")) if pre else None
+    return int(major), int(minor), int(patch), pre_key
+
+
+def _sort_key(parsed: Tuple):
+    major, minor, patch, pre = parsed
+    if pre is None:
+        return major, minor, patch, 1, ()
+    return major, minor, patch, 0, tuple((0, p) if isinstance(p, int) else (1, p) for p in pre)
+
+
+def is_exact(version: str) -> bool:
+    return parse_version(version) is not None
+
+
+def _partial(text: str):
+    match = _PARTIAL.match(text)
+    if not match:
+        return None
+    parts = []
+    for part in match.groups()[:3]:
+        parts.append(None if part is None or part in "xX*" else int(part))
+    return parts, match.group(4)
+
+
+def _comparators(operator: str, text: str) -> Optional[List[Tuple[str, Tuple]]]:
+    parsed = _partial(text)
+    if parsed is None:
+        return None
+    (major, minor, patch), pre = parsed
+    pre_key = tuple(int(p) if p.isdigit() else p for p in pre.split(".")) if pre else None
+
+    if major is None:
+        return []  # "*" / "x"
+    low = (major, minor or 0, patch or 0, pre_key)
+
+    if operator in ("", "="):
+        if minor is None:
+            return [(">=", low), ("<", (major + 1, 0, 0, (0,)))]
+        if patch is None:
+            return [(">=", low), ("<", (major, minor + 1, 0, (0,)))]
+        return [("=", low)]
+    if operator == "^":
+        if major > 0 or minor is None:
+            upper = (major + 1, 0, 0, (0,))
+        elif minor > 0 or patch is None:
+            upper = (0, minor + 1, 0, (0,))
+        else:
+            upper = (0, 0, patch + 1, (0,))
+        return [(">=", low), ("<", upper)]
+    if operator in ("~", "~>"):
+        upper = (major + 1, 0, 0, (0,)) if minor is None else (major, minor + 1, 0, (0,))
+        return [(">=", low), ("<", upper)]
+    if operator in (">", "<=") and (minor is None or patch is None):
+        # ">1" means ">=2.0.0", "<=1.2" means "<1.3.0"
+        bump = (major + 1, 0, 0, (0,)) if minor is None else (major, minor + 1, 0, (0,))
+        return [(">=" if operator == ">" else "<", bump)]
+    return [(operator, low)]
+
+
+def _prerelease_tuple(text: str) -> Optional[Tuple]:
+    """(major, minor, patch) of a comparator that names a prerelease, e.g. ">=1.3.0-beta.1"."""
+    parsed = _partial(text)
+    if parsed is None or parsed[1] is None or parsed[0][0] is None:
+        return None
+    major, minor, patch = parsed[0]
+    return major, minor or 0, patch or 0
+
+
+def _parse_range(range_: str) -> Optional[List[Tuple[List[Tuple[str, Tuple]], set]]]:
+    """
+    A range is an OR of AND-ed comparator sets. Each set comes with the
+    (major, minor, patch) tuples its comparators name a prerelease on, since
+    node-semver only lets prereleases of those tuples match.
+    """
+    alternatives = []
+    for alternative in range_.split("||"):
+        alternative = alternative.strip()
+        hyphen = re.match(r"^(\S+)\s+-\s+(\S+)$", alternative)
+        if hyphen:
+            low = _comparators(">=", hyphen.group(1))
+            high_partial = _partial(hyphen.group(2))
+            if low is None or high_partial is None:
+                return None
+            (major, minor, patch), _ = high_partial
+            if major is None:
+                high = []
+            elif minor is None:
+                high = [("<", (major + 1, 0, 0, (0,)))]
+            elif patch is None:
+                high = [("<", (major, minor + 1, 0, (0,)))]
+            else:
+                high = [("<=", (major, minor, patch, None))]
+            prereleases = {_prerelease_tuple(hyphen.group(1))} - {None}
+            alternatives.append((low + high, prereleases))
+            continue
+
+        comparators = []
+        prereleases = set()
+        tokens = re.findall(r"(<=|>=|<|>|=|\^|~>?)?\s*([^\s<>=^~]+)", alternative)
+        for operator, text in tokens:
+            parsed = _comparators(operator or "", text)
+            if parsed is None:
+                return None
+            comparators.extend(parsed)
+            prereleases.add(_prerelease_tuple(text))
+        alternatives.append((comparators, prereleases - {None}))
+    return alternatives
+
+
+def _satisfies(parsed: Tuple, comparators: List[Tuple[str, Tuple]]) -> bool:
+    key = _sort_key(parsed)
+    for operator, bound in comparators:
+        other = _sort_key(bound)
+        if operator == "=" and key != other:
+            return False
+        if operator == ">=" and key < other:
+            return False
+        if operator == ">" and key <= other:
+            return False
+        if operator == "<=" and key > other:
+            return False
+        if operator == "<" and key >= other:
+            return False
+    return True
+
+
+def max_satisfying(versions: Iterable[str], range_: str) -> Optional[str]:
+    """Highest version in `versions` matching the npm range; None if nothing matches or the range is not understood."""
+    range_ = (range_ or "").strip()
+    if range_ in ("", "latest"):
+        range_ = "*"
+    alternatives = _parse_range(range_)
+    if alternatives is None:
+        return None
+
+    best, best_key = None, None
+    for version in versions:
+        parsed = parse_version(version)
+        if parsed is None:
+            continue
+        if any(_satisfies(parsed, comparators) and (parsed[3] is None or parsed[:3] in prereleases)
+               for comparators, prereleases in alternatives):
+            key = _sort_key(parsed)
+            if best_key is None or key > best_key:
+                best, best_key = version, key
+    return best
@@ -0,0 +1,78 @@
+import os
+import time
+import threading
+
+# Failures are shared with callers that arrive within this window, so a registry
+# outage costs one timeout per key instead of one per scan.
+ERROR_TTL = float(os.getenv("SINGLEFLIGHT_ERROR_TTL", "30"))
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls with the same key into one: the first caller
+    runs fn, everyone arriving while it is in flight waits for and shares its
+    result or exception. Exceptions are replayed for ERROR_TTL seconds.
+    """
+
+    def __init__(self, name: str, error_ttl: float = ERROR_TTL):
+        self.name = name
+        self.error_ttl = error_ttl
+        self._calls = {}
+        self._errors = {}  # key -> (expires_at, exception)
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "collapsed": 0, "errors_replayed": 0}
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            failed = self._errors.get(key)
+            if failed is not None:
+                if failed[0] > time.time():
+                    self.stats["errors_replayed"] += 1
+                    raise failed[1]
+                del self._errors[key]
+
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.stats["calls"] += 1
+            else:
+                self.stats["collapsed"] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except Exception as e:
+            call.error = e
+            with self._lock:
+                now = time.time()
+                if len(self._errors) > 1000:
+                    self._errors = {k: v for k, v in self._errors.items() if v[0] > now}
+                self._errors[key] = (now + self.error_ttl, e)
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def in_flight(self, key) -> bool:
+        with self._lock:
+            return key in self._calls
+
+
+# One flight group per kind of outbound lookup.
+license_flights = SingleFlight("licenses")
+packument_flights = SingleFlight("npm_packuments")
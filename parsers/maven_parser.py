@@ -1,12 +1,10 @@
 import xml.etree.ElementTree as ET
 import re
-import requests
 from typing import List, Tuple, Dict
 import subprocess
 import os
 
-MAVEN_CENTRAL_BASE = "https://repo1.maven.org/maven2"
-SPRING_REPO_BASE = "https://repo.spring.io/snapshot"
+from parsers.pom_store import pom_store, MAVEN_CENTRAL_BASE, SPRING_REPO_BASE
 
 
 def parse_pom_xml(content: str) -> List[Tuple[str, str]]:
@@ -45,24 +43,14 @@ def parse_pom_xml(content: str) -> List[Tuple[str, str]]:
         return props
 
     def fetch_parent_pom(group_id: str, artifact_id: str, version: str) -> Dict[str, str]:
-        rel_path = f"{group_id.replace('.', '/')}/{artifact_id}/{version}/{artifact_id}-{version}.pom"
-        urls = [
-            f"{MAVEN_CENTRAL_BASE}/{rel_path}",
-            f"{SPRING_REPO_BASE}/{rel_path}"
-        ]
-        for url in urls:
-            print(f"🌐 Trying POM URL: {url}")
-            try:
-                resp = requests.get(url)
-                if resp.status_code == 200:
-                    print(f"✅ Successfully fetched POM: {url}")
-                    parent_root = ET.fromstring(resp.text)
-                    return extract_properties(parent_root)
-                else:
-                    print(f"⚠️ Failed to fetch POM: {url}")
-            except Exception as e:
-                print(f"⚠️ Exception fetching POM: {url} => {e}")
-        return {}
+        text = pom_store.get_text(group_id, artifact_id, version)
+        if text is None:
+            return {}
+        try:
+            return extract_properties(ET.fromstring(text))
+        except ET.ParseError as e:
+            print(f"⚠️ Exception parsing POM {group_id}:{artifact_id}:{version} => {e}")
+            return {}
 
     properties = extract_properties(root)
     print(f"📦 Collected properties: {properties}")
@@ -120,22 +108,55 @@ def parse_pom_xml(content: str) -> List[Tuple[str, str]]:
     print(f"✅ Total dependencies found: {len(results)}")
     return results
 
+# mvn dependency:list prints one block per module:
+#   [INFO] --- dependency:3.6.1:list (default-cli) @ my-module ---
+#   [INFO]    org.springframework:spring-core:jar:6.1.2:compile -- module spring.core
+_MODULE_HEADER = re.compile(r"^\[INFO\] --- \S*:list \(.*?\) @ (\S+) ---")
+_DEPENDENCY_LINE = re.compile(r"^\[INFO\]\s+([^\s:]+:[^\s:]+:[^\s]+)")
+
+
+def _parse_dependency_list_output(output: str) -> Dict[str, List[Tuple[str, str]]]:
+    """Split `mvn dependency:list` stdout into {module artifactId: [(group:artifact, version)]}."""
+    modules = {}
+    current = None
+    for line in output.splitlines():
+        header = _MODULE_HEADER.match(line)
+        if header:
+            current = header.group(1)
+            modules.setdefault(current, [])
+            continue
+        if current is None or line.startswith("[INFO] ---") or line.startswith("[INFO] The "):
+            continue
+        match = _DEPENDENCY_LINE.match(line)
+        if not match:
+            continue
+        parts = match.group(1).split(":")
+        # group:artifact:type:version:scope or group:artifact:type:classifier:version:scope
+        if len(parts) == 5:
+            group, artifact, _, version, _ = parts
+        elif len(parts) == 6:
+            group, artifact, _, _, version, _ = parts
+        else:
+            continue
+        modules[current].append((f"{group}:{artifact}", version))
+    return modules
+
+
+def _run_dependency_list(cwd: str, extra_args: List[str]):
+    return subprocess.run([
+        "mvn", "-B", "-Dstyle.color=never", "dependency:list",
+        "-DincludeScope=compile",
+        "-DoutputAbsoluteArtifactFilename=false",
+    ] + extra_args, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+
+
 def parse_pom_xml_via_maven(repo_dir: str) -> List[Tuple[str, str]]:
 
     try:
         print("🔧 Running Maven to list dependencies...")
 
-
-        output_file_path = os.path.join(repo_dir, "target", "dependencies.txt")
-        os.makedirs(os.path.dirname(output_file_path), exist_ok=True)
-
-        result = subprocess.run([
-            "mvn", "dependency:list",
-            "-DincludeScope=compile",
-            "-Doutput=dependencies",
-            "-DoutputAbsoluteArtifactFilename=false",
-            f"-DoutputFile={output_file_path}"
-        ], cwd=repo_dir, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        # -N keeps this to the module itself; whole reactors go through parse_maven_reactor.
+        result = _run_dependency_list(repo_dir, ["-N"])
 
         if result.returncode != 0:
             print("❌ Maven command failed:")
@@ -143,29 +164,109 @@ def parse_pom_xml_via_maven(repo_dir: str) -> List[Tuple[str, str]]:
             print(result.stderr)
             return []
 
-        if not os.path.exists(output_file_path):
-            print("⚠️ dependencies.txt not found.")
-            return []
-
-        with open(output_file_path) as f:
-            lines = f.readlines()
-
         results = []
-        for line in lines:
-            line = line.strip()
-            if ":" in line and not line.startswith("The ") and not line.startswith("---"):
-                parts = line.split(":")
-                if len(parts) >= 5:
-                    group = parts[0].strip()
-                    artifact = parts[1].strip()
-                    version = parts[3].strip()
-                    ga = f"{group}:{artifact}"
-                    print(f"✅ Found dependency: {ga}, version: {version}")
-                    results.append((ga, version))
+        for module_deps in _parse_dependency_list_output(result.stdout).values():
+            for ga, version in module_deps:
+                print(f"✅ Found dependency: {ga}, version: {version}")
+                results.append((ga, version))
 
         print(f"✅ Total dependencies found: {len(results)}")
         return results
 
     except Exception as e:
         print(f"❌ Failed to run Maven: {e}")
-        return []
\ No newline at end of file
+        return []
+
+
+_POM_NS = {'mvn': 'http://maven.apache.org/POM/4.0.0'}
+
+
+def _read_local_pom(pom_path: str):
+    try:
+        return ET.parse(pom_path).getroot()
+    except (ET.ParseError, OSError) as e:
+        print(f"⚠️ Could not read {pom_path}: {e}")
+        return None
+
+
+def _pom_modules(repo_dir: str, pom_rel_path: str) -> List[str]:
+    """Repo-relative pom.xml paths of the <modules> (including active-by-default profiles)."""
+    root = _read_local_pom(os.path.join(repo_dir, pom_rel_path))
+    if root is None:
+        return []
+    module_elems = root.findall('mvn:modules/mvn:module', _POM_NS)
+    for profile in root.findall('mvn:profiles/mvn:profile', _POM_NS):
+        active = profile.find('mvn:activation/mvn:activeByDefault', _POM_NS)
+        if active is not None and (active.text or "").strip() == "true":
+            module_elems.extend(profile.findall('mvn:modules/mvn:module', _POM_NS))
+
+    base_dir = os.path.dirname(pom_rel_path)
+    modules = []
+    for elem in module_elems:
+        if not elem.text:
+            continue
+        module_path = os.path.normpath(os.path.join(base_dir, elem.text.strip()))
+        if not module_path.endswith(".xml"):
+            module_path = os.path.join(module_path, "pom.xml")
+        modules.append(module_path.replace(os.sep, "/"))
+    return modules
+
+
+def _reactor_members(repo_dir: str, aggregator_pom: str) -> List[str]:
+    members, queue, seen = [], [aggregator_pom], set()
+    while queue:
+        pom = queue.pop()
+        if pom in seen or not os.path.exists(os.path.join(repo_dir, pom)):
+            continue
+        seen.add(pom)
+        members.append(pom)
+        queue.extend(_pom_modules(repo_dir, pom))
+    return members
+
+
+def find_reactor_roots(repo_dir: str, pom_paths: List[str]) -> List[str]:
+    """Aggregator POMs (those with <modules>) that are not themselves a module of another aggregator."""
+    aggregators = [p for p in pom_paths if _pom_modules(repo_dir, p)]
+    covered = set()
+    for aggregator in aggregators:
+        covered.update(m for m in _reactor_members(repo_dir, aggregator) if m != aggregator)
+    return [p for p in aggregators if p not in covered]
+
+
+def parse_maven_reactor(repo_dir: str, aggregator_pom: str) -> Dict[str, List[Tuple[str, str]]]:
+    """
+    Run one `mvn dependency:list` for the whole reactor rooted at `aggregator_pom`
+    and split the output back per module. Returns {repo-relative pom path: [(group:artifact, version)]}.
+    Modules Maven could not resolve are missing from the result.
+    """
+    members = _reactor_members(repo_dir, aggregator_pom)
+    by_artifact_id = {}
+    for pom in members:
+        root = _read_local_pom(os.path.join(repo_dir, pom))
+        artifact_id = root.find('mvn:artifactId', _POM_NS) if root is not None else None
+        if artifact_id is not None and artifact_id.text:
+            by_artifact_id[artifact_id.text.strip()] = pom
+
+    print(f"🔧 Running Maven reactor for {aggregator_pom} ({len(members)} module(s))...")
+    try:
+        # --fail-at-end so one broken module doesn't hide the others' results.
+        result = _run_dependency_list(os.path.join(repo_dir, os.path.dirname(aggregator_pom)), ["-fae"])
+    except Exception as e:
+        print(f"❌ Failed to run Maven: {e}")
+        return {}
+    if result.returncode != 0:
+        print(f"⚠️ Maven reactor finished with errors for {aggregator_pom}; keeping resolved modules.")
+
+    modules = _parse_dependency_list_output(result.stdout)
+    for failed in re.findall(r"on project ([^\s:]+)", result.stdout):
+        modules.pop(failed, None)
+
+    results = {}
+    for artifact_id, deps in modules.items():
+        pom = by_artifact_id.get(artifact_id)
+        if pom is None:
+            print(f"⚠️ Reactor module {artifact_id} not matched to a pom.xml")
+            continue
+        results[pom] = deps
+        print(f"✅ {pom}: {len(deps)} dependencies")
+    return results
@@ -0,0 +1,536 @@
+import os
+import re
+import sys
+import time
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from fnmatch import fnmatchcase
+from typing import Dict, List, Optional, Tuple
+
+from parsers.maven_parser import parse_pom_xml_via_maven
+from parsers.pom_store import PomStore, pom_store, strip_namespaces
+
+# Same selection as `mvn dependency:list -DincludeScope=compile`, so both resolvers agree.
+INCLUDED_SCOPES = ("compile", "provided", "system")
+
+# Maven's scope propagation: SCOPE_TABLE[scope of the dependency][scope of its dependency].
+SCOPE_TABLE = {
+    "compile": {"compile": "compile", "runtime": "runtime"},
+    "provided": {"compile": "provided", "runtime": "provided"},
+    "runtime": {"compile": "runtime", "runtime": "runtime"},
+    "test": {"compile": "test", "runtime": "test"},
+}
+
+FETCH_WORKERS = int(os.getenv("MAVEN_RESOLVER_FETCH_WORKERS", "16"))
+
+_PROPERTY = re.compile(r"\$\{([^}]+)\}")
+
+
+def _parse_xml(text: str):
+    """Parse a POM and drop XML namespaces, so old namespace-less POMs read the same."""
+    return strip_namespaces(ET.fromstring(text))
+
+
+def _text(elem, path: str) -> Optional[str]:
+    if elem is None:
+        return None
+    found = elem.find(path)
+    if found is None or found.text is None:
+        return None
+    return found.text.strip() or None
+
+
+def _interpolate(value: Optional[str], props: Dict[str, str]) -> Optional[str]:
+    if value is None:
+        return None
+    for _ in range(10):  # nested properties, e.g. ${spring.version} -> ${revision}
+        replaced = _PROPERTY.sub(lambda m: props.get(m.group(1), m.group(0)), value)
+        if replaced == value:
+            break
+        value = replaced
+    return value
+
+
+_QUALIFIERS = {"alpha": 0, "a": 0, "beta": 1, "b": 1, "milestone": 2, "m": 2, "rc": 3, "cr": 3,
+               "snapshot": 4, "": 5, "ga": 5, "final": 5, "release": 5, "sp": 6}
+_RELEASE = (1, 5, "")
+_RANGE = re.compile(r"([\[(])([^\])]*)([\])])")
+
+
+def _version_key(version: str) -> tuple:
+    """
+    Sort key close to Maven's ComparableVersion: numeric parts compare as numbers,
+    alpha < beta < milestone < rc < snapshot < release < sp < unknown qualifiers,
+    and trailing zeros / release qualifiers don't count (1.0 == 1.0.0 == 1-ga).
+    """
+    items = []
+    for token in re.findall(r"\d+|[a-z]+", version.lower()):
+        if token.isdigit():
+            items.append((2, int(token), ""))
+        else:
+            items.append((1, _QUALIFIERS.get(token, 7), token if token not in _QUALIFIERS else ""))
+    while items and items[-1] in ((2, 0, ""), _RELEASE):
+        items.pop()
+    return tuple(items)
+
+
+def _compare_versions(a: str, b: str) -> int:
+    ka, kb = _version_key(a), _version_key(b)
+    for i in range(max(len(ka), len(kb))):
+        # A missing part is 0 against a number and "release" against a qualifier:
+        # 1.0 < 1.0.1, but 1.0-beta < 1.0 < 1.0-sp.
+        x = ka[i] if i < len(ka) else ((2, 0, "") if kb[i][0] == 2 else _RELEASE)
+        y = kb[i] if i < len(kb) else ((2, 0, "") if ka[i][0] == 2 else _RELEASE)
+        if x != y:
+            return -1 if x < y else 1
+    return 0
+
+
+def is_version_range(version: Optional[str]) -> bool:
+    return bool(version) and version[0] in "[("
+
+
+def _in_range(version: str, spec: str) -> bool:
+    """Maven range spec, e.g. "[1.0,2.0)", "(,1.5]", "[1.2]" or a union "[1.0,1.2],[1.5,)"."""
+    for low_bracket, bounds, high_bracket in _RANGE.findall(spec):
+        if "," not in bounds:
+            if _compare_versions(version, bounds.strip()) == 0:
+                return True
+            continue
+        low, high = (b.strip() for b in bounds.split(",", 1))
+        if low:
+            cmp = _compare_versions(version, low)
+            if cmp < 0 or (cmp == 0 and low_bracket == "("):
+                continue
+        if high:
+            cmp = _compare_versions(version, high)
+            if cmp > 0 or (cmp == 0 and high_bracket == ")"):
+                continue
+        return True
+    return False
+
+
+def highest_in_range(spec: str, versions: List[str]) -> Optional[str]:
+    """The version Maven would pick for a range: the highest published release inside it."""
+    best = None
+    for version in versions:
+        if version.endswith("-SNAPSHOT") or not _in_range(version, spec):
+            continue
+        if best is None or _compare_versions(version, best) > 0:
+            best = version
+    return best
+
+
+class UnresolvedRange(Exception):
+    """A version range with no metadata to resolve it against; the module falls back to mvn."""
+
+
+def _excluded(key: Tuple[str, str], exclusions) -> bool:
+    """Exclusions match on groupId and artifactId, either of which may be or contain `*`."""
+    if key in exclusions:
+        return True
+    group, artifact = key
+    return any(
+        ("*" in ex_group or "*" in ex_artifact)
+        and fnmatchcase(group or "", ex_group) and fnmatchcase(artifact or "", ex_artifact)
+        for ex_group, ex_artifact in exclusions
+    )
+
+
+def _raw_dependency(elem) -> dict:
+    return {
+        "groupId": _text(elem, "groupId"),
+        "artifactId": _text(elem, "artifactId"),
+        "version": _text(elem, "version"),
+        "scope": _text(elem, "scope"),
+        "type": _text(elem, "type") or "jar",
+        "classifier": _text(elem, "classifier"),
+        "optional": (_text(elem, "optional") or "false") == "true",
+        "exclusions": {
+            (_text(e, "groupId") or "*", _text(e, "artifactId") or "*")
+            for e in elem.findall("exclusions/exclusion")
+        },
+    }
+
+
+def _raw_model(root) -> dict:
+    parent = root.find("parent")
+    parent_coords = None
+    if parent is not None:
+        parent_coords = (
+            _text(parent, "groupId"),
+            _text(parent, "artifactId"),
+            _text(parent, "version"),
+            _text(parent, "relativePath"),
+        )
+
+    properties = {}
+    props_elem = root.find("properties")
+    if props_elem is not None:
+        for prop in props_elem:
+            if isinstance(prop.tag, str):
+                properties[prop.tag] = (prop.text or "").strip()
+
+    dependencies = [_raw_dependency(d) for d in root.findall("dependencies/dependency")]
+    management = [_raw_dependency(d) for d in root.findall("dependencyManagement/dependencies/dependency")]
+
+    # Only activeByDefault profiles are applied; jdk/os/property activation is not evaluated.
+    for profile in root.findall("profiles/profile"):
+        if (_text(profile, "activation/activeByDefault") or "false") != "true":
+            continue
+        profile_props = profile.find("properties")
+        if profile_props is not None:
+            for prop in profile_props:
+                if isinstance(prop.tag, str):
+                    properties[prop.tag] = (prop.text or "").strip()
+        dependencies.extend(_raw_dependency(d) for d in profile.findall("dependencies/dependency"))
+        management.extend(_raw_dependency(d) for d in profile.findall("dependencyManagement/dependencies/dependency"))
+
+    return {
+        "groupId": _text(root, "groupId") or (parent_coords[0] if parent_coords else None),
+        "artifactId": _text(root, "artifactId"),
+        "version": _text(root, "version") or (parent_coords[2] if parent_coords else None),
+        "packaging": _text(root, "packaging") or "jar",
+        "parent": parent_coords,
+        "properties": properties,
+        "dependencies": dependencies,
+        "management": management,
+        "licenses": [_text(l, "name") for l in root.findall("licenses/license") if _text(l, "name")],
+    }
+
+
+def _read_maven_config(repo_dir: str) -> Dict[str, str]:
+    """-Dkey=value user properties from .mvn/maven.config (CI-friendly ${revision} versions)."""
+    props = {}
+    path = os.path.join(repo_dir, ".mvn", "maven.config")
+    if not os.path.exists(path):
+        return props
+    with open(path) as f:
+        for token in f.read().split():
+            if token.startswith("-D") and "=" in token:
+                key, value = token[2:].split("=", 1)
+                props[key] = value
+    return props
+
+
+class MavenResolver:
+    """
+    In-process Maven dependency resolution for the POMs of one checked-out repository:
+    parent chains of any depth, property interpolation, <dependencyManagement> with
+    import-scope BOMs, activeByDefault profiles and transitive compile/runtime
+    resolution with nearest-wins mediation. Reactor modules are read from `repo_dir`,
+    everything else from the shared POM store.
+    """
+
+    def __init__(self, repo_dir: str, store: PomStore = None):
+        self.repo_dir = repo_dir
+        self.store = store or pom_store
+        self.user_properties = _read_maven_config(repo_dir)
+        self._local_index = None  # (groupId, artifactId, version) -> repo-relative pom path
+        self._remote_roots = {}   # (groupId, artifactId, version) -> parsed root or None
+        self._models = {}         # model key -> effective model
+        self._building = set()
+        self._ranges = {}         # (groupId, artifactId, range) -> chosen version
+
+    def _pick_version(self, group: str, artifact: str, version: Optional[str]) -> Optional[str]:
+        """`version`, or for a range the highest version maven-metadata.xml lists inside it."""
+        if not is_version_range(version):
+            return version
+        key = (group, artifact, version)
+        if key not in self._ranges:
+            versions = self.store.versions(group, artifact)
+            chosen = highest_in_range(version, versions) if versions else None
+            if chosen is None:
+                raise UnresolvedRange(f"{group}:{artifact}:{version}")
+            self._ranges[key] = chosen
+        return self._ranges[key]
+
+    # --- POM sources -----------------------------------------------------------------
+
+    def _index_local_poms(self):
+        raws = {}
+        for dirpath, _, filenames in os.walk(self.repo_dir):
+            if "pom.xml" not in filenames:
+                continue
+            path = os.path.join(dirpath, "pom.xml")
+            try:
+                raws[os.path.relpath(path, self.repo_dir)] = _raw_model(_parse_xml(open(path).read()))
+            except (ET.ParseError, OSError):
+                continue
+        by_coords = {(raw["groupId"], raw["artifactId"]): rel for rel, raw in raws.items()}
+
+        def local_parent(rel: str) -> Optional[str]:
+            group, artifact, _, relative_path = raws[rel]["parent"]
+            candidate = os.path.normpath(os.path.join(os.path.dirname(rel), relative_path or "../pom.xml"))
+            if not candidate.endswith(".xml"):
+                candidate = os.path.join(candidate, "pom.xml")
+            if candidate in raws and (raws[candidate]["groupId"], raws[candidate]["artifactId"]) == (group, artifact):
+                return candidate
+            return by_coords.get((group, artifact))
+
+        def properties(rel: str, seen: frozenset) -> Dict[str, str]:
+            # Versions like ${revision} are often declared only in the reactor root.
+            raw = raws[rel]
+            props = {}
+            parent = local_parent(rel) if raw["parent"] else None
+            if parent is not None and parent not in seen:
+                props.update(properties(parent, seen | {rel}))
+            props.update(raw["properties"])
+            return props
+
+        self._local_index = {}
+        for rel, raw in raws.items():
+            props = {**properties(rel, frozenset()), **self.user_properties}
+            key = (_interpolate(raw["groupId"], props), raw["artifactId"], _interpolate(raw["version"], props))
+            self._local_index[key] = rel
+
+    def _local_pom(self, group: str, artifact: str, version: str) -> Optional[str]:
+        if self._local_index is None:
+            self._index_local_poms()
+        return self._local_index.get((group, artifact, version))
+
+    def _fetch_remote(self, group: str, artifact: str, version: str):
+        key = (group, artifact, version)
+        if key in self._remote_roots:
+            return self._remote_roots[key]
+        root = None
+        text = self.store.get_text(group, artifact, version)
+        if text is not None:
+            try:
+                root = _parse_xml(text)
+            except ET.ParseError as e:
+                print(f"⚠️ Error parsing POM {group}:{artifact}:{version}: {e}")
+        else:
+            print(f"⚠️ POM not found: {group}:{artifact}:{version}")
+        self._remote_roots[key] = root
+        return root
+
+    def _prefetch(self, coords: List[Tuple[str, str, str]]):
+        missing = [c for c in dict.fromkeys(coords)
+                   if c not in self._remote_roots and self._local_pom(*c) is None]
+        if len(missing) > 1:
+            with ThreadPoolExecutor(max_workers=min(FETCH_WORKERS, len(missing))) as pool:
+                list(pool.map(lambda c: self._fetch_remote(*c), missing))
+
+    # --- Effective model -------------------------------------------------------------
+
+    def model_for_path(self, pom_rel_path: str) -> Optional[dict]:
+        key = ("path", os.path.normpath(pom_rel_path))
+        if key not in self._models:
+            if key in self._building:
+                print(f"⚠️ Parent/import cycle at {pom_rel_path}")
+                return None
+            path = os.path.join(self.repo_dir, pom_rel_path)
+            try:
+                root = _parse_xml(open(path).read())
+            except (ET.ParseError, OSError) as e:
+                print(f"❌ Error parsing {pom_rel_path}: {e}")
+                return None
+            self._building.add(key)
+            try:
+                self._models[key] = self._effective_model(root, os.path.dirname(pom_rel_path))
+            finally:
+                self._building.discard(key)
+        return self._models[key]
+
+    def model_for(self, group: str, artifact: str, version: str) -> Optional[dict]:
+        local = self._local_pom(group, artifact, version)
+        if local is not None:
+            return self.model_for_path(local)
+        key = ("remote", group, artifact, version)
+        if key not in self._models:
+            if key in self._building:
+                print(f"⚠️ Parent/import cycle at {group}:{artifact}:{version}")
+                return None
+            self._building.add(key)
+            try:
+                root = self._fetch_remote(group, artifact, version)
+                self._models[key] = self._effective_model(root, None) if root is not None else None
+            finally:
+                self._building.discard(key)
+        return self._models[key]
+
+    def _parent_model(self, parent_coords, local_dir: Optional[str]) -> Optional[dict]:
+        group, artifact, version, relative_path = parent_coords
+        if local_dir is not None:
+            rel = os.path.normpath(os.path.join(local_dir, relative_path or "../pom.xml"))
+            if not rel.endswith(".xml"):
+                rel = os.path.join(rel, "pom.xml")
+            if not rel.startswith("..") and os.path.exists(os.path.join(self.repo_dir, rel)):
+                candidate = self.model_for_path(rel)
+                if candidate and (candidate["groupId"], candidate["artifactId"]) == (group, artifact):
+                    return candidate
+        return self.model_for(group, artifact, version)
+
+    def _effective_model(self, root, local_dir: Optional[str]) -> dict:
+        raw = _raw_model(root)
+        parent = self._parent_model(raw["parent"], local_dir) if raw["parent"] else None
+
+        props = dict(parent["properties"]) if parent else {}
+        props.update(raw["properties"])
+        project = {
+            "groupId": raw["groupId"],
+            "artifactId": raw["artifactId"],
+            "version": raw["version"],
+        }
+        for field, value in project.items():
+            if value is not None:
+                props[f"project.{field}"] = value
+                props[f"pom.{field}"] = value
+                props[field] = value
+        if raw["parent"]:
+            props["project.parent.groupId"] = raw["parent"][0]
+            props["project.parent.version"] = raw["parent"][2]
+        props.update(self.user_properties)  # -D properties win, as on the command line
+
+        def interpolate(dep: dict) -> dict:
+            dep = dict(dep)
+            for field in ("groupId", "artifactId", "version", "scope", "type", "classifier"):
+                dep[field] = _interpolate(dep[field], props)
+            return dep
+
+        # dependencyManagement: inherited, then declared, then imported BOMs (first import wins).
+        management = OrderedDict(parent["management"]) if parent else OrderedDict()
+        imports = []
+        for dep in map(interpolate, raw["management"]):
+            if dep["scope"] == "import" and dep["type"] == "pom":
+                imports.append(dep)
+            else:
+                management[(dep["groupId"], dep["artifactId"])] = dep
+        for bom in imports:
+            bom_version = self._pick_version(bom["groupId"], bom["artifactId"], bom["version"])
+            bom_model = self.model_for(bom["groupId"], bom["artifactId"], bom_version)
+            if bom_model is None:
+                continue
+            for key, dep in bom_model["management"].items():
+                management.setdefault(key, dep)
+
+        dependencies = OrderedDict()
+        if parent:
+            for dep in parent["dependencies"]:
+                dependencies[(dep["groupId"], dep["artifactId"])] = dep
+        for dep in map(interpolate, raw["dependencies"]):
+            managed = management.get((dep["groupId"], dep["artifactId"]))
+            if managed:
+                dep["version"] = dep["version"] or managed["version"]
+                dep["scope"] = dep["scope"] or managed["scope"]
+                dep["exclusions"] = dep["exclusions"] | managed["exclusions"]
+            dep["scope"] = dep["scope"] or "compile"
+            dependencies[(dep["groupId"], dep["artifactId"])] = dep
+
+        version = _interpolate(raw["version"], props)
+        return {
+            "groupId": _interpolate(raw["groupId"], props),
+            "artifactId": raw["artifactId"],
+            "version": version,
+            "packaging": raw["packaging"],
+            "parent": raw["parent"],
+            "properties": props,
+            "management": management,
+            "dependencies": list(dependencies.values()),
+            "licenses": raw["licenses"] or (parent["licenses"] if parent else []),
+        }
+
+    # --- Transitive resolution -------------------------------------------------------
+
+    def resolve(self, pom_rel_path: str, include_scopes=INCLUDED_SCOPES) -> Optional[List[Tuple[str, str]]]:
+        """
+        Resolved (group:artifact, version) pairs for one module, breadth-first (nearest wins).
+        None when the module's POM can't be read or uses a version range that can't be
+        resolved against repository metadata, so the caller can fall back to mvn.
+        """
+        try:
+            return self._resolve(pom_rel_path, include_scopes)
+        except UnresolvedRange as e:
+            print(f"⚠️ Cannot resolve version range {e} in-process; falling back to mvn")
+            return None
+
+    def _resolve(self, pom_rel_path: str, include_scopes) -> Optional[List[Tuple[str, str]]]:
+        root_model = self.model_for_path(pom_rel_path)
+        if root_model is None:
+            return None
+        root_management = root_model["management"]
+
+        level = [
+            (dep, dep["scope"], frozenset(dep["exclusions"]))
+            for dep in root_model["dependencies"] if dep["scope"] not in ("test", "import")
+        ]
+        resolved = OrderedDict()  # (groupId, artifactId) -> (version, scope)
+        while level:
+            self._prefetch([
+                (d["groupId"], d["artifactId"], self._pick_version(d["groupId"], d["artifactId"], d["version"]))
+                for d, scope, _ in level
+                if scope != "system" and d["version"] and "${" not in d["version"]
+                and (d["groupId"], d["artifactId"]) not in resolved
+            ])
+            next_level = []
+            for dep, scope, exclusions in level:
+                key = (dep["groupId"], dep["artifactId"])
+                if key in resolved:
+                    continue  # a nearer (or earlier-declared) path already chose a version
+                version = self._pick_version(dep["groupId"], dep["artifactId"], dep["version"])
+                if not version or "${" in version:
+                    resolved[key] = ("unknown", scope)
+                    continue
+                resolved[key] = (version, scope)
+                if scope == "system":
+                    continue
+
+                model = self.model_for(dep["groupId"], dep["artifactId"], version)
+                if model is None:
+                    continue
+                for child in model["dependencies"]:
+                    child_key = (child["groupId"], child["artifactId"])
+                    if child["optional"] or child_key in resolved:
+                        continue
+                    if _excluded(child_key, exclusions):
+                        continue
+                    child_scope = SCOPE_TABLE.get(scope, {}).get(child["scope"])
+                    if not child_scope:
+                        continue
+                    managed = root_management.get(child_key)
+                    if managed:
+                        child = dict(child, version=managed["version"] or child["version"])
+                        if managed["scope"] and managed["scope"] != "import":
+                            child_scope = managed["scope"]
+                    next_level.append((child, child_scope, exclusions | frozenset(child["exclusions"])))
+            level = next_level
+
+        results = []
+        for (group, artifact), (version, scope) in resolved.items():
+            if scope in include_scopes:
+                print(f"✅ Found dependency: {group}:{artifact}, version: {version}")
+                results.append((f"{group}:{artifact}", version))
+        print(f"✅ Total dependencies found: {len(results)}")
+        return results
+
+
+def compare_with_mvn(repo_dir: str, pom_rel_path: str = "pom.xml") -> dict:
+    """Time both resolvers on one module and report where their results differ."""
+    started = time.perf_counter()
+    python_deps = dict(MavenResolver(repo_dir).resolve(pom_rel_path) or [])
+    python_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    mvn_deps = dict(parse_pom_xml_via_maven(os.path.join(repo_dir, os.path.dirname(pom_rel_path))))
+    mvn_seconds = time.perf_counter() - started
+
+    return {
+        "python_seconds": round(python_seconds, 2),
+        "mvn_seconds": round(mvn_seconds, 2),
+        "only_python": sorted(set(python_deps) - set(mvn_deps)),
+        "only_mvn": sorted(set(mvn_deps) - set(python_deps)),
+        "version_mismatch": sorted(
+            (ga, python_deps[ga], mvn_deps[ga])
+            for ga in set(python_deps) & set(mvn_deps) if python_deps[ga] != mvn_deps[ga]
+        ),
+        "matching": len(set(python_deps.items()) & set(mvn_deps.items())),
+    }
+
+
+if __name__ == "__main__":
+    # python -m parsers.maven_resolver <repo_dir> [module/pom.xml]
+    report = compare_with_mvn(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else "pom.xml")
+    for field, value in report.items():
+        print(f"{field}: {value}")
@@ -1,4 +1,13 @@
 import json
+import re
+from typing import BinaryIO, Iterable, List, Tuple
+
+try:
+    import ijson  # event-streaming JSON parser for large package-lock.json files
+except ImportError:
+    ijson = None
+
+
 def parse_package_json(content: str):
     deps = []
     try:
@@ -10,3 +19,151 @@ def parse_package_json(content: str):
     except Exception as e:
         print(f"Error parsing package.json: {e}")
     return deps
+
+
+# Lockfile parsers below read a binary stream and return deduplicated exact
+# (name, version) pairs for the whole installed tree, in first-seen order.
+
+_EXACT_VERSION = re.compile(r"^\d+\.\d+\.\d+(?:[-+][0-9A-Za-z.+-]+)?$")
+
+
+def _dedupe(pairs: Iterable[Tuple[str, str]]) -> List[Tuple[str, str]]:
+    return list(dict.fromkeys(
+        (name, version) for name, version in pairs if name and version and _EXACT_VERSION.match(version)
+    ))
+
+
+def _lines(stream: BinaryIO):
+    for raw in stream:
+        yield raw.decode("utf-8", errors="replace").rstrip("\r\n")
+
+
+def _package_lock_pairs(stream: BinaryIO):
+    """
+    Walk package-lock.json / npm-shrinkwrap.json as a stream of JSON events.
+    v2/v3: packages["node_modules/a/node_modules/b"].version
+    v1:    dependencies.a.dependencies.b.version
+    """
+    path = []  # keys of the enclosing objects
+    pending_key = None
+    for _, event, value in ijson.parse(stream):
+        if event == "map_key":
+            pending_key = value
+        elif event == "start_map":
+            path.append(pending_key)
+            pending_key = None
+        elif event == "end_map":
+            path.pop()
+        elif event == "string" and pending_key == "version" and len(path) >= 3:
+            section, entry = path[1], path[-1]
+            if section == "packages" and len(path) == 3 and entry and "node_modules/" in entry:
+                yield entry.rsplit("node_modules/", 1)[-1], value
+            elif section == "dependencies" and path[-2] == "dependencies":
+                yield entry, value
+
+
+def parse_package_lock(stream: BinaryIO) -> List[Tuple[str, str]]:
+    try:
+        if ijson is None:
+            # Non-streaming fallback when ijson is not installed.
+            data = json.load(stream)
+            pairs = [
+                (key.rsplit("node_modules/", 1)[-1], meta.get("version"))
+                for key, meta in data.get("packages", {}).items() if "node_modules/" in key
+            ]
+            stack = list(data.get("dependencies", {}).items())
+            while stack:
+                name, meta = stack.pop(0)
+                pairs.append((name, meta.get("version")))
+                stack.extend(meta.get("dependencies", {}).items())
+            return _dedupe(pairs)
+        return _dedupe(_package_lock_pairs(stream))
+    except Exception as e:
+        print(f"Error parsing package-lock.json: {e}")
+        return []
+
+
+_YARN_LOCAL_PROTOCOLS = ("@workspace:", "@link:", "@portal:", "@file:")
+
+
+def _yarn_entry_name(header: str):
+    # '"@babel/core@^7.0.0", "@babel/core@^7.1.0":' or '"@babel/core@npm:^7.0.0":'
+    first = header.rstrip(":").split(",")[0].strip().strip('"')
+    if any(protocol in first for protocol in _YARN_LOCAL_PROTOCOLS):
+        return None  # the repo's own workspaces, not installed packages
+    at = first.find("@", 1)
+    if at <= 0:
+        return first
+    # An alias ("old-lodash@npm:lodash@^3.0.0") installs the package named after npm:.
+    spec = first[at + 1:]
+    if spec.startswith("npm:"):
+        target = spec[len("npm:"):]
+        target_at = target.find("@", 1)
+        if target_at > 0:
+            return target[:target_at]
+    return first[:at]
+
+
+def parse_yarn_lock(stream: BinaryIO) -> List[Tuple[str, str]]:
+    """yarn.lock, classic (v1) and berry (v2+) formats, read line by line."""
+    pairs = []
+    name = None
+    try:
+        for line in _lines(stream):
+            if not line or line.startswith("#"):
+                continue
+            if not line[0].isspace():
+                name = None if line.startswith("__metadata") else _yarn_entry_name(line)
+                continue
+            stripped = line.strip()
+            if name and line.startswith("  ") and not line.startswith("   ") and stripped.startswith("version"):
+                version = stripped[len("version"):].lstrip(":").strip().strip('"')
+                pairs.append((name, version))
+                name = None
+    except Exception as e:
+        print(f"Error parsing yarn.lock: {e}")
+    return _dedupe(pairs)
+
+
+_PNPM_PEER_SUFFIX = re.compile(r"\(.*$")
+_PNPM_V5_KEY = re.compile(r"^/((?:@[^/]+/)?[^/@]+)/(\d[^_/]*)(?:_.*)?$")
+
+
+def _pnpm_key(key: str):
+    key = key.strip().strip("'\"")
+    v5 = _PNPM_V5_KEY.match(key)
+    if v5:
+        # v5: /name/1.2.3 or /name/1.2.3_peer@1.0.0
+        return v5.group(1), v5.group(2)
+    # v6: /name@1.2.3(peer@1.0.0), v9: name@1.2.3
+    key = _PNPM_PEER_SUFFIX.sub("", key).lstrip("/")
+    at = key.rfind("@")
+    if at > 0:
+        return key[:at], key[at + 1:]
+    return None, None
+
+
+def parse_pnpm_lock(stream: BinaryIO) -> List[Tuple[str, str]]:
+    """pnpm-lock.yaml (lockfile v5, v6 and v9), reading only the keys of the top-level `packages:` map."""
+    pairs = []
+    in_packages = False
+    try:
+        for line in _lines(stream):
+            if not line.strip() or line.lstrip().startswith("#"):
+                continue
+            if not line[0].isspace():
+                in_packages = line.rstrip() == "packages:"
+                continue
+            if in_packages and line.startswith("  ") and not line.startswith("   ") and line.rstrip().endswith(":"):
+                pairs.append(_pnpm_key(line.rstrip()[:-1]))
+    except Exception as e:
+        print(f"Error parsing pnpm-lock.yaml: {e}")
+    return _dedupe(pairs)
+
+
+LOCKFILE_PARSERS = {
+    "package-lock.json": parse_package_lock,
+    "npm-shrinkwrap.json": parse_package_lock,
+    "yarn.lock": parse_yarn_lock,
+    "pnpm-lock.yaml": parse_pnpm_lock,
+}
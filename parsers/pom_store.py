@@ -0,0 +1,240 @@
+import os
+import time
+import hashlib
+import threading
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from utils import http_client
+from depsdev.cache import TieredCache, CACHE_DIR
+
+MAVEN_CENTRAL_BASE = "https://repo1.maven.org/maven2"
+SPRING_REPO_BASE = "https://repo.spring.io/snapshot"
+REPOSITORIES = [MAVEN_CENTRAL_BASE, SPRING_REPO_BASE]
+
+POM_STORE_DIR = os.path.join(CACHE_DIR, "poms")
+MAX_OBJECTS = int(os.getenv("POM_STORE_MAX_OBJECTS", "50000"))
+MODEL_MEMO_ENTRIES = int(os.getenv("POM_STORE_MODEL_MEMO", "5000"))
+
+# Released POMs are immutable; snapshots and 404s are re-checked after a day.
+RELEASE_TTL = 365 * 24 * 3600
+VOLATILE_TTL = 24 * 3600
+
+MAX_PARENT_DEPTH = 20
+
+
+def strip_namespaces(root):
+    for elem in root.iter():
+        if isinstance(elem.tag, str) and "}" in elem.tag:
+            elem.tag = elem.tag.split("}", 1)[1]
+    return root
+
+
+def _text(elem, path: str) -> Optional[str]:
+    found = elem.find(path) if elem is not None else None
+    if found is None or found.text is None:
+        return None
+    return found.text.strip() or None
+
+
+def parse_pom_info(text: str) -> dict:
+    """The parts of a POM the license lookup and property resolution need."""
+    root = strip_namespaces(ET.fromstring(text))
+    parent = root.find("parent")
+    parent_coords = None
+    if parent is not None:
+        parent_coords = (_text(parent, "groupId"), _text(parent, "artifactId"), _text(parent, "version"))
+
+    properties = {}
+    props_elem = root.find("properties")
+    if props_elem is not None:
+        for prop in props_elem:
+            if isinstance(prop.tag, str):
+                properties[prop.tag] = (prop.text or "").strip()
+
+    return {
+        "groupId": _text(root, "groupId") or (parent_coords[0] if parent_coords else None),
+        "artifactId": _text(root, "artifactId"),
+        "version": _text(root, "version") or (parent_coords[2] if parent_coords else None),
+        "parent": parent_coords,
+        "properties": properties,
+        "licenses": [_text(l, "name") for l in root.findall("licenses/license") if _text(l, "name")],
+    }
+
+
+class PomStore:
+    """
+    Content-addressed on-disk store of POM files shared by the Maven parser, the
+    in-process resolver and the Maven license lookup. Coordinates map to a SHA-256
+    of the POM text; parsed models are memoized in memory. Least recently read
+    objects are evicted once the store holds more than `max_objects` files.
+    """
+
+    def __init__(self, root: str = POM_STORE_DIR, repositories: List[str] = None,
+                 max_objects: int = MAX_OBJECTS):
+        self.root = root
+        self.repositories = repositories or REPOSITORIES
+        self.max_objects = max_objects
+        self.index = TieredCache("pom_index", default_ttl=RELEASE_TTL)
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes_since_evict = 0
+        self.stats = {"store_hits": 0, "downloads": 0, "not_found": 0}
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.root, "objects", digest[:2], f"{digest}.pom")
+
+    def _coords_key(self, group: str, artifact: str, version: str) -> str:
+        return f"{group}:{artifact}:{version}"
+
+    def _download(self, group: str, artifact: str, version: str) -> Optional[str]:
+        rel_path = f"{group.replace('.', '/')}/{artifact}/{version}/{artifact}-{version}.pom"
+        for base in self.repositories:
+            url = f"{base}/{rel_path}"
+            print(f"🌐 Trying POM URL: {url}")
+            try:
+                resp = http_client.get(url)
+                if resp.status_code == 200:
+                    print(f"✅ Successfully fetched POM: {url}")
+                    return resp.text
+                print(f"⚠️ Failed to fetch POM: {url}")
+            except Exception as e:
+                print(f"⚠️ Exception fetching POM: {url} => {e}")
+        return None
+
+    def _write_object(self, text: str) -> str:
+        digest = hashlib.sha256(text.encode()).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w") as f:
+                f.write(text)
+            os.replace(tmp_path, path)
+            with self._lock:
+                self._writes_since_evict += 1
+                evict = self._writes_since_evict >= 500
+                if evict:
+                    self._writes_since_evict = 0
+            if evict:
+                self._evict()
+        return digest
+
+    def _evict(self):
+        objects = []
+        for dirpath, _, filenames in os.walk(os.path.join(self.root, "objects")):
+            for name in filenames:
+                if name.endswith(".pom"):
+                    path = os.path.join(dirpath, name)
+                    objects.append((os.path.getmtime(path), path))
+        overflow = len(objects) - self.max_objects
+        if overflow <= 0:
+            return
+        objects.sort()
+        for _, path in objects[:overflow]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        print(f"🧹 Evicted {overflow} POM(s) from store")
+
+    def get_text(self, group: str, artifact: str, version: str) -> Optional[str]:
+        if not (group and artifact and version) or "${" in version:
+            return None
+        key = self._coords_key(group, artifact, version)
+        entry = self.index.get(key)
+        if entry is not None:
+            digest = entry.get("sha256")
+            if digest is None:
+                return None  # recently not found in any repository
+            path = self._object_path(digest)
+            try:
+                with open(path) as f:
+                    text = f.read()
+                os.utime(path, (time.time(), time.time()))
+                self.stats["store_hits"] += 1
+                return text
+            except OSError:
+                pass  # evicted; download again
+
+        text = self._download(group, artifact, version)
+        ttl = VOLATILE_TTL if version.endswith("-SNAPSHOT") else RELEASE_TTL
+        if text is None:
+            self.stats["not_found"] += 1
+            self.index.set(key, {"sha256": None}, ttl=VOLATILE_TTL)
+            return None
+        self.stats["downloads"] += 1
+        self.index.set(key, {"sha256": self._write_object(text)}, ttl=ttl)
+        return text
+
+    def versions(self, group: str, artifact: str) -> Optional[List[str]]:
+        """Published versions from maven-metadata.xml, merged across repositories; None if none has it."""
+        if not (group and artifact):
+            return None
+        key = f"{group}:{artifact}:metadata"
+        cached = self.index.get(key)
+        if cached is not None:
+            return cached["versions"]
+        versions, found = [], False
+        for base in self.repositories:
+            url = f"{base}/{group.replace('.', '/')}/{artifact}/maven-metadata.xml"
+            try:
+                resp = http_client.get(url)
+                if resp.status_code != 200:
+                    continue
+                root = strip_namespaces(ET.fromstring(resp.text))
+            except Exception as e:
+                print(f"⚠️ Exception fetching metadata: {url} => {e}")
+                continue
+            found = True
+            for elem in root.findall("versioning/versions/version"):
+                if elem.text and elem.text.strip() not in versions:
+                    versions.append(elem.text.strip())
+        # New versions are published all the time, so metadata is only trusted for a day.
+        self.index.set(key, {"versions": versions if found else None}, ttl=VOLATILE_TTL)
+        return versions if found else None
+
+    def get_info(self, group: str, artifact: str, version: str) -> Optional[dict]:
+        text = self.get_text(group, artifact, version)
+        if text is None:
+            return None
+        digest = hashlib.sha256(text.encode()).hexdigest()
+        with self._lock:
+            info = self._models.get(digest)
+            if info is not None:
+                self._models.move_to_end(digest)
+                return info
+        try:
+            info = parse_pom_info(text)
+        except ET.ParseError as e:
+            print(f"❌ Error parsing POM {group}:{artifact}:{version}: {e}")
+            return None
+        with self._lock:
+            self._models[digest] = info
+            while len(self._models) > MODEL_MEMO_ENTRIES:
+                self._models.popitem(last=False)
+        return info
+
+    def parent_chain(self, group: str, artifact: str, version: str) -> List[dict]:
+        """The POM's info followed by its ancestors', as far as they can be fetched."""
+        chain, seen = [], set()
+        coords: Optional[Tuple[str, str, str]] = (group, artifact, version)
+        while coords and coords not in seen and len(chain) < MAX_PARENT_DEPTH:
+            seen.add(coords)
+            info = self.get_info(*coords)
+            if info is None:
+                break
+            chain.append(info)
+            coords = info["parent"]
+        return chain
+
+    def licenses(self, group: str, artifact: str, version: str) -> List[str]:
+        """<licenses> of the artifact, inherited from the nearest ancestor that declares them."""
+        for info in self.parent_chain(group, artifact, version):
+            if info["licenses"]:
+                return info["licenses"]
+        return []
+
+
+pom_store = PomStore()
@@ -1,27 +1,55 @@
 import re
+import json
+
+try:
+    import tomllib
+except ModuleNotFoundError:  # Python < 3.11
+    import tomli as tomllib
+
+
+def canonicalize_name(name: str) -> str:
+    """
+    PEP 503 normalized project name, so `Django`, `django` and `django_` share
+    one cache key. Trailing separators are dropped as well; PEP 508 names can't
+    end in one, so it only ever tidies up typos.
+    """
+    return re.sub(r"[-_.]+", "-", name.strip()).lower().strip("-")
+
+
+_REQUIREMENT = re.compile(r'^([a-zA-Z0-9_\-\.]+)\s*(\[[^\]]*\])?\s*(.*)$')
+
+
+def _parse_requirement(line: str):
+    """PEP 508 requirement -> (package, version) or None. `==X` gives X, other specifiers are kept as written."""
+    line = line.split(";", 1)[0].split(" #", 1)[0].strip()  # drop environment markers and comments
+    match = _REQUIREMENT.match(line)
+    if not match:
+        return None
+    package = match.group(1).strip()
+    spec = match.group(3).strip().strip("()").replace(" ", "")
+    if not spec:
+        return package, "latest"
+    if spec.startswith("==") and "," not in spec and "*" not in spec:
+        return package, spec[2:]
+    return package, spec
+
 
 def parse_requirements_txt(content: str):
     """
     Parse a requirements.txt content into a list of (package, version) tuples.
-    Handles ==, >=, <=, >, <, ~= operators gracefully.
+    Exact pins (==) give the pinned version; other specifiers (>=, ~=, ranges)
+    are kept as written so they are never mistaken for a released version.
     If no version specified, assigns 'latest'.
     """
     deps = []
     for line in content.splitlines():
         line = line.strip()
-        if not line or line.startswith("#"):
+        if not line or line.startswith("#") or line.startswith("-"):
             continue
         try:
-            # Use regex to split package and version
-            match = re.match(r'^([a-zA-Z0-9_\-\.]+)(==|>=|<=|>|<|~=)?(.*)$', line)
-            if match:
-                package = match.group(1)
-                operator = match.group(2)
-                version = match.group(3)
-                if operator in ("==", ">=", "<=", ">", "<", "~=") and version:
-                    deps.append((package.strip(), version.strip()))
-                else:
-                    deps.append((package.strip(), "latest"))
+            requirement = _parse_requirement(line)
+            if requirement:
+                deps.append(requirement)
             else:
                 print(f"⚠️ Skipping unrecognized line: {line}")
         except Exception as e:
@@ -29,3 +57,84 @@ def parse_requirements_txt(content: str):
             continue
     return deps
 
+
+def parse_poetry_lock(content: str):
+    try:
+        data = tomllib.loads(content)
+    except Exception as e:
+        print(f"Error parsing poetry.lock: {e}")
+        return []
+    return [(p["name"], p["version"]) for p in data.get("package", []) if p.get("name") and p.get("version")]
+
+
+def parse_uv_lock(content: str):
+    try:
+        data = tomllib.loads(content)
+    except Exception as e:
+        print(f"Error parsing uv.lock: {e}")
+        return []
+    deps = []
+    for package in data.get("package", []):
+        source = package.get("source", {})
+        if "editable" in source or "virtual" in source:
+            continue  # the project itself / workspace members
+        if package.get("name") and package.get("version"):
+            deps.append((package["name"], package["version"]))
+    return deps
+
+
+def parse_pipfile_lock(content: str):
+    try:
+        data = json.loads(content)
+    except Exception as e:
+        print(f"Error parsing Pipfile.lock: {e}")
+        return []
+    deps = []
+    for section in ("default", "develop"):
+        for name, meta in data.get(section, {}).items():
+            version = meta.get("version", "") if isinstance(meta, dict) else ""
+            deps.append((name, version[2:] if version.startswith("==") else version or "latest"))
+    return list(dict.fromkeys(deps))
+
+
+def parse_pyproject_toml(content: str):
+    """PEP 621 [project] dependencies plus Poetry's [tool.poetry.*dependencies] tables."""
+    try:
+        data = tomllib.loads(content)
+    except Exception as e:
+        print(f"Error parsing pyproject.toml: {e}")
+        return []
+
+    deps = []
+    project = data.get("project", {})
+    requirements = list(project.get("dependencies", []))
+    for extra in project.get("optional-dependencies", {}).values():
+        requirements.extend(extra)
+    for requirement in requirements:
+        parsed = _parse_requirement(requirement)
+        if parsed:
+            deps.append(parsed)
+
+    poetry = data.get("tool", {}).get("poetry", {})
+    tables = [poetry.get("dependencies", {}), poetry.get("dev-dependencies", {})]
+    tables.extend(group.get("dependencies", {}) for group in poetry.get("group", {}).values())
+    for table in tables:
+        for name, spec in table.items():
+            if name.lower() == "python":
+                continue
+            if isinstance(spec, dict):
+                spec = spec.get("version", "latest")
+            spec = (spec or "latest").strip()
+            deps.append((name, spec[2:] if spec.startswith("==") else ("latest" if spec == "*" else spec)))
+    return list(dict.fromkeys(deps))
+
+
+PYTHON_PARSERS = {
+    "requirements.txt": parse_requirements_txt,
+    "poetry.lock": parse_poetry_lock,
+    "uv.lock": parse_uv_lock,
+    "Pipfile.lock": parse_pipfile_lock,
+    "pyproject.toml": parse_pyproject_toml,
+}
+# Exact versions from a lockfile replace the ranges declared next to it.
+PYTHON_LOCKFILES = ("poetry.lock", "uv.lock", "Pipfile.lock")
@@ -0,0 +1,108 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from depsdev import batch
+from utils import http_client
+
+KNOWN = {
+    ("MAVEN", "org.example:lib", "1.0"): ["Apache-2.0"],
+    ("PYPI", "zope-interface", "6.0"): ["ZPL-2.1"],
+    ("NPM", "left-pad", "1.3.0"): ["WTFPL"],
+}
+
+
+class StandInDepsDev(BaseHTTPRequestHandler):
+    """Local stand-in for POST /v3alpha/versionbatch: one response per page, pages of PAGE_SIZE."""
+    PAGE_SIZE = 2
+    requests = []
+    fail = False
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        StandInDepsDev.requests.append(body)
+        if self.path != "/v3alpha/versionbatch" or StandInDepsDev.fail:
+            self.send_response(500)
+            self.end_headers()
+            return
+        start = int(body.get("pageToken") or 0)
+        page = body["requests"][start:start + self.PAGE_SIZE]
+        responses = []
+        for request in page:
+            key = request["versionKey"]
+            licenses = KNOWN.get((key["system"], key["name"], key["version"]))
+            responses.append({"request": request, "version": {"licenses": licenses} if licenses else None})
+        data = {"responses": responses}
+        if start + self.PAGE_SIZE < len(body["requests"]):
+            data["nextPageToken"] = str(start + self.PAGE_SIZE)
+        payload = json.dumps(data).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def depsdev_server(monkeypatch):
+    server = HTTPServer(("127.0.0.1", 0), StandInDepsDev)
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    StandInDepsDev.requests = []
+    StandInDepsDev.fail = False
+    monkeypatch.setattr(batch, "DEPSDEV_API_BASE", f"http://127.0.0.1:{server.server_address[1]}")
+    monkeypatch.setattr(http_client, "MAX_RETRIES", 0)
+    yield StandInDepsDev
+    server.shutdown()
+    server.server_close()
+
+
+KEYS = [
+    ("maven", "org.example:lib", "1.0"),
+    ("pypi", "Zope.Interface", "6.0"),
+    ("npm", "left-pad", "1.3.0"),
+    ("npm", "unknown-pkg", "0.0.1"),
+]
+
+
+def test_batch_follows_pages_and_maps_keys_back(depsdev_server):
+    found, answered = batch.query_depsdev_licenses_batch(KEYS + [KEYS[0]])
+    assert found == {
+        ("maven", "org.example:lib", "1.0"): ["Apache-2.0"],
+        ("pypi", "Zope.Interface", "6.0"): ["ZPL-2.1"],
+        ("npm", "left-pad", "1.3.0"): ["WTFPL"],
+    }
+    assert answered == set(KEYS)
+    assert len(depsdev_server.requests) == 2  # 4 unique keys, pages of 2
+    assert depsdev_server.requests[1]["pageToken"] == "2"
+
+
+def test_batch_splits_into_chunks(depsdev_server, monkeypatch):
+    monkeypatch.setattr(batch, "BATCH_SIZE", 3)
+    found, answered = batch.query_depsdev_licenses_batch(KEYS)
+    assert len(found) == 3 and answered == set(KEYS)
+    assert [len(r["requests"]) for r in depsdev_server.requests] == [3, 3, 1]
+
+
+def test_failed_batch_leaves_keys_unanswered(depsdev_server):
+    depsdev_server.fail = True
+    found, answered = batch.query_depsdev_licenses_batch(KEYS)
+    assert found == {} and answered == set()
+
+
+def test_unsupported_ecosystems_are_skipped(depsdev_server):
+    assert batch.query_depsdev_licenses_batch([("cargo", "serde", "1.0.0")]) == ({}, set())
+    assert depsdev_server.requests == []
+
+
+def test_every_spelling_of_a_pypi_name_gets_the_answer(depsdev_server):
+    spellings = [("pypi", "Zope.Interface", "6.0"), ("pypi", "zope-interface", "6.0"), ("pypi", "zope_interface", "6.0")]
+    found, answered = batch.query_depsdev_licenses_batch(spellings)
+    assert found == {key: ["ZPL-2.1"] for key in spellings}
+    assert answered == set(spellings)
+    assert len(depsdev_server.requests[0]["requests"]) == 1
@@ -0,0 +1,135 @@
+import threading
+import time as real_time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from utils import http_client
+
+
+class Script(BaseHTTPRequestHandler):
+    """Answers each request with the next (status, headers) from `replies`; records the Authorization seen."""
+    replies = []
+    seen = []
+
+    def _reply(self):
+        Script.seen.append((self.command, self.headers.get("Authorization")))
+        status, headers = Script.replies.pop(0) if Script.replies else (200, {})
+        body = b"x" * 64
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, str(value))
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = _reply
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeClock:
+    """time.time/time.sleep for http_client: sleeping advances the clock instead of blocking."""
+
+    def __init__(self):
+        self.now = real_time.time()
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(round(seconds, 3))
+        self.now += seconds
+
+
+@pytest.fixture
+def server(monkeypatch):
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Script)
+    thread = threading.Thread(target=httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    Script.replies, Script.seen = [], []
+    for registry in ("_semaphores", "_sessions", "_budgets", "_latency"):
+        monkeypatch.setattr(http_client, registry, {})
+    monkeypatch.setattr(http_client, "_backoff", lambda attempt: 0.25)
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(http_client, "time", clock)
+    return clock
+
+
+def test_retries_honour_retry_after(server, clock):
+    Script.replies = [(503, {"Retry-After": 7}), (429, {}), (200, {})]
+    response = http_client.get(f"{server}/pkg")
+    assert response.status_code == 200
+    # 7s from Retry-After (the budget is already past its block by then), then jittered backoff.
+    assert clock.sleeps == [7, 0.25]
+    assert http_client.latency_stats()["127.0.0.1"]["retries"] == 2
+
+
+def test_retries_stop_at_max_retries(server, clock, monkeypatch):
+    monkeypatch.setattr(http_client, "MAX_RETRIES", 2)
+    Script.replies = [(500, {})] * 5
+    assert http_client.get(f"{server}/pkg").status_code == 500
+    assert len(Script.seen) == 3
+
+
+def test_post_is_only_retried_when_idempotent(server, clock):
+    Script.replies = [(503, {}), (200, {})]
+    assert http_client.post(f"{server}/batch").status_code == 503
+    Script.replies = [(503, {}), (200, {})]
+    assert http_client.post(f"{server}/batch", idempotent=True).status_code == 200
+
+
+def test_low_rate_limit_paces_requests_until_reset(server, clock):
+    reset = clock.now + 100
+    Script.replies = [(200, {"X-RateLimit-Remaining": 4, "X-RateLimit-Reset": int(reset)})]
+    headers = {"Authorization": "token a"}
+    http_client.get(f"{server}/x", headers=headers)
+    http_client.get(f"{server}/x", headers=headers)  # the bucket's one token
+    http_client.get(f"{server}/x", headers=headers)
+    # 4 calls left for ~100s: one call every ~25s.
+    assert len(clock.sleeps) == 1 and 24 <= clock.sleeps[0] <= 26
+
+    # Another credential has its own quota and is not held back.
+    http_client.get(f"{server}/x", headers={"Authorization": "token b"})
+    assert len(clock.sleeps) == 1
+
+
+def test_exhausted_rate_limit_blocks_until_reset(server, clock):
+    Script.replies = [(403, {"X-RateLimit-Remaining": 0, "X-RateLimit-Reset": int(clock.now + 30)})]
+    assert http_client.get(f"{server}/x").status_code == 403
+    http_client.get(f"{server}/x")
+    assert len(clock.sleeps) == 1 and 29 <= clock.sleeps[0] <= 30
+
+
+def test_streamed_response_holds_the_host_slot_until_closed(server, monkeypatch):
+    monkeypatch.setitem(http_client.HOST_LIMITS, "127.0.0.1", 1)
+    slot = http_client.host_slot(server)
+    with http_client.get(f"{server}/big", stream=True) as response:
+        assert not slot.acquire(blocking=False)  # still reading the body
+        assert len(response.raw.read()) == 64
+    assert slot.acquire(blocking=False)
+    slot.release()
+
+    # Buffered responses give the slot back before returning.
+    http_client.get(f"{server}/small")
+    assert slot.acquire(blocking=False)
+    slot.release()
+
+
+def test_streamed_retry_releases_the_slot(server, monkeypatch):
+    monkeypatch.setitem(http_client.HOST_LIMITS, "127.0.0.1", 1)
+    Script.replies = [(503, {"Retry-After": 0}), (200, {})]
+    with http_client.get(f"{server}/big", stream=True) as response:
+        assert response.status_code == 200
+    slot = http_client.host_slot(server)
+    assert slot.acquire(blocking=False)
+    slot.release()
@@ -0,0 +1,172 @@
+import hashlib
+from types import SimpleNamespace
+
+import pytest
+
+from utils import dependency_delta, incremental_scan
+from utils.manifest_discovery import DiscoveredManifests, Manifest, match_manifest, is_build_config
+from utils.scan_store import ScanStore
+
+
+class StubRepo:
+    """
+    A repo whose commits are {sha: {path: [(dependency, version), ...] or text}}.
+    Like GitHub's compare, the file list is the diff from the merge base to head;
+    merge bases other than `base` itself are given explicitly.
+    """
+    full_name = "acme/app"
+
+    def __init__(self, commits, merge_bases=None):
+        self.commits = commits
+        self.merge_bases = merge_bases or {}
+        self.padding = 0  # extra unrelated changed files, to hit the compare API's cap
+
+    def compare(self, base, head):
+        merge_base = self.merge_bases.get((base, head), base)
+        old, new = self.commits[merge_base], self.commits[head]
+        files = [SimpleNamespace(filename=path, previous_filename=None)
+                 for path in sorted(set(old) | set(new)) if old.get(path) != new.get(path)]
+        files += [SimpleNamespace(filename=f"src/f{i}.java", previous_filename=None) for i in range(self.padding)]
+        return SimpleNamespace(status="ahead", files=files, merge_base_commit=SimpleNamespace(sha=merge_base))
+
+
+def _blob_sha(content):
+    return hashlib.sha1(repr(content).encode()).hexdigest()
+
+
+@pytest.fixture
+def stubbed(monkeypatch, tmp_path):
+    """Discovery and scanning read the StubRepo; every scan_manifests call is recorded as (ref, paths)."""
+    scans = []
+
+    def discover(repo, ref):
+        files = repo.commits[ref]
+        manifests = [Manifest(p, p.rsplit("/", 1)[-1], _blob_sha(c), match_manifest(p)) for p, c in files.items()
+                     if match_manifest(p)]
+        build_files = {p: _blob_sha(c) for p, c in files.items() if is_build_config(p)}
+        return DiscoveredManifests(manifests, build_files)
+
+    def scan(repo, manifests, ref, access_token, maven_resolver=None, build_files=None):
+        scans.append((ref, sorted(m.path for m in manifests)))
+        return [(m.ecosystem, m.path, name, version, f"{name}-license ✅", "Test")
+                for m in manifests for name, version in repo.commits[ref][m.path]]
+
+    store = ScanStore(str(tmp_path / "scans.sqlite"))
+    for module in (incremental_scan, dependency_delta):
+        monkeypatch.setattr(module, "scan_store", store)
+        monkeypatch.setattr(module, "discover_manifests", discover)
+        monkeypatch.setattr(module, "scan_manifests", scan)
+    monkeypatch.setattr(incremental_scan, "record_scan_cost", lambda *args: None)
+    return SimpleNamespace(scans=scans, store=store, head_entries=lambda repo, sha: scan(repo, discover(repo, sha), sha, "t"))
+
+
+def _pr(head, base, number=7):
+    return {"number": number, "head": {"sha": head}, "base": {"sha": base, "ref": "main"}}
+
+
+def _scan_and_save(stubbed, repo, pr):
+    result = incremental_scan.scan_pull_request(repo, pr, "token")
+    stubbed.store.save_scan(repo.full_name, pr["number"], pr["head"]["sha"], pr["base"]["sha"],
+                            result.entries, result.manifests, result.markdown, "success")
+    return result
+
+
+BASE = {
+    "pom.xml": [("org.example:core", "1.0")],
+    "api/pom.xml": [("org.example:json", "2.0")],
+    "web/package.json": [("react", "18.2.0")],
+    "tools/requirements.txt": [("requests", "2.31.0")],
+    "README.md": "docs",
+}
+
+
+def test_unchanged_head_and_base_reuse_the_stored_scan(stubbed):
+    repo = StubRepo({"base": BASE, "head": dict(BASE, **{"README.md": "new docs"})})
+    first = _scan_and_save(stubbed, repo, _pr("head", "base"))
+    assert not first.reused
+    scans_so_far = len(stubbed.scans)
+
+    again = incremental_scan.scan_pull_request(repo, _pr("head", "base"), "token")
+    assert again.reused and again.entries == first.entries
+    assert len(stubbed.scans) == scans_so_far
+
+
+def test_push_without_manifest_changes_is_reused(stubbed):
+    head2 = dict(BASE, **{"README.md": "v2"})
+    repo = StubRepo({"base": BASE, "head1": BASE, "head2": head2})
+    _scan_and_save(stubbed, repo, _pr("head1", "base"))
+    scans_so_far = len(stubbed.scans)
+    assert incremental_scan.scan_pull_request(repo, _pr("head2", "base"), "token").reused
+    assert len(stubbed.scans) == scans_so_far
+
+
+def test_only_changed_manifests_are_rescanned(stubbed):
+    head2 = dict(BASE, **{"web/package.json": [("react", "18.3.0")]})
+    repo = StubRepo({"base": BASE, "head1": BASE, "head2": head2})
+    _scan_and_save(stubbed, repo, _pr("head1", "base"))
+    stubbed.scans.clear()
+
+    result = incremental_scan.scan_pull_request(repo, _pr("head2", "base"), "token")
+    assert stubbed.scans[0] == ("head2", ["web/package.json"])
+    assert ("npm", "web/package.json", "react", "18.3.0", "react-license ✅", "Test") in result.entries
+    # Untouched manifests come from the stored scan, in discovery order.
+    assert [e[1] for e in result.entries] == ["pom.xml", "api/pom.xml", "web/package.json", "tools/requirements.txt"]
+
+
+@pytest.mark.parametrize("changed", [
+    {"api/pom.xml": [("org.example:json", "2.1")]},
+    {".mvn/maven.config": "-Drevision=2"},
+])
+def test_pom_or_mvn_change_rescans_every_pom(stubbed, changed):
+    repo = StubRepo({"base": BASE, "head1": BASE, "head2": dict(BASE, **changed)})
+    _scan_and_save(stubbed, repo, _pr("head1", "base"))
+    stubbed.scans.clear()
+    incremental_scan.scan_pull_request(repo, _pr("head2", "base"), "token")
+    assert stubbed.scans[0] == ("head2", ["api/pom.xml", "pom.xml"])
+
+
+def test_delta_rows_against_the_merge_base(stubbed):
+    head = dict(BASE, **{
+        "pom.xml": [("org.example:core", "1.1"), ("org.example:new", "0.1")],
+        "web/package.json": [],
+    })
+    # main moved on after the PR branched: it upgraded requests, which the PR did not touch.
+    main = dict(BASE, **{"tools/requirements.txt": [("requests", "2.32.0")]})
+    repo = StubRepo({"fork-point": BASE, "main": main, "head": head},
+                    merge_bases={("main", "head"): "fork-point"})
+    rows = dependency_delta.compute_dependency_delta(repo, "main", "head", stubbed.head_entries(repo, "head"), "token")
+    assert sorted(rows) == sorted([
+        ("changed", "maven", "pom.xml", "org.example:core", "1.0", "1.1", "org.example:core-license ✅"),
+        ("added", "maven", "pom.xml", "org.example:new", "", "0.1", "org.example:new-license ✅"),
+        ("removed", "npm", "web/package.json", "react", "18.2.0", "", ""),
+    ])
+    # The merge-base side scanned only what the PR's changes can affect: every pom and the npm manifest.
+    assert ("fork-point", ["api/pom.xml", "pom.xml", "web/package.json"]) in stubbed.scans
+
+
+def test_delta_reuses_a_stored_scan_of_the_merge_base(stubbed):
+    head = dict(BASE, **{"web/package.json": [("react", "18.3.0")]})
+    repo = StubRepo({"base": BASE, "head": head})
+    stubbed.store.save_scan(repo.full_name, 3, "base", None,
+                            [("npm", "web/package.json", "react", "18.2.0", "MIT ✅", "NPM")],
+                            {"web/package.json": "x"}, "", "success")
+    head_entries = [("npm", "web/package.json", "react", "18.3.0", "MIT ✅", "NPM")]
+    rows = dependency_delta.compute_dependency_delta(repo, "base", "head", head_entries, "token")
+    assert rows == [("changed", "npm", "web/package.json", "react", "18.2.0", "18.3.0", "MIT ✅")]
+    assert stubbed.scans == []
+
+
+def test_capped_compare_diffs_every_manifest(stubbed):
+    head = dict(BASE, **{"tools/requirements.txt": [("requests", "2.32.0")]})
+    repo = StubRepo({"base": BASE, "head": head})
+    repo.padding = dependency_delta.COMPARE_FILE_LIMIT
+    head_entries = stubbed.head_entries(repo, "head")
+    rows = dependency_delta.compute_dependency_delta(repo, "base", "head", head_entries, "token")
+    assert [r[:6] for r in rows] == [("changed", "pypi", "tools/requirements.txt", "requests", "2.31.0", "2.32.0")]
+    assert stubbed.scans[-1] == ("base", sorted(m for m in BASE if m != "README.md"))
+
+
+def test_no_manifest_change_has_no_delta(stubbed):
+    repo = StubRepo({"base": BASE, "head": dict(BASE, **{"README.md": "x"})})
+    assert dependency_delta.compute_dependency_delta(repo, "base", "head", [], "token") == []
+    assert stubbed.scans == []
@@ -0,0 +1,92 @@
+import pytest
+
+from utils import license_resolver
+
+
+@pytest.fixture
+def stubbed(monkeypatch):
+    """Stand-ins for the cache, the deps.dev batch and the per-registry lookups, recording calls in order."""
+    calls = []
+    cache = {("npm", "cached-pkg", "1.0.0"): (["MIT"], "NPM")}
+
+    def get_cached_license(ecosystem, name, version):
+        calls.append(("cache", (ecosystem, name, version)))
+        return cache.get((ecosystem, name, version))
+
+    def batch(keys):
+        calls.append(("batch", list(keys)))
+        found = {key: ["Apache-2.0"] for key in keys if key[1] == "org.example:known"}
+        # The batch completed for everything except the key of a failed chunk.
+        answered = {key for key in keys if key[1] != "org.example:failed"}
+        return found, answered
+
+    def lookup(ecosystem):
+        class Lookup:
+            @staticmethod
+            def uncached(name, version, **options):
+                calls.append(("fallback", (ecosystem, name, version), options))
+                return ["BSD-3-Clause"], ecosystem.upper()
+        return Lookup
+
+    monkeypatch.setattr(license_resolver, "get_cached_license", get_cached_license)
+    monkeypatch.setattr(license_resolver, "query_depsdev_licenses_batch", batch)
+    monkeypatch.setattr(license_resolver, "store_license", lambda *args: calls.append(("store", args[:3])))
+    monkeypatch.setattr(license_resolver, "LOOKUPS", {eco: lookup(eco) for eco in ("maven", "pypi", "npm")})
+    return calls
+
+
+def test_cache_then_batch_then_fallback(stubbed):
+    keys = [
+        ("npm", "cached-pkg", "1.0.0"),
+        ("maven", "org.example:known", "1.0"),
+        ("maven", "org.example:unknown", "1.0"),
+        ("npm", "left-pad", "^1.3.0"),
+    ]
+    license_resolver.resolve_licenses(keys)
+    stages = [call[0] for call in stubbed if call[0] != "store"]
+    assert stages == ["cache"] * 4 + ["batch", "fallback", "fallback"]
+    # Cached keys and npm keys never reach the batch.
+    assert stubbed[4] == ("batch", [("maven", "org.example:known", "1.0"), ("maven", "org.example:unknown", "1.0")])
+
+
+def test_depsdev_is_skipped_only_for_keys_the_batch_answered(stubbed):
+    license_resolver.resolve_licenses([
+        ("maven", "org.example:unknown", "1.0"),
+        ("maven", "org.example:failed", "1.0"),
+        ("maven", "org.example:range", "[1.0,2.0)"),
+    ])
+    options = {call[1][1]: call[2] for call in stubbed if call[0] == "fallback"}
+    assert options == {
+        "org.example:unknown": {"use_depsdev": False},  # batch already said deps.dev has nothing
+        "org.example:failed": {"use_depsdev": True},  # batch failed; ask deps.dev again
+        "org.example:range": {"use_depsdev": True},  # ranges are never batched
+    }
+
+
+def test_results_follow_input_order_with_duplicates(stubbed):
+    keys = [
+        ("maven", "org.example:known", "1.0"),
+        ("npm", "cached-pkg", "1.0.0"),
+        ("maven", "org.example:known", "1.0"),
+        ("pypi", "requests", "2.31.0"),
+    ]
+    assert license_resolver.resolve_licenses(keys) == [
+        (["Apache-2.0"], "DepsDev"),
+        (["MIT"], "NPM"),
+        (["Apache-2.0"], "DepsDev"),
+        (["BSD-3-Clause"], "PYPI"),
+    ]
+    # Each unique key is looked up once.
+    assert sum(1 for call in stubbed if call[0] == "cache") == 3
+
+
+def test_failed_lookup_is_unknown(stubbed, monkeypatch):
+    def boom(name, version, **options):
+        raise RuntimeError("registry down")
+    monkeypatch.setattr(license_resolver.LOOKUPS["npm"], "uncached", boom)
+    assert license_resolver.resolve_licenses([("npm", "left-pad", "1.3.0")]) == [([], "Unknown")]
+
+
+def test_empty_input(stubbed):
+    assert license_resolver.resolve_licenses([]) == []
+    assert stubbed == []
@@ -0,0 +1,75 @@
+from types import SimpleNamespace
+
+import pytest
+
+from depsdev.cache import TieredCache
+from utils import license_summaries, llm_agent
+from utils.license_summaries import PROMPT_VERSION, _cache_key, canonical_license_id
+
+
+class StubCompletions:
+    def __init__(self, text="Strong copyleft."):
+        self.text = text
+        self.calls = []
+
+    def create(self, **kwargs):
+        self.calls.append(kwargs)
+        message = SimpleNamespace(content=f" {self.text} ")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+@pytest.fixture
+def completions(monkeypatch, tmp_path):
+    stub = StubCompletions()
+    monkeypatch.setattr(license_summaries, "client", SimpleNamespace(chat=SimpleNamespace(completions=stub)))
+    monkeypatch.setattr(license_summaries, "summary_cache",
+                        TieredCache("summaries", db_path=str(tmp_path / "cache.sqlite")))
+    return stub
+
+
+def test_cache_key_is_canonical_id_prompt_version_and_model():
+    assert _cache_key("agpl-3.0", "gpt-4") == f"AGPL-3.0:{PROMPT_VERSION}:gpt-4"
+    assert _cache_key(" `AGPL-3.0` ", "gpt-4") == _cache_key("AGPL-3.0", "gpt-4")
+    assert _cache_key("AGPL-3.0", "gpt-4o") != _cache_key("AGPL-3.0", "gpt-4")
+
+
+def test_canonical_license_id_matches_risk_tables_case_insensitively():
+    assert canonical_license_id("apache-2.0") == "Apache-2.0"
+    assert canonical_license_id("mit?") == "MIT"
+    # Unknown IDs pass through, cleaned.
+    assert canonical_license_id("My License") == "My-License"
+
+
+def test_summary_is_generated_once_then_served_from_cache(completions):
+    assert license_summaries.summarize_license("agpl-3.0") == "Strong copyleft."
+    assert license_summaries.summarize_license("AGPL-3.0") == "Strong copyleft."
+    assert len(completions.calls) == 1
+    assert "AGPL-3.0" in completions.calls[0]["messages"][0]["content"]
+    assert license_summaries.cached_summary("AGPL-3.0") == "Strong copyleft."
+
+
+def test_other_model_is_a_separate_entry(completions):
+    license_summaries.summarize_license("AGPL-3.0", model="gpt-4")
+    assert license_summaries.cached_summary("AGPL-3.0", model="gpt-4o") is None
+    license_summaries.summarize_license("AGPL-3.0", model="gpt-4o")
+    assert [call["model"] for call in completions.calls] == ["gpt-4", "gpt-4o"]
+
+
+def test_explain_comment_is_answered_from_cache_without_the_llm(completions, monkeypatch):
+    license_summaries.summary_cache.set(_cache_key("AGPL-3.0", license_summaries.SUMMARY_MODEL), "Network copyleft.")
+
+    def no_llm(*args, **kwargs):
+        raise AssertionError("the agent LLM must not be called")
+
+    monkeypatch.setattr(llm_agent, "_stream_step", no_llm)
+    monkeypatch.setattr(llm_agent, "build_scan_digest", no_llm)
+    answer = llm_agent.handle_governance_comment("Explain AGPL", "o/r", 1, 1, repo=None)
+    assert answer == "### AGPL-3.0\n\nNetwork copyleft."
+    assert completions.calls == []
+
+
+def test_explain_falls_through_without_a_cached_summary(completions):
+    assert llm_agent.answer_from_summary_cache("what is MPL-2.0?") is None
+    assert llm_agent.answer_from_summary_cache("explain Not-A-License") is None
+    assert llm_agent.answer_from_summary_cache("is this PR safe to merge?") is None
+    assert completions.calls == []
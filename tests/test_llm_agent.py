@@ -0,0 +1,145 @@
+from types import SimpleNamespace
+
+import pytest
+
+from utils import llm_agent, pr_commenter
+
+
+def _chunk(content=None, tool_calls=None, usage=None):
+    choices = [] if usage else [SimpleNamespace(delta=SimpleNamespace(content=content, tool_calls=tool_calls))]
+    return SimpleNamespace(choices=choices, usage=usage)
+
+
+def _fragment(index, id=None, name=None, arguments=None):
+    return SimpleNamespace(index=index, id=id, function=SimpleNamespace(name=name, arguments=arguments))
+
+
+def _usage():
+    return _chunk(usage=SimpleNamespace(prompt_tokens=100, completion_tokens=10))
+
+
+class StubCompletions:
+    """Streams the next scripted turn; `turn(tool_choice)` returns its chunks."""
+
+    def __init__(self, turn):
+        self.turn = turn
+        self.calls = []
+
+    def create(self, **kwargs):
+        self.calls.append({**kwargs, "messages": list(kwargs["messages"])})
+        return iter(self.turn(kwargs["tool_choice"]) + [_usage()])
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    def install(turn):
+        stub = StubCompletions(turn)
+        monkeypatch.setattr(llm_agent, "client", SimpleNamespace(chat=SimpleNamespace(completions=stub)))
+        return stub
+
+    monkeypatch.setattr(llm_agent, "build_scan_digest", lambda repo, pr: None)
+    monkeypatch.setitem(llm_agent.TOOLS["summarize_license"], "function",
+                        lambda repo, pr, install, license_id=None: f"summary of {license_id}")
+    return install
+
+
+def _ask(on_token=None):
+    return llm_agent.handle_governance_comment("Can we ship AGPL and MPL deps?", "o/r", 7, 1, repo=None,
+                                               on_token=on_token)
+
+
+def test_one_turn_runs_several_tools_then_answers(agent):
+    turns = [
+        # Two calls, their ids, names and arguments split across chunks.
+        [_chunk(tool_calls=[_fragment(0, id="a", name="summarize_", arguments='{"license_')]),
+         _chunk(tool_calls=[_fragment(0, name="license", arguments='id": "AGPL-3.0"}'),
+                            _fragment(1, id="b", name="summarize_license", arguments='{"license_id": "MPL-2.0"}')])],
+        [_chunk(content="Both are "), _chunk(content="copyleft.")],
+    ]
+    stub = agent(lambda tool_choice: turns.pop(0))
+    tokens = []
+
+    assert _ask(tokens.append) == "Both are copyleft."
+    assert [c["tool_choice"] for c in stub.calls] == ["auto", "auto"]
+    assistant, *results = stub.calls[1]["messages"][-3:]
+    assert [c["function"]["arguments"] for c in assistant["tool_calls"]] == [
+        '{"license_id": "AGPL-3.0"}', '{"license_id": "MPL-2.0"}']
+    assert [(r["tool_call_id"], r["content"]) for r in results] == [
+        ("a", "summary of AGPL-3.0"), ("b", "summary of MPL-2.0")]
+    # Only the answering turn reaches the consumer.
+    assert tokens == ["Both are ", "copyleft."]
+
+
+def test_last_step_is_forced_to_answer(agent):
+    def turn(tool_choice):
+        if tool_choice == "none":
+            return [_chunk(content="Best effort "), _chunk(content="answer.")]
+        return [_chunk(content="Let me check.", tool_calls=[_fragment(0, id="x", name="summarize_license",
+                                                                     arguments='{"license_id": "GPL-3.0"}')])]
+
+    stub = agent(turn)
+    tokens = []
+
+    assert _ask(tokens.append) == "Best effort answer."
+    assert [c["tool_choice"] for c in stub.calls] == ["auto"] * (llm_agent.MAX_STEPS - 1) + ["none"]
+    # Text from turns that called tools is not streamed as part of the answer.
+    assert tokens == ["Best effort ", "answer."]
+
+
+def test_unknown_and_failing_tools_are_reported_to_the_model(agent, monkeypatch):
+    def boom(repo, pr, install, **kwargs):
+        raise RuntimeError("scan store offline")
+
+    monkeypatch.setitem(llm_agent.TOOLS["scan_risky_licenses"], "function", boom)
+    turns = [
+        [_chunk(tool_calls=[_fragment(0, id="a", name="scan_risky_licenses", arguments=""),
+                            _fragment(1, id="b", name="delete_repo", arguments="{}")])],
+        [_chunk(content="Sorry.")],
+    ]
+    stub = agent(lambda tool_choice: turns.pop(0))
+
+    assert _ask() == "Sorry."
+    assert [m["content"] for m in stub.calls[1]["messages"][-2:]] == [
+        "Tool scan_risky_licenses failed: scan store offline", "Unknown tool delete_repo."]
+
+
+class FakeComment:
+    def __init__(self, body):
+        self.bodies = [body]
+
+    def edit(self, body):
+        self.bodies.append(body)
+
+
+class FakeRepo:
+    def __init__(self):
+        self.comments = []
+
+    def get_pull(self, number):
+        return SimpleNamespace(create_issue_comment=self._create)
+
+    def _create(self, body):
+        self.comments.append(FakeComment(body))
+        return self.comments[-1]
+
+
+def test_streaming_reply_posts_once_and_throttles_edits(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(pr_commenter.time, "time", lambda: now[0])
+    repo = FakeRepo()
+    reply = pr_commenter.StreamingReply(repo, 7)
+
+    reply("Both ")
+    reply("are")
+    now[0] += pr_commenter.STREAM_EDIT_INTERVAL
+    reply(" copyleft")
+    reply.finish("Both are copyleft.")
+
+    assert len(repo.comments) == 1
+    assert repo.comments[0].bodies == ["Both …", "Both are copyleft …", "Both are copyleft."]
+
+
+def test_streaming_reply_posts_the_answer_when_nothing_streamed():
+    repo = FakeRepo()
+    pr_commenter.StreamingReply(repo, 7).finish("### AGPL-3.0\n\nNetwork copyleft.")
+    assert repo.comments[0].bodies == ["### AGPL-3.0\n\nNetwork copyleft."]
@@ -0,0 +1,46 @@
+from utils.dependency_scanner import manifest_cache_key
+from utils.manifest_discovery import Manifest
+
+ROOT = Manifest("pom.xml", "pom.xml", "root1", "maven")
+API = Manifest("api/pom.xml", "pom.xml", "api1", "maven")
+WEB = Manifest("web/package.json", "package.json", "web1", "npm")
+REQS = Manifest("requirements.txt", "requirements.txt", "req1", "pypi")
+MANIFESTS = [ROOT, API, WEB, REQS]
+BUILD = {".mvn/maven.config": "cfg1"}
+
+
+def _key(manifest, manifests=MANIFESTS, build_files=BUILD, resolver="mvn"):
+    return manifest_cache_key(manifest, manifests, resolver, build_files)
+
+
+def test_pom_key_changes_with_a_sibling_pom():
+    changed_api = Manifest("api/pom.xml", "pom.xml", "api2", "maven")
+    assert _key(ROOT) != _key(ROOT, [ROOT, changed_api, WEB, REQS])
+    assert _key(ROOT) != _key(ROOT, [ROOT, WEB, REQS])  # module removed
+
+
+def test_pom_key_changes_with_mvn_config():
+    assert _key(ROOT) != _key(ROOT, build_files={".mvn/maven.config": "cfg2"})
+    assert _key(ROOT) != _key(ROOT, build_files={**BUILD, ".mvn/extensions.xml": "ext1"})
+
+
+def test_pom_key_ignores_unrelated_files():
+    changed_web = Manifest("web/package.json", "package.json", "web2", "npm")
+    assert _key(ROOT) == _key(ROOT, [ROOT, API, changed_web, REQS])
+    assert _key(ROOT) == _key(ROOT, [ROOT, API])
+
+
+def test_identical_poms_in_different_modules_get_different_keys():
+    twin = Manifest("other/pom.xml", "pom.xml", "root1", "maven")
+    assert _key(ROOT, [ROOT, twin]) != _key(twin, [ROOT, twin])
+
+
+def test_pom_key_depends_on_the_resolver():
+    assert _key(ROOT, resolver="mvn") != _key(ROOT, resolver="python")
+
+
+def test_non_maven_keys_are_content_only():
+    assert _key(WEB) == _key(WEB, [WEB], build_files={})
+    assert _key(REQS) == manifest_cache_key(Manifest("elsewhere/requirements.txt", "requirements.txt", "req1", "pypi"),
+                                            [], "python")
+    assert _key(REQS) != manifest_cache_key(Manifest("requirements.txt", "requirements.txt", "req2", "pypi"), [], "mvn")
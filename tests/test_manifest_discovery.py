@@ -0,0 +1,93 @@
+from types import SimpleNamespace
+
+import pytest
+
+from utils import manifest_discovery
+from utils.manifest_discovery import discover_manifests, match_manifest, register_manifest_pattern
+
+
+def _blob(path, sha="s"):
+    return SimpleNamespace(type="blob", path=path, sha=f"{sha}-{path}")
+
+
+def _item(path, type_="file"):
+    return SimpleNamespace(type=type_, path=path, name=path.rsplit("/", 1)[-1], sha=f"s-{path}")
+
+
+class StubRepo:
+    """A repo whose git tree lists `paths`, optionally flagged as truncated like GitHub does past 100k entries."""
+
+    def __init__(self, paths, truncated=False):
+        self.paths = paths
+        self.truncated = truncated
+        self.contents_calls = []
+
+    def get_git_tree(self, ref, recursive=False):
+        elements = [_blob(p) for p in self.paths] + [SimpleNamespace(type="tree", path="src", sha="t")]
+        return SimpleNamespace(tree=elements, raw_data={"truncated": self.truncated})
+
+    def get_contents(self, path, ref=None):
+        self.contents_calls.append(path)
+        prefix = f"{path}/" if path else ""
+        children = {}
+        for p in self.paths:
+            if not p.startswith(prefix):
+                continue
+            head, _, rest = p[len(prefix):].partition("/")
+            children[head] = _item(prefix + head, "dir" if rest else "file")
+        return list(children.values())
+
+
+@pytest.fixture
+def patterns(monkeypatch):
+    monkeypatch.setattr(manifest_discovery, "MANIFEST_PATTERNS", dict(manifest_discovery.MANIFEST_PATTERNS))
+
+
+@pytest.mark.parametrize("path, ecosystem", [
+    ("pom.xml", "maven"),
+    ("services/api/requirements.txt", "pypi"),
+    ("web/yarn.lock", "npm"),
+    ("web/node_modules-readme.md", None),
+    ("requirements-dev.txt", None),
+    ("docs/pom.xml.bak", None),
+])
+def test_builtin_patterns(path, ecosystem):
+    assert match_manifest(path) == ecosystem
+
+
+def test_registered_patterns_match_names_and_paths(patterns):
+    register_manifest_pattern("requirements-*.txt", "pypi")
+    register_manifest_pattern("ci/*.lock", "npm")
+    assert match_manifest("a/b/requirements-dev.txt") == "pypi"
+    assert match_manifest("ci/deps.lock") == "npm"
+    assert match_manifest("other/ci/deps.lock") is None
+
+
+TREE = [
+    "pom.xml",
+    ".mvn/maven.config",
+    "services/api/pom.xml",
+    "services/api/src/Main.java",
+    "web/package.json",
+    "web/yarn.lock",
+    "README.md",
+]
+
+
+def test_discovery_from_recursive_tree():
+    repo = StubRepo(TREE)
+    manifests = discover_manifests(repo, "head")
+    assert [m.path for m in manifests] == ["pom.xml", "web/package.json", "web/yarn.lock", "services/api/pom.xml"]
+    assert [m.ecosystem for m in manifests] == ["maven", "npm", "npm", "maven"]
+    assert manifests[3].name == "pom.xml" and manifests[3].sha == "s-services/api/pom.xml"
+    assert manifests.build_files == {".mvn/maven.config": "s-.mvn/maven.config"}
+    assert repo.contents_calls == []
+
+
+def test_truncated_tree_falls_back_to_directory_walk():
+    repo = StubRepo(TREE, truncated=True)
+    manifests = discover_manifests(repo, "head")
+    assert [m.path for m in manifests] == ["pom.xml", "web/package.json", "web/yarn.lock", "services/api/pom.xml"]
+    assert manifests.build_files == {".mvn/maven.config": "s-.mvn/maven.config"}
+    assert repo.contents_calls[0] == ""
+    assert "services/api/src" in repo.contents_calls
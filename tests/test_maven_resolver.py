@@ -0,0 +1,196 @@
+import os
+
+import pytest
+
+from depsdev.cache import TieredCache
+from parsers import pom_store
+from parsers.maven_resolver import MavenResolver, highest_in_range, _compare_versions
+
+
+def _pom(group, artifact, version, dependencies="", management="", parent="", properties="", packaging="jar"):
+    return f"""<project xmlns="http://maven.apache.org/POM/4.0.0">
+  {parent}
+  <groupId>{group}</groupId><artifactId>{artifact}</artifactId><version>{version}</version>
+  <packaging>{packaging}</packaging>
+  <properties>{properties}</properties>
+  <dependencyManagement><dependencies>{management}</dependencies></dependencyManagement>
+  <dependencies>{dependencies}</dependencies>
+</project>"""
+
+
+def _dep(coords, scope=None, extra=""):
+    group, artifact, version = (coords.split(":") + [None])[:3]
+    parts = f"<groupId>{group}</groupId><artifactId>{artifact}</artifactId>"
+    if version:
+        parts += f"<version>{version}</version>"
+    if scope:
+        parts += f"<scope>{scope}</scope>"
+    return f"<dependency>{parts}{extra}</dependency>"
+
+
+class FixtureStore:
+    """Stands in for the POM store: remote POMs and maven-metadata versions from dicts."""
+
+    def __init__(self, poms, metadata=None):
+        self.poms = poms
+        self.metadata = metadata or {}
+        self.fetched = []
+
+    def get_text(self, group, artifact, version):
+        self.fetched.append((group, artifact, version))
+        return self.poms.get(f"{group}:{artifact}:{version}")
+
+    def versions(self, group, artifact):
+        return self.metadata.get(f"{group}:{artifact}")
+
+
+def _resolve(tmp_path, root_pom, poms=None, metadata=None, files=None, module="pom.xml"):
+    (tmp_path / "pom.xml").write_text(root_pom)
+    for path, text in (files or {}).items():
+        os.makedirs(tmp_path / os.path.dirname(path), exist_ok=True)
+        (tmp_path / path).write_text(text)
+    store = FixtureStore(poms or {}, metadata)
+    return MavenResolver(str(tmp_path), store=store).resolve(module)
+
+
+def test_nearest_definition_wins(tmp_path):
+    poms = {
+        "g:a:1": _pom("g", "a", "1", _dep("g:shared:2.0") + _dep("g:b:1")),
+        "g:b:1": _pom("g", "b", "1", _dep("g:c:1")),
+        "g:c:1": _pom("g", "c", "1", _dep("g:shared:1.0")),
+        "g:shared:1.0": _pom("g", "shared", "1.0"),
+        "g:shared:2.0": _pom("g", "shared", "2.0"),
+    }
+    root = _pom("app", "app", "1", _dep("g:c:1") + _dep("g:a:1"))
+    # shared@1.0 is two hops away via c, shared@2.0 is also two hops away via a; c is declared first.
+    assert dict(_resolve(tmp_path, root, poms))["g:shared"] == "1.0"
+
+    root = _pom("app", "app", "1", _dep("g:b:1") + _dep("g:a:1"))
+    # Via b it is three hops away, via a two: the nearer one wins regardless of order.
+    assert dict(_resolve(tmp_path, root, poms))["g:shared"] == "2.0"
+
+
+def test_direct_declaration_beats_transitive(tmp_path):
+    poms = {
+        "g:a:1": _pom("g", "a", "1", _dep("g:shared:2.0")),
+        "g:shared:1.0": _pom("g", "shared", "1.0"),
+        "g:shared:2.0": _pom("g", "shared", "2.0"),
+    }
+    root = _pom("app", "app", "1", _dep("g:a:1") + _dep("g:shared:1.0"))
+    assert dict(_resolve(tmp_path, root, poms))["g:shared"] == "1.0"
+
+
+def test_bom_import_manages_versions(tmp_path):
+    poms = {
+        "g:bom:3": _pom("g", "bom", "3", packaging="pom",
+                        management=_dep("g:lib:3.1") + _dep("g:transitive:9.9")),
+        "g:lib:3.1": _pom("g", "lib", "3.1", _dep("g:transitive:1.0")),
+        "g:transitive:1.0": _pom("g", "transitive", "1.0"),
+        "g:transitive:9.9": _pom("g", "transitive", "9.9"),
+    }
+    root = _pom("app", "app", "1", _dep("g:lib"),
+                management=_dep("g:bom:3", "import", "<type>pom</type>"))
+    # The BOM pins the direct dependency and, via root management, the transitive one.
+    assert _resolve(tmp_path, root, poms) == [("g:lib", "3.1"), ("g:transitive", "9.9")]
+
+
+def test_scope_propagation(tmp_path):
+    poms = {
+        "g:prov:1": _pom("g", "prov", "1", _dep("g:under-prov:1")),
+        "g:under-prov:1": _pom("g", "under-prov", "1"),
+        "g:rt:1": _pom("g", "rt", "1", _dep("g:under-rt:1")),
+        "g:under-rt:1": _pom("g", "under-rt", "1"),
+        "g:lib:1": _pom("g", "lib", "1", _dep("g:its-test:1", "test") + _dep("g:its-provided:1", "provided")),
+        "g:its-test:1": _pom("g", "its-test", "1"),
+        "g:its-provided:1": _pom("g", "its-provided", "1"),
+        "g:tst:1": _pom("g", "tst", "1"),
+    }
+    root = _pom("app", "app", "1",
+                _dep("g:prov:1", "provided") + _dep("g:rt:1", "runtime") + _dep("g:lib:1") + _dep("g:tst:1", "test"))
+    # Compile-classpath view (like mvn -DincludeScope=compile): runtime paths and test scopes drop out,
+    # provided propagates, and a dependency's own test/provided dependencies are not inherited.
+    assert _resolve(tmp_path, root, poms) == [("g:prov", "1"), ("g:lib", "1"), ("g:under-prov", "1")]
+
+
+def test_exclusions_apply_to_the_whole_subtree(tmp_path):
+    poms = {
+        "g:a:1": _pom("g", "a", "1", _dep("g:b:1") + _dep("log:commons-logging:1")),
+        "g:b:1": _pom("g", "b", "1", _dep("log:log4j:1") + _dep("other:keep:1")),
+    }
+    exclusions = ("<exclusions><exclusion><groupId>log</groupId><artifactId>*</artifactId></exclusion>"
+                  "</exclusions>")
+    root = _pom("app", "app", "1", _dep("g:a:1", extra=exclusions))
+    assert _resolve(tmp_path, root, poms) == [("g:a", "1"), ("g:b", "1"), ("other:keep", "1")]
+
+
+def test_ranges_resolve_against_repository_metadata(tmp_path):
+    poms = {"g:lib:1.4": _pom("g", "lib", "1.4")}
+    metadata = {"g:lib": ["1.0", "1.4", "2.0", "1.5-SNAPSHOT"]}
+    root = _pom("app", "app", "1", _dep("g:lib:[1.0,2.0)"))
+    assert _resolve(tmp_path, root, poms, metadata) == [("g:lib", "1.4")]
+
+
+def test_unresolvable_range_falls_back_to_mvn(tmp_path):
+    root = _pom("app", "app", "1", _dep("g:lib:[1.0,2.0)"))
+    assert _resolve(tmp_path, root, {}, metadata={}) is None
+
+
+def test_parent_declared_revision_resolves_reactor_siblings(tmp_path):
+    parent = '<parent><groupId>app</groupId><artifactId>parent</artifactId><version>${revision}</version></parent>'
+    root = _pom("app", "parent", "${revision}", properties="<revision>1.2.0</revision>", packaging="pom")
+    files = {
+        "core/pom.xml": _pom("app", "core", "${revision}", _dep("g:lib:1"), parent=parent),
+        "web/pom.xml": _pom("app", "web", "${revision}", _dep("app:core:${project.version}"), parent=parent),
+    }
+    poms = {"g:lib:1": _pom("g", "lib", "1")}
+    store_misses = FixtureStore(poms)
+    (tmp_path / "pom.xml").write_text(root)
+    for path, text in files.items():
+        os.makedirs(tmp_path / os.path.dirname(path))
+        (tmp_path / path).write_text(text)
+    resolver = MavenResolver(str(tmp_path), store=store_misses)
+    assert resolver.resolve("web/pom.xml") == [("app:core", "1.2.0"), ("g:lib", "1")]
+    # The sibling came from the checkout, not the remote store.
+    assert ("app", "core", "1.2.0") not in store_misses.fetched
+
+
+@pytest.mark.parametrize("spec, expected", [
+    ("[1.0,2.0)", "2.0-rc1"),  # as in Maven, 2.0's prereleases sort below the exclusive bound
+    ("[1.0,1.10]", "1.10"),
+    ("(,1.0]", "1.0"),
+    ("[1.2]", None),
+    ("[1.0,1.1),[2.0,)", "2.1-sp1"),
+    ("(1.10,2.0]", "2.0"),
+])
+def test_highest_in_range(spec, expected):
+    versions = ["0.9", "1.0", "1.1-beta", "1.9", "1.10", "2.0-rc1", "2.0", "2.1-sp1", "3.0-SNAPSHOT"]
+    assert highest_in_range(spec, versions) == expected
+
+
+def test_version_ordering():
+    ordered = ["1.0-alpha", "1.0-beta", "1.0-rc1", "1.0", "1.0-sp", "1.0.1", "1.10"]
+    for lower, higher in zip(ordered, ordered[1:]):
+        assert _compare_versions(lower, higher) < 0
+    assert _compare_versions("1.0", "1.0.0") == 0
+
+
+def test_pom_store_reads_versions_from_maven_metadata(tmp_path, monkeypatch):
+    class Response:
+        def __init__(self, status_code, text=""):
+            self.status_code, self.text = status_code, text
+
+    metadata = ("<metadata><versioning><versions><version>1.0</version><version>1.1</version>"
+                "</versions></versioning></metadata>")
+    requests = []
+
+    def get(url, **kwargs):
+        requests.append(url)
+        return Response(200, metadata) if url == "https://repo/org/example/lib/maven-metadata.xml" else Response(404)
+
+    monkeypatch.setattr(pom_store.http_client, "get", get)
+    store = pom_store.PomStore(root=str(tmp_path / "poms"), repositories=["https://repo"])
+    store.index = TieredCache("pom_index", db_path=str(tmp_path / "index.sqlite"))
+    assert store.versions("org.example", "lib") == ["1.0", "1.1"]
+    assert store.versions("org.example", "lib") == ["1.0", "1.1"]
+    assert store.versions("org.example", "unknown") is None
+    assert len(requests) == 2
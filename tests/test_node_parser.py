@@ -0,0 +1,116 @@
+import io
+import json
+
+import pytest
+
+from parsers import node_parser
+from parsers.node_parser import parse_package_json, parse_package_lock, parse_yarn_lock, parse_pnpm_lock
+
+
+def _stream(text: str):
+    return io.BytesIO(text.encode())
+
+
+def test_parse_package_json():
+    content = json.dumps({"dependencies": {"lodash": "^4.17.0"}, "devDependencies": {"jest": "29.0.0"}})
+    assert parse_package_json(content) == [("lodash", "^4.17.0"), ("jest", "29.0.0")]
+
+
+PACKAGE_LOCK_V3 = json.dumps({
+    "name": "app",
+    "lockfileVersion": 3,
+    "packages": {
+        "": {"name": "app", "version": "1.0.0", "dependencies": {"a": "^1.0.0"}},
+        "node_modules/a": {"version": "1.2.3"},
+        "node_modules/a/node_modules/@scope/b": {"version": "2.0.0"},
+        "node_modules/linked": {"resolved": "../linked", "link": True},
+        "node_modules/git-dep": {"version": "github:user/repo#abc"},
+    },
+})
+
+PACKAGE_LOCK_V1 = json.dumps({
+    "name": "app",
+    "version": "1.0.0",
+    "lockfileVersion": 1,
+    "dependencies": {
+        "a": {"version": "1.2.3", "dependencies": {"c": {"version": "3.1.0"}}},
+        "b": {"version": "2.0.0"},
+    },
+})
+
+
+@pytest.mark.parametrize("streaming", [True, False])
+def test_parse_package_lock_v3(monkeypatch, streaming):
+    if not streaming:
+        monkeypatch.setattr(node_parser, "ijson", None)
+    assert parse_package_lock(_stream(PACKAGE_LOCK_V3)) == [("a", "1.2.3"), ("@scope/b", "2.0.0")]
+
+
+@pytest.mark.parametrize("streaming", [True, False])
+def test_parse_package_lock_v1(monkeypatch, streaming):
+    if not streaming:
+        monkeypatch.setattr(node_parser, "ijson", None)
+    assert sorted(parse_package_lock(_stream(PACKAGE_LOCK_V1))) == [("a", "1.2.3"), ("b", "2.0.0"), ("c", "3.1.0")]
+
+
+def test_parse_package_lock_invalid_json_is_empty():
+    assert parse_package_lock(_stream("{not json")) == []
+
+
+def test_parse_yarn_lock_classic():
+    lock = '''# THIS IS AN AUTOGENERATED FILE.
+# yarn lockfile v1
+
+
+"@babel/core@^7.0.0", "@babel/core@^7.1.0":
+  version "7.22.5"
+  resolved "https://registry.yarnpkg.com/@babel/core/-/core-7.22.5.tgz"
+  dependencies:
+    debug "^4.1.0"
+
+debug@^4.1.0:
+  version "4.3.4"
+'''
+    assert parse_yarn_lock(_stream(lock)) == [("@babel/core", "7.22.5"), ("debug", "4.3.4")]
+
+
+def test_parse_yarn_lock_berry_skips_workspaces():
+    lock = '''__metadata:
+  version: 6
+  cacheKey: 8
+
+"app@workspace:.":
+  version: 0.0.0-use.local
+
+"left-pad@npm:^1.3.0":
+  version: 1.3.0
+  resolution: "left-pad@npm:1.3.0"
+'''
+    assert parse_yarn_lock(_stream(lock)) == [("left-pad", "1.3.0")]
+
+
+def test_parse_yarn_lock_reports_aliases_under_the_real_name():
+    lock = '''"old-lodash@npm:lodash@^3.10.0":
+  version "3.10.1"
+
+"types-node@npm:@types/node@^20.0.0":
+  version: 20.1.0
+  resolution: "@types/node@npm:20.1.0"
+'''
+    assert parse_yarn_lock(_stream(lock)) == [("lodash", "3.10.1"), ("@types/node", "20.1.0")]
+
+
+@pytest.mark.parametrize("lock", [
+    # v5
+    "lockfileVersion: 5.4\npackages:\n  /left-pad/1.3.0:\n    resolution: {integrity: x}\n"
+    "  /@types/node/20.1.0_typescript@5.0.0:\n    dev: true\n",
+    # v6
+    "lockfileVersion: '6.0'\npackages:\n  /left-pad@1.3.0:\n    resolution: {integrity: x}\n"
+    "  /@types/node@20.1.0(typescript@5.0.0):\n    dev: true\n",
+    # v9
+    "lockfileVersion: '9.0'\nimporters:\n  .:\n    dependencies: {}\npackages:\n"
+    "  left-pad@1.3.0:\n    resolution: {integrity: x}\n  '@types/node@20.1.0':\n    resolution: {integrity: y}\n"
+    "snapshots:\n  left-pad@1.3.0: {}\n",
+])
+def test_parse_pnpm_lock_versions(lock):
+    assert parse_pnpm_lock(_stream(lock)) == [("left-pad", "1.3.0"), ("@types/node", "20.1.0")]
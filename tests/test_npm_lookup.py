@@ -0,0 +1,27 @@
+from depsdev import npm
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=None):
+        self.status_code = status_code
+        self._body = body or {}
+
+    def json(self):
+        return self._body
+
+
+def test_scoped_package_resolves_range_and_fetches_unescaped_version_document(monkeypatch):
+    requested = []
+    monkeypatch.setattr(npm, "get_npm_versions", lambda package: ["7.0.0", "7.1.2", "8.0.0"])
+
+    def get(url, **kwargs):
+        requested.append(url)
+        return FakeResponse(200, {"license": "MIT"})
+
+    monkeypatch.setattr(npm.http_client, "get", get)
+    assert npm.query_npm_license.uncached("@babel/core", "^7.0.0") == (["MIT"], "NPM")
+    assert requested == [f"{npm.NPM_REGISTRY}/@babel/core/7.1.2"]
+
+
+def test_packument_url_escapes_the_scope():
+    assert npm._escape("@babel/core") == "@babel%2Fcore"
@@ -0,0 +1,32 @@
+import pytest
+
+from utils.oss_router import classify_locally
+
+
+@pytest.mark.parametrize("comment", [
+    "is gpl ok?", "agpl ok here?", "Is this AGPL-3.0 dependency a problem?",
+    "what does copyleft mean for us", "MIT license?", "gplv3 ok",
+    "Can we use the Elastic-2.0 package here", "switching to an MIT library",
+])
+def test_license_questions_route_yes(comment):
+    assert classify_locally(comment) is True
+
+
+@pytest.mark.parametrize("comment", ["lgtm", "👍", "thanks!", "submit it", "please rebase this", ""])
+def test_acks_and_short_chatter_route_no(comment):
+    assert classify_locally(comment) is False
+
+
+@pytest.mark.parametrize("comment", [
+    "is elastic ok?", "can we ship this before friday or not",
+    # A license ID with no license or question cue near it is not enough for a local yes.
+    "Elastic search cluster is down again", "MIT campus wifi is down",
+    # Short, but about governance.
+    "risky deps?", "any legal concerns",
+])
+def test_ambiguous_comments_go_to_the_llm(comment):
+    assert classify_locally(comment) is None
+
+
+def test_comment_addressed_to_someone_else_routes_no():
+    assert classify_locally("@alice is the GPL dependency fine?") is False
@@ -0,0 +1,124 @@
+import hashlib
+import os
+
+import pytest
+
+from depsdev.cache import TieredCache
+from parsers import pom_store as pom_store_module
+from parsers.pom_store import PomStore
+
+
+def _pom(group, artifact, version, parent=None, licenses=()):
+    parent_xml = ""
+    if parent:
+        parent_xml = (f"<parent><groupId>{parent[0]}</groupId><artifactId>{parent[1]}</artifactId>"
+                      f"<version>{parent[2]}</version></parent>")
+    license_xml = "".join(f"<license><name>{name}</name></license>" for name in licenses)
+    return (f'<project xmlns="http://maven.apache.org/POM/4.0.0">{parent_xml}<groupId>{group}</groupId>'
+            f"<artifactId>{artifact}</artifactId><version>{version}</version>"
+            f"<licenses>{license_xml}</licenses></project>")
+
+
+class FakeResponse:
+    def __init__(self, status_code, text=""):
+        self.status_code = status_code
+        self.text = text
+
+
+@pytest.fixture
+def repository(monkeypatch):
+    """A Maven repository served from a dict of relative path -> POM text; records every GET."""
+    files, requests = {}, []
+
+    def get(url, **kwargs):
+        requests.append(url)
+        rel = url.split("/maven2/", 1)[-1]
+        return FakeResponse(200, files[rel]) if rel in files else FakeResponse(404)
+
+    monkeypatch.setattr(pom_store_module.http_client, "get", get)
+    return files, requests
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = PomStore(root=str(tmp_path / "poms"), repositories=["https://repo/maven2"])
+    store.index = TieredCache("pom_index", db_path=str(tmp_path / "index.sqlite"))
+    return store
+
+
+def _publish(files, group, artifact, version, text):
+    files[f"{group.replace('.', '/')}/{artifact}/{version}/{artifact}-{version}.pom"] = text
+
+
+def test_poms_are_stored_by_content_and_downloaded_once(store, repository, tmp_path):
+    files, requests = repository
+    text = _pom("org.example", "lib", "1.0", licenses=["MIT"])
+    _publish(files, "org.example", "lib", "1.0", text)
+
+    assert store.get_text("org.example", "lib", "1.0") == text
+    assert store.get_text("org.example", "lib", "1.0") == text
+    assert len(requests) == 1
+    digest = hashlib.sha256(text.encode()).hexdigest()
+    assert os.path.exists(tmp_path / "poms" / "objects" / digest[:2] / f"{digest}.pom")
+    assert store.stats == {"store_hits": 1, "downloads": 1, "not_found": 0}
+
+
+def test_identical_poms_share_one_object(store, repository, tmp_path):
+    files, _ = repository
+    text = _pom("org.example", "relocated", "1.0")
+    _publish(files, "org.example", "relocated", "1.0", text)
+    _publish(files, "org.example", "relocated", "1.0.0", text)
+    store.get_text("org.example", "relocated", "1.0")
+    store.get_text("org.example", "relocated", "1.0.0")
+    objects = [f for _, _, names in os.walk(tmp_path / "poms") for f in names]
+    assert len(objects) == 1
+
+
+def test_missing_pom_is_negatively_cached(store, repository):
+    _, requests = repository
+    assert store.get_text("org.example", "missing", "1.0") is None
+    assert store.get_text("org.example", "missing", "1.0") is None
+    assert len(requests) == 1
+
+
+def test_evicted_object_is_downloaded_again(store, repository, tmp_path):
+    files, requests = repository
+    text = _pom("org.example", "lib", "1.0")
+    _publish(files, "org.example", "lib", "1.0", text)
+    store.get_text("org.example", "lib", "1.0")
+    digest = hashlib.sha256(text.encode()).hexdigest()
+    os.remove(tmp_path / "poms" / "objects" / digest[:2] / f"{digest}.pom")
+    assert store.get_text("org.example", "lib", "1.0") == text
+    assert len(requests) == 2
+
+
+def test_unresolved_coordinates_are_not_fetched(store, repository):
+    _, requests = repository
+    assert store.get_text("org.example", "lib", "${lib.version}") is None
+    assert store.get_text("org.example", "lib", None) is None
+    assert requests == []
+
+
+def test_licenses_are_inherited_from_the_nearest_ancestor(store, repository):
+    files, _ = repository
+    _publish(files, "org.example", "grandparent", "1", _pom("org.example", "grandparent", "1", licenses=["EPL-2.0"]))
+    _publish(files, "org.example", "parent", "1",
+             _pom("org.example", "parent", "1", parent=("org.example", "grandparent", "1"), licenses=["Apache-2.0"]))
+    _publish(files, "org.example", "child", "1", _pom("org.example", "child", "1", parent=("org.example", "parent", "1")))
+    _publish(files, "org.example", "own", "1",
+             _pom("org.example", "own", "1", parent=("org.example", "parent", "1"), licenses=["MIT"]))
+
+    assert store.licenses("org.example", "child", "1") == ["Apache-2.0"]
+    assert store.licenses("org.example", "own", "1") == ["MIT"]
+    assert [info["artifactId"] for info in store.parent_chain("org.example", "child", "1")] == [
+        "child", "parent", "grandparent"]
+
+
+def test_parent_chain_stops_at_a_cycle_or_missing_parent(store, repository):
+    files, _ = repository
+    _publish(files, "g", "a", "1", _pom("g", "a", "1", parent=("g", "b", "1")))
+    _publish(files, "g", "b", "1", _pom("g", "b", "1", parent=("g", "a", "1")))
+    _publish(files, "g", "orphan", "1", _pom("g", "orphan", "1", parent=("g", "gone", "1")))
+    assert [info["artifactId"] for info in store.parent_chain("g", "a", "1")] == ["a", "b"]
+    assert store.licenses("g", "orphan", "1") == []
+
@@ -0,0 +1,83 @@
+import json
+
+from parsers.python_parser import (
+    canonicalize_name, parse_requirements_txt, parse_poetry_lock, parse_uv_lock,
+    parse_pipfile_lock, parse_pyproject_toml,
+)
+
+
+def test_canonicalize_name():
+    assert canonicalize_name("Django") == "django"
+    assert canonicalize_name("zope.interface") == "zope-interface"
+    assert canonicalize_name("typing__extensions_") == "typing-extensions"
+
+
+def test_parse_requirements_txt():
+    content = """
+# comment
+-r base.txt
+requests==2.31.0
+Django>=4.2,<5
+uvicorn[standard]==0.23.2 ; python_version >= "3.8"
+flask
+numpy==1.* # wildcard pin
+"""
+    assert parse_requirements_txt(content) == [
+        ("requests", "2.31.0"),
+        ("Django", ">=4.2,<5"),
+        ("uvicorn", "0.23.2"),
+        ("flask", "latest"),
+        ("numpy", "==1.*"),
+    ]
+
+
+def test_parse_poetry_lock():
+    lock = '[[package]]\nname = "requests"\nversion = "2.31.0"\n\n[[package]]\nname = "idna"\nversion = "3.4"\n'
+    assert parse_poetry_lock(lock) == [("requests", "2.31.0"), ("idna", "3.4")]
+    assert parse_poetry_lock("not = [toml") == []
+
+
+def test_parse_uv_lock_skips_the_project_itself():
+    lock = """version = 1
+
+[[package]]
+name = "app"
+version = "0.1.0"
+source = { editable = "." }
+
+[[package]]
+name = "requests"
+version = "2.31.0"
+source = { registry = "https://pypi.org/simple" }
+"""
+    assert parse_uv_lock(lock) == [("requests", "2.31.0")]
+
+
+def test_parse_pipfile_lock():
+    lock = json.dumps({
+        "default": {"requests": {"version": "==2.31.0"}, "local": {"path": "."}},
+        "develop": {"pytest": {"version": "==7.4.0"}},
+    })
+    assert parse_pipfile_lock(lock) == [("requests", "2.31.0"), ("local", "latest"), ("pytest", "7.4.0")]
+
+
+def test_parse_pyproject_toml_pep621_and_poetry():
+    content = """
+[project]
+dependencies = ["requests==2.31.0", "click>=8"]
+
+[project.optional-dependencies]
+docs = ["sphinx"]
+
+[tool.poetry.dependencies]
+python = "^3.11"
+httpx = { version = "0.24.1" }
+rich = "*"
+
+[tool.poetry.group.dev.dependencies]
+pytest = "==7.4.0"
+"""
+    assert parse_pyproject_toml(content) == [
+        ("requests", "2.31.0"), ("click", ">=8"), ("sphinx", "latest"),
+        ("httpx", "0.24.1"), ("rich", "latest"), ("pytest", "7.4.0"),
+    ]
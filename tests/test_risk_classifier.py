@@ -0,0 +1,26 @@
+from utils.risk_classifier import (
+    format_licenses_with_risk, split_license_with_risk, license_family, risk_level,
+)
+
+
+def test_split_round_trips_spdx_ids():
+    formatted = format_licenses_with_risk(["MIT OR GPL-3.0"])
+    assert split_license_with_risk(formatted) == ["MIT", "GPL-3.0"]
+    assert risk_level(formatted) == "high"
+
+
+def test_split_keeps_commas_inside_license_names():
+    name = "The Apache Software License, Version 2.0"
+    formatted = format_licenses_with_risk([name, "BSD-3-Clause"])
+    assert split_license_with_risk(formatted) == [name, "BSD-3-Clause"]
+
+
+def test_split_of_unknown_without_licenses_is_empty():
+    assert split_license_with_risk(format_licenses_with_risk([])) == []
+
+
+def test_license_family():
+    assert license_family("AGPL-3.0-or-later") == "AGPL"
+    assert license_family("GPL-2.0+") == "GPL"
+    assert license_family("BSD-2-Clause") == "BSD"
+    assert license_family("The Apache Software License, Version 2.0") == "The Apache Software License"
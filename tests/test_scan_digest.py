@@ -0,0 +1,61 @@
+import pytest
+
+from utils import scan_digest, scan_wrapper
+from utils.risk_classifier import format_licenses_with_risk
+from utils.scan_store import ScanStore
+
+LICENSES = ["MIT", "Apache-2.0", "GPL-3.0", "LGPL-2.1", "Foo", "AGPL-3.0", "The Apache Software License, Version 2.0"]
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = ScanStore(str(tmp_path / "scans.sqlite"))
+    entries = [
+        ("npm" if i % 2 else "pypi", f"pkg{i % 30}/package.json", f"dep{i}", "1.0",
+         format_licenses_with_risk([LICENSES[i % len(LICENSES)]]), "DepsDev")
+        for i in range(3000)
+    ]
+    store.save_scan("o/r", 1, "a" * 40, "b" * 40, entries, {}, "x" * 300000, "failure")
+    monkeypatch.setattr(scan_digest, "scan_store", store)
+    monkeypatch.setattr(scan_wrapper, "scan_store", store)
+    return store
+
+
+def test_digest_stays_within_budget_on_large_scans(store):
+    digest = scan_digest.build_scan_digest("o/r", 1, budget=600)
+    assert scan_digest.estimate_tokens(digest) <= 600
+    assert "3000 dependencies" in digest
+    assert "GPL (429)" in digest and "The Apache Software License (428)" in digest
+    assert "Version" not in digest.split("All license families:")[1].split("\n")[0]
+    assert "offset=" in digest.splitlines()[-1]
+
+
+def test_digest_lists_high_risk_first(store):
+    rows = [line for line in scan_digest.build_scan_digest("o/r", 1).splitlines() if line.startswith("- ")]
+    icons = [row.split(" (")[0].split()[-1] for row in rows]
+    assert icons == sorted(icons, key=lambda icon: icon != "🔥")
+
+
+def test_digest_for_unscanned_pr_is_none(store):
+    assert scan_digest.build_scan_digest("o/r", 2) is None
+
+
+def test_drill_down_filters_and_pages(store):
+    first = scan_wrapper.scan_risky_licenses("o/r", 1, 0, "gpl", ecosystem="npm")
+    assert "license family GPL, ecosystem npm" in first
+    rows = [line for line in first.splitlines() if line.startswith("- ")]
+    assert rows and all(line.startswith("- npm ") and "GPL-3.0" in line for line in rows)
+    assert scan_digest.estimate_tokens(first) <= scan_digest.TOOL_TOKEN_BUDGET
+
+    offset = int(first.rsplit("offset=", 1)[1].rstrip("."))
+    second = scan_wrapper.scan_risky_licenses("o/r", 1, 0, "gpl", ecosystem="npm", offset=offset)
+    assert second.splitlines()[1] not in rows
+
+
+def test_drill_down_by_dependency_name(store):
+    result = scan_wrapper.scan_risky_licenses("o/r", 1, 0, dependency="dep2999")
+    assert result.splitlines()[1].startswith("- npm dep2999@1.0")
+
+
+def test_drill_down_past_the_end(store):
+    assert scan_wrapper.scan_risky_licenses("o/r", 1, 0, "high", offset=10**6).startswith("No more results")
@@ -0,0 +1,75 @@
+import threading
+
+import pytest
+
+from utils.scan_scheduler import ScanScheduler, SchedulerSaturated
+
+
+def _run_in_order(submissions):
+    """Queue `submissions` behind a busy single worker; return the order the jobs ran in."""
+    scheduler = ScanScheduler(workers=1)
+    ran, done = [], threading.Semaphore(0)
+    started, release = threading.Event(), threading.Event()
+
+    def gate():
+        started.set()
+        assert release.wait(5)
+
+    def job(name):
+        ran.append(name)
+        done.release()
+
+    scheduler.submit(gate)
+    assert started.wait(5)
+    for name, kwargs in submissions:
+        scheduler.submit(job, name, **kwargs)
+    release.set()
+    for _ in submissions:
+        assert done.acquire(timeout=5)
+    return ran
+
+
+def test_interactive_jobs_overtake_audits():
+    assert _run_in_order([
+        ("audit", dict(installation_id=1, job_class="audit", cost=10)),
+        ("check", dict(installation_id=1, job_class="interactive", cost=10)),
+    ]) == ["check", "audit"]
+
+
+def test_busy_installation_only_delays_itself():
+    order = _run_in_order([
+        ("big-1", dict(installation_id=1, cost=30)),
+        ("big-2", dict(installation_id=1, cost=30)),
+        ("big-3", dict(installation_id=1, cost=30)),
+        ("other", dict(installation_id=2, cost=30)),
+    ])
+    assert order.index("other") < order.index("big-3")
+
+
+def test_cheap_scans_overtake_expensive_ones():
+    assert _run_in_order([
+        ("monorepo", dict(installation_id=1, cost=100)),
+        ("tiny", dict(installation_id=2, cost=1)),
+    ]) == ["tiny", "monorepo"]
+
+
+def test_unknown_job_class_is_rejected():
+    with pytest.raises(ValueError):
+        ScanScheduler(workers=1).submit(lambda: None, job_class="urgent")
+
+
+def test_one_installation_is_capped_with_429(monkeypatch):
+    monkeypatch.setattr("utils.scan_scheduler.INSTALLATION_QUEUE_LIMIT", 2)
+    scheduler = ScanScheduler(workers=1, max_queue=10)
+    started, release = threading.Event(), threading.Event()
+    scheduler.submit(lambda: (started.set(), release.wait(5)))
+    assert started.wait(5)
+    try:
+        scheduler.submit(lambda: None, installation_id=1)
+        scheduler.submit(lambda: None, installation_id=1)
+        with pytest.raises(SchedulerSaturated) as capped:
+            scheduler.submit(lambda: None, installation_id=1)
+        assert capped.value.status_code == 429
+        assert scheduler.submit(lambda: None, installation_id=2) == "accepted"
+    finally:
+        release.set()
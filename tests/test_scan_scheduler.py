@@ -0,0 +1,135 @@
+import threading
+
+import pytest
+
+from utils.scan_scheduler import ScanScheduler, SchedulerSaturated, ScanCancelled, raise_if_cancelled
+
+
+class Gate:
+    """Occupies a worker until opened, so the queue can be arranged deterministically."""
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self):
+        self.started.set()
+        assert self.release.wait(5)
+
+
+def test_queued_job_is_coalesced_with_the_newer_event():
+    scheduler = ScanScheduler(workers=1)
+    ran, done = [], threading.Event()
+    gate = Gate()
+    scheduler.submit(gate)
+    assert gate.started.wait(5)
+    assert scheduler.submit(ran.append, "old", coalesce_key=("o/r", 1)) == "accepted"
+    assert scheduler.submit(lambda name: (ran.append(name), done.set()), "new", coalesce_key=("o/r", 1)) == "coalesced"
+    gate.release.set()
+    assert done.wait(5)
+    assert ran == ["new"]
+    assert scheduler.wait_for(("o/r", 1), 5)
+
+
+def test_running_job_is_cancelled_by_a_newer_event():
+    scheduler = ScanScheduler(workers=2)
+    started, outcome = threading.Event(), []
+
+    def scan():
+        started.set()
+        for _ in range(500):
+            try:
+                raise_if_cancelled()
+            except ScanCancelled:
+                outcome.append("cancelled")
+                raise
+            threading.Event().wait(0.01)
+
+    scheduler.submit(scan, coalesce_key=("o/r", 1))
+    assert started.wait(5)
+    scheduler.submit(lambda: None, coalesce_key=("o/r", 1))
+    assert scheduler.wait_for(("o/r", 1), 5)
+    assert outcome == ["cancelled"]
+    assert scheduler.metrics()["cancelled"] == 1
+
+
+def test_raise_if_cancelled_is_a_no_op_outside_the_scheduler():
+    raise_if_cancelled()
+
+
+def test_duplicate_deliveries_are_dropped():
+    scheduler = ScanScheduler(workers=1)
+    assert scheduler.submit(lambda: None, delivery_id="d-1") == "accepted"
+    assert scheduler.submit(lambda: None, delivery_id="d-1") == "duplicate"
+
+
+def test_full_queue_is_rejected_with_503_and_the_delivery_can_be_retried():
+    scheduler = ScanScheduler(workers=1, max_queue=1)
+    gate = Gate()
+    scheduler.submit(gate)
+    assert gate.started.wait(5)
+    try:
+        scheduler.submit(lambda: None)
+        with pytest.raises(SchedulerSaturated) as full:
+            scheduler.submit(lambda: None, delivery_id="d-2")
+        assert full.value.status_code == 503
+    finally:
+        gate.release.set()
+    # The rejected delivery is forgotten, so GitHub's redelivery is accepted.
+    for _ in range(100):
+        if scheduler.metrics()["queue_depth"] == 0:
+            break
+        threading.Event().wait(0.01)
+    assert scheduler.submit(lambda: None, delivery_id="d-2") == "accepted"
+
+
+def test_job_deferred_behind_a_running_scan_does_not_hold_the_only_worker():
+    scheduler = ScanScheduler(workers=1)
+    ran, done = [], threading.Event()
+    gate = Gate()
+    scheduler.submit(lambda: (gate(), ran.append("scan")), coalesce_key=("o/r", 1))
+    assert gate.started.wait(5)
+
+    assert scheduler.submit_after(("o/r", 1), lambda: (ran.append("audit"), done.set()), job_class="audit") == "deferred"
+    # Parked outside the queue: nothing sits on a worker waiting for the scan.
+    assert scheduler.metrics()["deferred_pending"] == 1
+    assert scheduler.metrics()["queue_depth"] == 0
+    gate.release.set()
+    assert done.wait(5)
+    assert ran == ["scan", "audit"]
+    assert scheduler.metrics()["deferred_pending"] == 0
+
+
+def test_deferred_job_waits_for_a_coalesced_follow_up_scan():
+    scheduler = ScanScheduler(workers=1)
+    ran, done = [], threading.Event()
+    gate = Gate()
+    scheduler.submit(gate)
+    assert gate.started.wait(5)
+    scheduler.submit(ran.append, "old scan", coalesce_key=("o/r", 1))
+    assert scheduler.submit_after(("o/r", 1), lambda: (ran.append("audit"), done.set())) == "deferred"
+    scheduler.submit(ran.append, "new scan", coalesce_key=("o/r", 1))
+    scheduler.submit(ran.append, "other PR", coalesce_key=("o/r", 2))
+    gate.release.set()
+    assert done.wait(5)
+    assert ran == ["new scan", "other PR", "audit"]
+
+
+def test_submit_after_with_nothing_pending_queues_right_away():
+    scheduler = ScanScheduler(workers=1)
+    done = threading.Event()
+    assert scheduler.submit_after(("o/r", 1), done.set, delivery_id="d-3") == "accepted"
+    assert done.wait(5)
+    assert scheduler.submit_after(("o/r", 1), done.set, delivery_id="d-3") == "duplicate"
+
+
+def test_deferred_delivery_is_deduplicated():
+    scheduler = ScanScheduler(workers=1)
+    gate = Gate()
+    scheduler.submit(gate, coalesce_key=("o/r", 1))
+    assert gate.started.wait(5)
+    try:
+        assert scheduler.submit_after(("o/r", 1), lambda: None, delivery_id="d-4") == "deferred"
+        assert scheduler.submit_after(("o/r", 1), lambda: None, delivery_id="d-4") == "duplicate"
+    finally:
+        gate.release.set()
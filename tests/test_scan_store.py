@@ -0,0 +1,37 @@
+from utils.risk_classifier import format_licenses_with_risk
+from utils.scan_store import ScanStore
+
+HEAD = "a" * 40
+
+
+def _store(tmp_path):
+    store = ScanStore(str(tmp_path / "scans.sqlite"))
+    entries = [
+        ("maven", "pom.xml", "org.example:lib", "1.0",
+         format_licenses_with_risk(["The Apache Software License, Version 2.0"]), "DepsDev"),
+        ("npm", "package.json", "left-pad", "1.3.0", format_licenses_with_risk(["GPL-3.0"]), "DepsDev"),
+        ("npm", "package.json", "lodash", "4.17.21", format_licenses_with_risk(["MIT"]), "DepsDev"),
+    ]
+    store.save_scan("o/r", 1, HEAD, "b" * 40, entries, {"package.json": "x"}, "report", "failure")
+    return store
+
+
+def test_family_counts_use_whole_license_names(tmp_path):
+    store = _store(tmp_path)
+    assert store.family_counts("o/r", 1) == {"The Apache Software License": 1, "GPL": 1, "MIT": 1}
+    assert store.family_counts("o/r", 1, risk=["high", "risky"]) == {"GPL": 1}
+
+
+def test_query_entries_filters(tmp_path):
+    store = _store(tmp_path)
+    assert [e["dependency"] for e in store.query_entries("o/r", 1, family="gpl")] == ["left-pad"]
+    assert [e["dependency"] for e in store.query_entries("o/r", 1, family="Version")] == []
+    assert [e["dependency"] for e in store.query_entries("o/r", 1, ecosystem="npm", risk="safe")] == ["lodash"]
+    assert store.risk_counts("o/r", 1) == {"unknown": 1, "high": 1, "safe": 1}
+
+
+def test_latest_scan_round_trips_entries(tmp_path):
+    scan = _store(tmp_path).latest_scan("o/r", 1, HEAD)
+    assert scan["manifests"] == {"package.json": "x"}
+    assert scan["entries"][1] == ("npm", "package.json", "left-pad", "1.3.0",
+                                  format_licenses_with_risk(["GPL-3.0"]), "DepsDev")
@@ -0,0 +1,56 @@
+import pytest
+
+from depsdev.semver import max_satisfying, is_exact, parse_version
+
+VERSIONS = ["0.0.3", "0.0.4", "0.1.0", "0.1.5", "0.2.0", "1.0.0", "1.2.0", "1.2.7", "1.3.0-beta.1",
+            "1.3.0", "1.10.0", "2.0.0-rc.1", "2.0.0", "2.1.1"]
+
+
+@pytest.mark.parametrize("range_, expected", [
+    ("^1.2.0", "1.10.0"),
+    ("~1.2.0", "1.2.7"),
+    ("^0.1.0", "0.1.5"),
+    ("^0.0.3", "0.0.3"),
+    ("1.2.x", "1.2.7"),
+    ("1", "1.10.0"),
+    ("*", "2.1.1"),
+    ("", "2.1.1"),
+    ("latest", "2.1.1"),
+    (">=1.0.0 <1.3.0", "1.2.7"),
+    (">1", "2.1.1"),
+    ("<=1.2", "1.2.7"),
+    ("1.0.0 - 1.2", "1.2.7"),
+    ("^0.2.0 || ^1.2.0", "1.10.0"),
+    ("=1.0.0", "1.0.0"),
+    ("^3.0.0", None),
+])
+def test_max_satisfying(range_, expected):
+    assert max_satisfying(VERSIONS, range_) == expected
+
+
+def test_prereleases_only_when_the_range_asks_for_them():
+    assert max_satisfying(["1.3.0-beta.1", "1.2.0"], "^1.2.0") == "1.2.0"
+    assert max_satisfying(["1.3.0-beta.1", "1.3.0-beta.2"], ">=1.3.0-beta.1") == "1.3.0-beta.2"
+
+
+def test_prereleases_match_only_on_the_tuple_the_range_names():
+    versions = ["1.3.0-beta.1", "1.3.0-beta.2", "1.4.0-alpha.1", "1.3.5"]
+    assert max_satisfying(versions, ">=1.3.0-beta.1") == "1.3.5"
+    assert max_satisfying(versions, "^1.3.0-beta.1") == "1.3.5"
+    assert max_satisfying(["1.3.0-beta.2", "1.4.0-alpha.1"], ">=1.3.0-beta.1") == "1.3.0-beta.2"
+    # A prerelease in another alternative does not open this one up.
+    assert max_satisfying(["2.0.0-rc.1", "1.2.0"], "^1.0.0 || 3.0.0-rc.1") == "1.2.0"
+
+
+def test_release_sorts_above_its_prerelease():
+    assert max_satisfying(["2.0.0-rc.1", "2.0.0"], ">=2.0.0-rc.1") == "2.0.0"
+
+
+def test_unparseable_range_is_none():
+    assert max_satisfying(VERSIONS, "github:user/repo") is None
+
+
+def test_is_exact():
+    assert is_exact("1.2.3") and is_exact("1.2.3-rc.1+build.5")
+    assert not is_exact("^1.2.3") and not is_exact("1.2")
+    assert parse_version("1.2.3-alpha.10") == (1, 2, 3, ("alpha", 10))
@@ -0,0 +1,95 @@
+import threading
+
+import pytest
+
+from depsdev import singleflight
+from depsdev.cache import license_flight_key
+from depsdev.singleflight import SingleFlight
+
+
+def test_concurrent_calls_collapse_into_one():
+    flights = SingleFlight("test")
+    release, calls, results = threading.Event(), [], []
+
+    def fetch(key):
+        calls.append(key)
+        assert release.wait(5)
+        return f"licenses of {key}"
+
+    def caller():
+        results.append(flights.do("npm:left-pad@1.3.0", fetch, "left-pad"))
+
+    threads = [threading.Thread(target=caller) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    # Wait until every follower has joined the leader's call before letting it finish.
+    for _ in range(500):
+        if flights.stats["collapsed"] == 9:
+            break
+        threading.Event().wait(0.01)
+    assert flights.in_flight("npm:left-pad@1.3.0")
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert calls == ["left-pad"]
+    assert results == ["licenses of left-pad"] * 10
+    assert flights.stats == {"calls": 1, "collapsed": 9, "errors_replayed": 0}
+    assert not flights.in_flight("npm:left-pad@1.3.0")
+
+
+def test_flight_keys_separate_lookup_options():
+    assert license_flight_key("pypi", "Zope.Interface", "6.0") == license_flight_key("pypi", "zope-interface", "6.0")
+    assert (license_flight_key("maven", "g:a", "1", use_depsdev=True)
+            != license_flight_key("maven", "g:a", "1", use_depsdev=False))
+
+
+def test_errors_are_shared_and_replayed_until_error_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(singleflight.time, "time", lambda: now[0])
+    flights = SingleFlight("test", error_ttl=30)
+    calls = []
+
+    def failing():
+        calls.append(1)
+        raise TimeoutError("registry down")
+
+    with pytest.raises(TimeoutError):
+        flights.do("k", failing)
+    now[0] += 29
+    with pytest.raises(TimeoutError):
+        flights.do("k", failing)
+    assert len(calls) == 1 and flights.stats["errors_replayed"] == 1
+
+    # Once the window passes, the next caller tries again.
+    now[0] += 2
+    assert flights.do("k", lambda: "recovered") == "recovered"
+    assert flights.do("k", lambda: "fresh") == "fresh"  # results themselves are not cached
+
+
+def test_followers_receive_the_leaders_exception():
+    flights = SingleFlight("test")
+    release, errors = threading.Event(), []
+
+    def failing():
+        assert release.wait(5)
+        raise ConnectionError("reset")
+
+    def caller():
+        try:
+            flights.do("k", failing)
+        except ConnectionError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=caller) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for _ in range(500):
+        if flights.stats["collapsed"] == 4:
+            break
+        threading.Event().wait(0.01)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(errors) == 5 and len({id(e) for e in errors}) == 1
+    assert flights.stats["calls"] == 1
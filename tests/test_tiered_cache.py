@@ -0,0 +1,105 @@
+import sqlite3
+import threading
+
+import pytest
+
+from depsdev import cache
+from depsdev.cache import TieredCache
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "cache.sqlite")
+
+
+def _accessed_at(db_path, key):
+    with sqlite3.connect(db_path) as db:
+        return db.execute("SELECT accessed_at FROM cache_entries WHERE key = ?", (key,)).fetchone()[0]
+
+
+def test_entries_expire_after_their_ttl(db_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "time", lambda: now[0])
+    tiered = TieredCache("t", db_path=db_path)
+    tiered.set("k", ["MIT"], ttl=60)
+    assert tiered.get("k") == ["MIT"]
+    now[0] += 61
+    assert tiered.get("k") is None
+    # Expired on disk too, not only in memory.
+    assert TieredCache("t", db_path=db_path).get("k") is None
+
+
+def test_disk_hit_is_promoted_to_memory(db_path):
+    TieredCache("t", db_path=db_path).set("k", {"v": 1})
+    fresh = TieredCache("t", db_path=db_path)
+    assert fresh.get("k") == {"v": 1}
+    assert fresh.get("k") == {"v": 1}
+    assert fresh.stats == {"memory_hits": 1, "disk_hits": 1, "misses": 0, "evictions": 0}
+
+
+def test_namespaces_do_not_share_entries(db_path):
+    TieredCache("a", db_path=db_path).set("k", 1)
+    assert TieredCache("b", db_path=db_path).get("k") is None
+
+
+def test_memory_lru_evicts_least_recently_used(db_path):
+    tiered = TieredCache("t", db_path=db_path, memory_max_entries=2)
+    tiered.set("a", 1)
+    tiered.set("b", 2)
+    tiered.get("a")
+    tiered.set("c", 3)
+    assert list(tiered._memory) == ["a", "c"]
+    assert tiered.stats["evictions"] == 1
+    # Evicted from memory only; the disk tier still answers.
+    assert tiered.get("b") == 2 and tiered.stats["disk_hits"] == 1
+
+
+def test_disk_eviction_drops_least_recently_accessed(db_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "time", lambda: now[0])
+    monkeypatch.setattr(cache, "TOUCH_INTERVAL", 10)
+    tiered = TieredCache("t", db_path=db_path, memory_max_entries=1, disk_max_entries=2)
+    for key in ("a", "b", "c"):
+        tiered.set(key, key)
+        now[0] += 1
+    now[0] += 20
+    assert tiered.get("a") == "a"  # disk hit, touched
+    tiered._evict_disk(now[0])
+    with sqlite3.connect(db_path) as db:
+        assert sorted(k for (k,) in db.execute("SELECT key FROM cache_entries")) == ["a", "c"]
+
+
+def test_disk_hits_touch_accessed_at_at_most_once_per_interval(db_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "time", lambda: now[0])
+    monkeypatch.setattr(cache, "TOUCH_INTERVAL", 60)
+    TieredCache("t", db_path=db_path).set("k", 1)
+    reader = TieredCache("t", db_path=db_path, memory_max_entries=0)
+    now[0] += 30
+    reader.get("k")
+    assert _accessed_at(db_path, "k") == 1000.0
+    now[0] += 60
+    reader.get("k")
+    assert _accessed_at(db_path, "k") == 1090.0
+
+
+def test_threads_use_their_own_connections(db_path):
+    tiered = TieredCache("t", db_path=db_path, memory_max_entries=10)
+    errors, connections = [], []
+
+    def worker(n):
+        try:
+            for i in range(50):
+                tiered.set(f"{n}:{i}", i)
+                assert tiered.get(f"{n}:{i}") == i
+            connections.append(tiered._conn())
+        except Exception as e:  # surfaced below
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len({id(db) for db in connections}) == 8
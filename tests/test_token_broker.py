@@ -0,0 +1,151 @@
+import os
+import stat
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import auth
+from auth import TokenBroker, _TokenStore
+
+
+@pytest.fixture
+def minted(monkeypatch):
+    """Stub GitHub's access_tokens endpoint: tokens tok-1, tok-2, ... valid for `lifetime` seconds from `now`."""
+    state = SimpleNamespace(count=0, now=10_000.0, lifetime=3600, requests=[])
+
+    def request(installation_id):
+        state.count += 1
+        state.requests.append(installation_id)
+        return f"tok-{state.count}", state.now + state.lifetime
+
+    monkeypatch.setattr(auth, "_request_installation_token", request)
+    monkeypatch.setattr(auth.time, "time", lambda: state.now)
+    return state
+
+
+@pytest.fixture
+def broker(minted, monkeypatch):
+    broker = TokenBroker()
+    broker._refresher = object()  # tests drive refresh_due() themselves
+    monkeypatch.setattr(auth, "token_broker", broker)
+    return broker
+
+
+def test_tokens_are_reused_until_the_refresh_margin(broker, minted):
+    assert broker.get(1) == "tok-1"
+    assert broker.get(1) == "tok-1"
+    minted.now += 3600 - auth.TOKEN_REFRESH_MARGIN + 1
+    assert broker.get(1) == "tok-2"
+    assert broker.stats["minted"] == 2 and broker.stats["hits"] == 1
+
+
+def test_concurrent_requests_mint_once(broker, minted):
+    tokens = []
+    threads = [threading.Thread(target=lambda: tokens.append(broker.get(7))) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert tokens == ["tok-1"] * 10 and minted.requests == [7]
+
+
+def test_refresh_ahead_renews_tokens_in_use_before_they_are_needed(broker, minted):
+    broker.get(1)
+    broker.get(2)
+    minted.now += 3600 - auth.TOKEN_REFRESH_MARGIN - auth.TOKEN_REFRESH_AHEAD + 1
+    broker._last_used[2] = minted.now - auth.TOKEN_IDLE_SECONDS - 1  # nobody asked for installation 2 lately
+    broker.refresh_due()
+    assert minted.requests == [1, 2, 1]
+    assert broker.stats["refreshed_ahead"] == 1
+    # The caller gets the renewed token without waiting on GitHub.
+    assert broker.get(1) == "tok-3"
+
+
+def test_refresh_ahead_leaves_fresh_tokens_alone(broker, minted):
+    broker.get(1)
+    broker.refresh_due()
+    assert minted.requests == [1]
+
+
+def test_renew_replaces_a_rejected_token_once(broker, minted):
+    assert broker.get(1) == "tok-1"
+    assert broker.renew("tok-1") == "tok-2"
+    # Other jobs holding the rejected token get the replacement, not another mint.
+    assert broker.renew("tok-1") == "tok-2"
+    assert broker.get(1) == "tok-2"
+    assert broker.renew("unknown") is None
+    assert broker.stats["renewed"] == 1 and minted.count == 2
+
+
+def test_invalidate_drops_the_stored_token(minted, tmp_path):
+    store = _TokenStore(str(tmp_path / "tokens.sqlite"))
+    broker = TokenBroker(store)
+    broker._refresher = object()
+    broker.get(1)
+    broker.invalidate(1)
+    assert store.get(1) is None
+    assert broker.get(1) == "tok-2"
+
+
+def test_with_installation_token_retries_once_on_401(broker, minted):
+    seen = []
+
+    class Unauthorized(Exception):
+        status = 401
+
+    def call(token):
+        seen.append(token)
+        if token == "tok-1":
+            raise Unauthorized()
+        return "ok"
+
+    assert auth.with_installation_token(1, call) == "ok"
+    assert seen == ["tok-1", "tok-2"]
+
+
+def test_with_installation_token_does_not_retry_other_errors(broker, minted):
+    calls = []
+
+    def call(token):
+        calls.append(token)
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        auth.with_installation_token(1, call)
+    assert calls == ["tok-1"]
+
+
+def test_authorized_get_renews_on_401(broker, minted, monkeypatch):
+    sent = []
+
+    class Response:
+        def __init__(self, status_code):
+            self.status_code = status_code
+            self.closed = False
+
+        def close(self):
+            self.closed = True
+
+    def get(url, headers=None, **kwargs):
+        sent.append(headers["Authorization"])
+        return Response(401 if headers["Authorization"] == "token tok-1" else 200)
+
+    monkeypatch.setattr(auth.http_client, "get", get)
+    token = broker.get(1)
+    assert auth.authorized_get("https://api.github.com/x", token).status_code == 200
+    assert sent == ["token tok-1", "token tok-2"]
+
+
+def test_token_store_is_shared_and_private(minted, tmp_path):
+    path = str(tmp_path / "tokens" / "tokens.sqlite")
+    first = TokenBroker(_TokenStore(path))
+    first._refresher = object()
+    assert first.get(1) == "tok-1"
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+    # Another worker process reads the stored token instead of minting its own.
+    second = TokenBroker(_TokenStore(path))
+    second._refresher = object()
+    assert second.get(1) == "tok-1"
+    assert minted.count == 1
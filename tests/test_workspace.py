@@ -0,0 +1,98 @@
+import io
+import os
+import threading
+import zipfile
+from types import SimpleNamespace
+
+import pytest
+
+from utils import workspace
+from utils.workspace import WorkspaceManager
+
+
+def _zipball(files, top="owner-repo-abc123"):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        for path, content in files.items():
+            zf.writestr(f"{top}/{path}", content)
+    return buffer.getvalue()
+
+
+class FakeResponse:
+    def __init__(self, body):
+        self.body = body
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.body), chunk_size):
+            yield self.body[start:start + chunk_size]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+@pytest.fixture
+def downloads(monkeypatch):
+    """Serve a zipball for every archive link and count the downloads."""
+    served = []
+
+    def authorized_get(url, access_token, headers=None, **kwargs):
+        served.append(url)
+        return FakeResponse(_zipball({"pom.xml": "<project/>"}))
+
+    monkeypatch.setattr(workspace, "authorized_get", authorized_get)
+    return served
+
+
+def _repo(name="owner/repo"):
+    return SimpleNamespace(full_name=name, get_archive_link=lambda fmt, ref: f"https://archive/{name}/{ref}")
+
+
+def test_same_sha_is_downloaded_once(tmp_path, downloads):
+    manager = WorkspaceManager(root=str(tmp_path))
+    with manager.checkout(_repo(), "abc", "token") as root:
+        assert open(os.path.join(root, "pom.xml")).read() == "<project/>"
+    with manager.checkout(_repo(), "abc", "token") as again:
+        assert again == root
+    assert downloads == ["https://archive/owner/repo/abc"]
+
+
+def test_concurrent_checkouts_of_one_sha_share_the_download(tmp_path, downloads):
+    manager = WorkspaceManager(root=str(tmp_path))
+    roots = []
+
+    def scan():
+        with manager.checkout(_repo(), "abc", "token") as root:
+            roots.append(root)
+
+    threads = [threading.Thread(target=scan) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(downloads) == 1 and len(set(roots)) == 1 and len(roots) == 6
+
+
+def test_least_recently_used_workspaces_are_evicted(tmp_path, downloads):
+    manager = WorkspaceManager(root=str(tmp_path), max_workspaces=2)
+    for sha in ("a", "b", "c"):
+        with manager.checkout(_repo(), sha, "token"):
+            pass
+    remaining = sorted(os.listdir(tmp_path))
+    assert remaining == ["owner__repo__b", "owner__repo__c"]
+
+
+def test_workspaces_in_use_are_not_evicted(tmp_path, downloads):
+    manager = WorkspaceManager(root=str(tmp_path), max_workspaces=1)
+    with manager.checkout(_repo(), "a", "token") as held:
+        with manager.checkout(_repo(), "b", "token"):
+            pass
+        with manager.checkout(_repo(), "c", "token"):
+            # "a" is the oldest but still held by the outer scan.
+            assert os.path.exists(os.path.join(held, "pom.xml"))
+    assert "owner__repo__a" in os.listdir(tmp_path)
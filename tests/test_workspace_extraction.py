@@ -0,0 +1,105 @@
+import io
+import os
+import zipfile
+from types import SimpleNamespace
+
+import pytest
+
+from utils import workspace
+from utils.workspace import WorkspaceManager, WorkspaceBudgetExceeded
+
+TOP = "owner-repo-abc123"
+
+
+class FakeResponse:
+    def __init__(self, body):
+        self.body = body
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.body), chunk_size):
+            yield self.body[start:start + chunk_size]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+@pytest.fixture
+def serve(monkeypatch):
+    """serve({name: content}) makes the next download return a zipball with those raw entry names."""
+    archive = {}
+
+    def set_entries(entries):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as zf:
+            for name, content in entries.items():
+                zf.writestr(name, content)
+        archive["body"] = buffer.getvalue()
+
+    monkeypatch.setattr(workspace, "authorized_get", lambda url, token, headers=None, **kw: FakeResponse(archive["body"]))
+    return set_entries
+
+
+def _checkout(tmp_path):
+    repo = SimpleNamespace(full_name="owner/repo", get_archive_link=lambda fmt, ref: "https://archive")
+    return WorkspaceManager(root=str(tmp_path / "ws")).checkout(repo, "abc", "token")
+
+
+def _files(root):
+    return sorted(os.path.relpath(os.path.join(d, f), root) for d, _, files in os.walk(root) for f in files)
+
+
+def test_only_build_files_are_extracted(tmp_path, serve):
+    serve({
+        f"{TOP}/pom.xml": "<project/>",
+        f"{TOP}/.mvn/maven.config": "-Drevision=1",
+        f"{TOP}/mvnw": "#!/bin/sh",
+        f"{TOP}/web/package.json": "{}",
+        f"{TOP}/src/main/java/App.java": "class App {}",
+        f"{TOP}/docs/big.bin": b"\0" * 10000,
+    })
+    with _checkout(tmp_path) as root:
+        assert _files(root) == [".mvn/maven.config", "mvnw", "pom.xml", "web/package.json"]
+
+
+def test_archive_budget(tmp_path, serve, monkeypatch):
+    serve({f"{TOP}/pom.xml": "<project/>", f"{TOP}/blob.bin": os.urandom(4096)})
+    monkeypatch.setattr(workspace, "MAX_ARCHIVE_BYTES", 1024)
+    monkeypatch.setattr(workspace, "DOWNLOAD_CHUNK_BYTES", 256)
+    with pytest.raises(WorkspaceBudgetExceeded, match="archive"):
+        with _checkout(tmp_path):
+            pass
+    # Nothing half-written is left for the next scan to reuse.
+    assert os.listdir(tmp_path / "ws") == []
+
+
+def test_extracted_bytes_budget_counts_build_files_only(tmp_path, serve, monkeypatch):
+    monkeypatch.setattr(workspace, "MAX_EXTRACTED_BYTES", 100)
+    serve({f"{TOP}/pom.xml": "x" * 50, f"{TOP}/src/huge.txt": "y" * 1000})
+    with _checkout(tmp_path) as root:
+        assert _files(root) == ["pom.xml"]
+
+    serve({f"{TOP}/pom.xml": "x" * 60, f"{TOP}/sub/pom.xml": "x" * 60})
+    with pytest.raises(WorkspaceBudgetExceeded, match="build files"):
+        with WorkspaceManager(root=str(tmp_path / "other")).checkout(
+                SimpleNamespace(full_name="owner/repo", get_archive_link=lambda fmt, ref: "x"), "def", "token"):
+            pass
+
+
+def test_zip_slip_entries_are_skipped(tmp_path, serve):
+    serve({
+        f"{TOP}/pom.xml": "<project/>",
+        f"{TOP}/../../evil/pom.xml": "<evil/>",
+        "/abs/pom.xml": "<evil/>",
+        f"{TOP}/..\\..\\pom.xml": "<evil/>",
+    })
+    with _checkout(tmp_path) as root:
+        assert _files(root) == ["pom.xml"]
+        assert open(os.path.join(root, "pom.xml")).read() == "<project/>"
+    assert not (tmp_path / "evil").exists()
+    assert sorted(os.listdir(tmp_path / "ws")) == ["owner__repo__abc"]
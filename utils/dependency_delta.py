@@ -0,0 +1,112 @@
+import os
+from typing import Dict, Tuple
+
+from depsdev.cache import normalize_name
+from utils.dependency_scanner import scan_manifests
+from utils.manifest_discovery import discover_manifests, match_manifest, is_build_config
+from utils.scan_store import scan_store
+
+# The compare API lists at most 300 files; beyond that the file list can't be trusted to be complete.
+COMPARE_FILE_LIMIT = 300
+
+# Both sides of the delta come from scan entries (see scan_manifests), so a pom's
+# row lists the same resolved dependencies as the report below it.
+
+
+def _affected(manifest_paths, changed_paths):
+    """
+    Manifest paths whose dependencies a change to `changed_paths` can alter, or
+    every manifest when `changed_paths` is None: any pom or .mvn/ change re-resolves
+    all poms, and a lockfile change alters how its sibling manifests are read.
+    """
+    if changed_paths is None:
+        return set(manifest_paths)
+    maven_changed = any(match_manifest(p) == "maven" or is_build_config(p) for p in changed_paths)
+    changed_dirs = {(match_manifest(p), os.path.dirname(p)) for p in changed_paths if match_manifest(p)}
+    return {
+        path for path in manifest_paths
+        if (maven_changed if match_manifest(path) == "maven"
+            else (match_manifest(path), os.path.dirname(path)) in changed_dirs)
+    }
+
+
+def _versions_by_name(entries) -> Dict[Tuple[str, str, str], Tuple[str, str, str]]:
+    # (ecosystem, path, name) -> (name as written, versions, license); lockfiles may list several versions.
+    versions = {}
+    for ecosystem, path, name, version, license_with_risk, _ in entries:
+        key = (ecosystem, path, normalize_name(ecosystem, name))
+        item = versions.setdefault(key, [name, set(), license_with_risk])
+        item[1].add(version)
+        item[2] = license_with_risk
+    return {key: (name, ", ".join(sorted(v)), license_with_risk) for key, (name, v, license_with_risk) in versions.items()}
+
+
+def _entries_at(repo, sha: str, changed_paths, access_token: str, maven_resolver=None):
+    """Scan entries at commit `sha` for the manifests `changed_paths` affects: a stored scan if there is one."""
+    stored = scan_store.scan_of_commit(repo.full_name, sha)
+    if stored:
+        print(f"♻️ Reusing stored scan of {sha[:7]} for the dependency delta")
+        affected = _affected(set(stored["manifests"]), changed_paths)
+        return [e for e in stored["entries"] if e[1] in affected]
+    manifests = discover_manifests(repo, sha)
+    affected = _affected([m.path for m in manifests], changed_paths)
+    selected = [m for m in manifests if m.path in affected]
+    if not selected:
+        return []
+    return scan_manifests(repo, selected, sha, access_token, maven_resolver, manifests.build_files)
+
+
+def compute_dependency_delta(repo, base_sha: str, head_sha: str, head_entries, access_token: str,
+                             maven_resolver=None):
+    """
+    Added / changed / removed dependencies in the manifests the PR touches, against
+    the merge base with the base branch (what the PR itself changes, not what landed
+    on the base branch since). `head_entries` is the head scan; only the merge-base
+    side is scanned here. Returns rows of
+    (change, ecosystem, file_path, dependency, base_version, head_version, license_with_risk).
+    """
+    comparison = repo.compare(base_sha, head_sha)
+    merge_base = comparison.merge_base_commit.sha
+    files = list(comparison.files)
+    if len(files) >= COMPARE_FILE_LIMIT:
+        print(f"⚠️ Compare lists {len(files)} files (the API's limit), diffing every manifest")
+        changed_paths = None
+    else:
+        changed_paths = {f.filename for f in files} | {f.previous_filename for f in files if f.previous_filename}
+        if not any(match_manifest(p) or is_build_config(p) for p in changed_paths):
+            print("🔀 Dependency delta against base: no manifest changed")
+            return []
+
+    base_entries = _entries_at(repo, merge_base, changed_paths, access_token, maven_resolver)
+    head_paths = _affected({e[1] for e in head_entries}, changed_paths)
+    base = _versions_by_name(base_entries)
+    head = _versions_by_name([e for e in head_entries if e[1] in head_paths])
+
+    rows = []
+    for key, (name, version, license_with_risk) in head.items():
+        ecosystem, path, _ = key
+        if key not in base:
+            rows.append(("added", ecosystem, path, name, "", version, license_with_risk))
+        elif base[key][1] != version:
+            rows.append(("changed", ecosystem, path, name, base[key][1], version, license_with_risk))
+    for key, (name, version, _) in base.items():
+        ecosystem, path, _ = key
+        if key not in head:
+            rows.append(("removed", ecosystem, path, name, version, "", ""))
+    print(f"🔀 Dependency delta against {merge_base[:7]}: {len(rows)} change(s)")
+    return rows
+
+
+def render_dependency_delta(rows, base_ref: str) -> str:
+    lines = [f"\n### 🔀 Dependency Changes vs `{base_ref}`\n"]
+    if not rows:
+        lines.append("_No dependency changes in this PR._")
+        return "\n".join(lines)
+
+    icons = {"added": "➕ Added", "changed": "🔄 Changed", "removed": "➖ Removed"}
+    lines.append("| Change | File Path | Dependency | Base Version | Head Version | License (with Risk) |")
+    lines.append("|:-------|:----------|:-----------|:-------------|:-------------|:--------------------|")
+    # Only added and changed dependencies ship with the PR, so only they show a license.
+    for change, ecosystem, path, name, base, head, license_with_risk in rows:
+        lines.append(f"| {icons[change]} | `{path}` | {name} | {base or '—'} | {head or '—'} | {license_with_risk} |")
+    return "\n".join(lines)
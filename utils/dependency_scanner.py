@@ -1,23 +1,44 @@
 import os
-import io
-import uuid
-import zipfile
-import shutil
 import glob
-import requests
+import hashlib
+import time
+from contextlib import ExitStack
 from datetime import datetime
 from pytz import timezone
-import pandas as pd
-import pyarrow as pa
-import pyarrow.parquet as pq
 
-from utils.risk_classifier import format_licenses_with_risk, get_risk_sort_weight
-from parsers.maven_parser import parse_pom_xml_via_maven
-from parsers.python_parser import parse_requirements_txt
-from parsers.node_parser import parse_package_json
-from depsdev.maven import query_maven_license
-from depsdev.pypi import query_pypi_license
-from depsdev.npm import query_npm_license
+from utils.risk_classifier import format_licenses_with_risk
+from parsers.maven_parser import parse_pom_xml_via_maven, parse_maven_reactor, find_reactor_roots
+from parsers.maven_resolver import MavenResolver
+from parsers.python_parser import parse_requirements_txt, PYTHON_PARSERS, PYTHON_LOCKFILES
+from parsers.node_parser import parse_package_json, LOCKFILE_PARSERS
+from utils.license_resolver import resolve_licenses
+from utils.manifest_discovery import discover_manifests, read_manifest, stream_manifest
+from utils.workspace import workspaces
+from depsdev.cache import license_cache, TieredCache
+from utils.scan_scheduler import raise_if_cancelled, record_scan_cost
+
+MAVEN_REACTOR_MODE = os.getenv("MAVEN_REACTOR_MODE", "true").lower() != "false"
+# "mvn" shells out to Maven; "python" uses the in-process parsers.maven_resolver.
+MAVEN_RESOLVER = os.getenv("MAVEN_RESOLVER", "mvn")
+# Per-repository choice for webhook scans, e.g. MAVEN_RESOLVER_BY_REPO="acme/monorepo=python,acme/legacy=mvn".
+MAVEN_RESOLVER_BY_REPO = {}
+for _pair in filter(None, os.getenv("MAVEN_RESOLVER_BY_REPO", "").split(",")):
+    _repo, _, _resolver = _pair.partition("=")
+    if _repo.strip() and _resolver.strip() in ("mvn", "python"):
+        MAVEN_RESOLVER_BY_REPO[_repo.strip().lower()] = _resolver.strip()
+
+# Parsed dependencies per manifest, keyed by content so identical manifests hit the
+# same entry across branches, forks and repos. Only (name, version) pairs are stored:
+# licenses come from the license cache and risk is classified at render time, so
+# changes to either never leave a stale report behind.
+# Bump SCAN_CACHE_VERSION whenever a parser or resolver changes its output.
+SCAN_CACHE_VERSION = "2"
+manifest_cache = TieredCache(
+    "manifest_scans",
+    memory_max_entries=int(os.getenv("MANIFEST_CACHE_MEMORY_ENTRIES", "500")),
+    disk_max_entries=int(os.getenv("MANIFEST_CACHE_DISK_ENTRIES", "20000")),
+    default_ttl=int(os.getenv("MANIFEST_CACHE_TTL", str(7 * 24 * 3600))),
+)
 
 
 def get_est_timestamp():
@@ -27,88 +48,163 @@ def get_est_timestamp():
     return now_est.strftime("%Y-%m-%d %I:%M %p EST")
 
 
-def scan_dependencies_and_render_markdown(repo, branch_name, access_token):
+def maven_resolver_for(repo_full_name: str) -> str:
+    return MAVEN_RESOLVER_BY_REPO.get(repo_full_name.lower(), MAVEN_RESOLVER)
 
-    cache_dir = "./cache"
-    os.makedirs(cache_dir, exist_ok=True)
-    cache_key = repo.full_name.replace("/", "__")
-    cache_file = os.path.join(cache_dir, f"{cache_key}.parquet")
 
-    if repo.full_name.endswith("spring-data-jpa") and os.path.exists(cache_file):
-        print(f"⚡ Using prebuilt cache from: {cache_file}")
-        df = pd.read_parquet(cache_file)
-        risky_entries = df[["file_path", "dependency", "version", "license_with_risk", "source"]].values.tolist()
-        markdown = df.iloc[0]["markdown"]
-        return risky_entries, markdown
+def manifest_cache_key(manifest, manifests, maven_resolver: str, build_files: dict = None) -> str:
+    key = f"v{SCAN_CACHE_VERSION}:{manifest.ecosystem}:{manifest.name}:{manifest.sha}"
+    if manifest.ecosystem == "maven":
+        # Poms resolve together (parents, reactor siblings, BOMs), so every pom in the tree is part of the key,
+        # as is the .mvn/ config (maven.config properties, extensions) both resolvers read.
+        poms = "\n".join(sorted(
+            [f"{m.path}={m.sha}" for m in manifests if m.ecosystem == "maven"]
+            + [f"{path}={sha}" for path, sha in (build_files or {}).items()]
+        ))
+        key += f":{maven_resolver}:{manifest.path}:{hashlib.sha256(poms.encode()).hexdigest()}"
+    return key
 
-    maven_entries, python_entries, node_entries, risky_entries = [], [], [], []
-    files_to_process, files_to_process_paths = [], set()
-
-    contents = repo.get_contents("", ref=branch_name)
-    queue = contents if isinstance(contents, list) else [contents]
-    while queue:
-        item = queue.pop(0)
-        if item.type == "dir":
-            queue.extend(repo.get_contents(item.path, ref=branch_name))
-        elif item.name in ["pom.xml", "requirements.txt", "package.json"]:
-            if item.path not in files_to_process_paths:
-                files_to_process.append(item)
-                files_to_process_paths.add(item.path)
-
-    for file in files_to_process:
-        try:
-            if file.name == "pom.xml":
-                archive_url = repo.get_archive_link("zipball", ref=branch_name)
-                headers = {"Authorization": f"token {access_token}"}
-                zip_resp = requests.get(archive_url, headers=headers)
-                zip_file = zipfile.ZipFile(io.BytesIO(zip_resp.content))
-
-                tmp_dir = f"/tmp/repo_{uuid.uuid4().hex}"
-                os.makedirs(tmp_dir, exist_ok=True)
-                zip_file.extractall(tmp_dir)
-
-                extracted_dir = next(os.path.join(tmp_dir, d) for d in os.listdir(tmp_dir))
-                relative_path = os.path.dirname(file.path)
-                module_dir = os.path.join(extracted_dir, relative_path)
-
-                pom_deps = parse_pom_xml_via_maven(module_dir)
-                shutil.rmtree(tmp_dir)
-
-                for group_artifact, version in pom_deps:
-                    licenses, source = query_maven_license(group_artifact, version)
-                    license_with_risk = format_licenses_with_risk(licenses)
-                    maven_entries.append((file.path, group_artifact, version, license_with_risk, source))
-                    if "⚠️" in license_with_risk or "🔥" in license_with_risk:
-                        risky_entries.append((file.path, group_artifact, version, license_with_risk, source))
-
-            elif file.name == "requirements.txt":
-                deps = parse_requirements_txt(file.decoded_content.decode())
-                for package, version in deps:
-                    licenses, source = query_pypi_license(package, version)
-                    license_with_risk = format_licenses_with_risk(licenses)
-                    python_entries.append((file.path, package, version, license_with_risk, source))
-                    if "⚠️" in license_with_risk or "🔥" in license_with_risk:
-                        risky_entries.append((file.path, package, version, license_with_risk, source))
-
-            elif file.name == "package.json":
-                deps = parse_package_json(file.decoded_content.decode())
-                for package, version in deps:
-                    licenses, source = query_npm_license(package, version)
-                    license_with_risk = format_licenses_with_risk(licenses)
-                    node_entries.append((file.path, package, version, license_with_risk, source))
-                    if "⚠️" in license_with_risk or "🔥" in license_with_risk:
-                        risky_entries.append((file.path, package, version, license_with_risk, source))
-
-        except Exception as e:
-            print(f"⚠️ Error processing {file.path}: {e}")
+
+def _superseded_by_lockfile(file, manifests) -> bool:
+    # A lockfile gives exact versions for the whole tree, so it replaces the ranges declared next to it.
+    if file.ecosystem == "npm" and file.name == "package.json":
+        lockfiles = LOCKFILE_PARSERS
+    elif file.ecosystem == "pypi" and file.name == "pyproject.toml":
+        lockfiles = PYTHON_LOCKFILES
+    else:
+        return False
+    directory = os.path.dirname(file.path)
+    return any(
+        other.ecosystem == file.ecosystem and other.name in lockfiles and os.path.dirname(other.path) == directory
+        for other in manifests
+    )
+
+
+def scan_manifests(repo, manifests, ref, access_token, maven_resolver=None, build_files=None):
+    """
+    Parse `manifests` at commit `ref` and resolve every dependency's license.
+    Manifests already parsed under the same content key are read from the manifest cache;
+    `build_files` (.mvn/ path -> blob SHA) defaults to the one discover_manifests attached.
+    Returns entries of (ecosystem, file_path, dependency, version, license_with_risk, source), in scan order.
+    """
+    maven_resolver = maven_resolver or MAVEN_RESOLVER
+    if build_files is None:
+        build_files = getattr(manifests, "build_files", None)
+    scanned = []
+    for file in manifests:
+        if _superseded_by_lockfile(file, manifests):
+            print(f"🔒 Using lockfile instead of {file.path}")
+        else:
+            scanned.append(file)
+
+    deps_by_path = {}
+    cache_keys = {file.path: manifest_cache_key(file, manifests, maven_resolver, build_files) for file in scanned}
+    for file in scanned:
+        deps = manifest_cache.get(cache_keys[file.path])
+        if deps is not None:
+            deps_by_path[file.path] = [tuple(dep) for dep in deps]
+    files_to_process = [file for file in scanned if file.path not in deps_by_path]
+    print(f"🗃️ Manifest cache: {len(deps_by_path)} of {len(scanned)} manifest(s) cached")
+
+    # Parse every uncached manifest first, then resolve all licenses in one concurrent pass.
+    with ExitStack() as stack:
+        repo_dir = None
+        if any(file.ecosystem == "maven" for file in files_to_process):
+            try:
+                repo_dir = stack.enter_context(workspaces.checkout(repo, ref, access_token))
+            except Exception as e:
+                print(f"⚠️ Could not prepare workspace for {repo.full_name}@{ref}: {e}")
+
+        python_resolver = MavenResolver(repo_dir) if repo_dir is not None and maven_resolver == "python" else None
+
+        # One mvn invocation per reactor; modules it could not resolve fall back to per-module runs.
+        reactor_deps = {}
+        if repo_dir is not None and python_resolver is None and MAVEN_REACTOR_MODE:
+            pom_paths = [file.path for file in files_to_process if file.ecosystem == "maven"]
+            for aggregator_pom in find_reactor_roots(repo_dir, pom_paths):
+                reactor_deps.update(parse_maven_reactor(repo_dir, aggregator_pom))
+
+        deps_by_key = {}  # identical manifests in one tree are parsed once
+        for file in files_to_process:
+            raise_if_cancelled()
+            if cache_keys[file.path] in deps_by_key:
+                deps_by_path[file.path] = deps_by_key[cache_keys[file.path]]
+                continue
+            try:
+                if file.ecosystem == "maven":
+                    if repo_dir is None:
+                        continue
+                    if python_resolver is not None:
+                        deps = python_resolver.resolve(file.path)
+                    else:
+                        deps = reactor_deps.get(file.path)
+                    if deps is None:
+                        module_dir = os.path.join(repo_dir, os.path.dirname(file.path))
+                        deps = parse_pom_xml_via_maven(module_dir)
+
+                elif file.ecosystem == "pypi":
+                    parser = PYTHON_PARSERS.get(file.name, parse_requirements_txt)
+                    deps = parser(read_manifest(repo, file))
+
+                elif file.ecosystem == "npm" and file.name in LOCKFILE_PARSERS:
+                    with stream_manifest(repo, file, access_token) as stream:
+                        deps = LOCKFILE_PARSERS[file.name](stream)
+
+                elif file.ecosystem == "npm":
+                    deps = parse_package_json(read_manifest(repo, file))
+
+                else:
+                    continue
+
+            except Exception as e:
+                print(f"⚠️ Error processing {file.path}: {e}")
+                continue
+
+            deps_by_path[file.path] = deps_by_key[cache_keys[file.path]] = list(deps)
+            # An empty Maven result usually means mvn failed; don't pin that for a week.
+            if deps or file.ecosystem != "maven":
+                manifest_cache.set(cache_keys[file.path], deps_by_path[file.path])
+
+    raise_if_cancelled()
+    parsed = [
+        (file.ecosystem, file.path, name, version)
+        for file in scanned for name, version in deps_by_path.get(file.path, [])
+    ]
+    resolved = resolve_licenses([(ecosystem, name, version) for ecosystem, _, name, version in parsed])
+    entries = [
+        (ecosystem, path, name, version, format_licenses_with_risk(licenses), source)
+        for (ecosystem, path, name, version), (licenses, source) in zip(parsed, resolved)
+    ]
+
+    print(f"📊 License cache: {license_cache.stats} (hit rate {license_cache.hit_rate():.0%})")
 
     for f in glob.glob("/tmp/output*.txt"):
         try:
             os.remove(f)
-        except:
+        except OSError:
             pass
 
-    comment_lines = []
+    return entries
+
+
+def is_risky(license_with_risk: str) -> bool:
+    return "⚠️" in license_with_risk or "🔥" in license_with_risk
+
+
+def render_scan_markdown(entries, header_sections=()):
+    """
+    Render scan entries (see scan_manifests) as the check-run markdown.
+    Returns (risky_entries, markdown); risky entries are (file_path, dependency, version, license_with_risk, source).
+    `header_sections` are markdown blocks placed above the tables.
+    """
+    maven_entries, python_entries, node_entries, risky_entries = [], [], [], []
+    entries_by_ecosystem = {"maven": maven_entries, "pypi": python_entries, "npm": node_entries}
+    for ecosystem, path, name, version, license_with_risk, source in entries:
+        entries_by_ecosystem[ecosystem].append((path, name, version, license_with_risk, source))
+        if is_risky(license_with_risk):
+            risky_entries.append((path, name, version, license_with_risk, source))
+
+    comment_lines = list(header_sections)
     all_risks = [entry[3] for entry in maven_entries + python_entries + node_entries]
 
     if all(all("✅" in part for part in risk.split(",")) for risk in all_risks):
@@ -147,19 +243,14 @@ def scan_dependencies_and_render_markdown(repo, branch_name, access_token):
 
     comment_lines.append(f"\n---\n_Last updated: {get_est_timestamp()}_")
 
-    rows = []
-    for path, dep, ver, license_with_risk, source in risky_entries:
-        rows.append({
-            "file_path": path,
-            "dependency": dep,
-            "version": ver,
-            "license_with_risk": license_with_risk,
-            "source": source,
-            "markdown": "\n".join(comment_lines)
-        })
-
-    df = pd.DataFrame(rows)
-    pq.write_table(pa.Table.from_pandas(df), cache_file)
-    print(f"💾 Cached scan written to: {cache_file}")
-
-    return risky_entries, "\n".join(comment_lines)
\ No newline at end of file
+    return risky_entries, "\n".join(comment_lines)
+
+
+def scan_dependencies_and_render_markdown(repo, branch_name, access_token, head_sha=None, maven_resolver=None):
+    # Pin the scan to a commit so discovery, archive and caches all agree.
+    ref = head_sha or repo.get_branch(branch_name).commit.sha
+    started = time.time()
+    manifests = discover_manifests(repo, ref)
+    entries = scan_manifests(repo, manifests, ref, access_token, maven_resolver)
+    record_scan_cost(repo.full_name, len(manifests), len(entries), time.time() - started)
+    return render_scan_markdown(entries)
@@ -0,0 +1,296 @@
+import os
+import time
+import hashlib
+import random
+import threading
+import weakref
+from collections import deque
+from typing import Optional
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+
+# Shared HTTP layer for every outbound call: one keep-alive Session per host,
+# explicit timeouts, jittered retries, and a per-host, per-credential budget fed by Retry-After
+# and GitHub's X-RateLimit-* headers. PyGithub and the OpenAI SDK manage their own
+# connections and are not routed through here.
+
+# Max in-flight requests per host, so concurrent scans stay polite to each registry.
+# Override with e.g. HTTP_HOST_LIMITS="api.deps.dev=32,pypi.org=8".
+HOST_LIMITS = {
+    "api.deps.dev": 16,
+    "pypi.org": 8,
+    "registry.npmjs.org": 16,
+    "repo1.maven.org": 8,
+    "repo.spring.io": 4,
+    "api.github.com": 4,
+}
+DEFAULT_HOST_LIMIT = 4
+
+for _pair in filter(None, os.getenv("HTTP_HOST_LIMITS", "").split(",")):
+    _host, _, _limit = _pair.partition("=")
+    if _limit.strip().isdigit():
+        HOST_LIMITS[_host.strip()] = int(_limit)
+
+CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "30"))
+MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "0.5"))
+BACKOFF_MAX = 20.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Longest we'll hold a request back for Retry-After or an exhausted rate limit;
+# past that the request goes out and the caller sees the 403/429.
+MAX_BUDGET_WAIT = float(os.getenv("HTTP_MAX_BUDGET_WAIT", "60"))
+# Below this many remaining calls, GitHub requests are paced evenly until the reset.
+RATE_LIMIT_RESERVE = int(os.getenv("HTTP_RATE_LIMIT_RESERVE", "100"))
+LATENCY_SAMPLES = 500
+MAX_BUDGETS = 1000
+
+_semaphores = {}
+_sessions = {}
+_budgets = {}
+_latency = {}
+_registry_lock = threading.Lock()
+
+
+def _host(url: str) -> str:
+    return urlparse(url).hostname or ""
+
+
+def host_slot(url: str) -> threading.BoundedSemaphore:
+    host = _host(url)
+    with _registry_lock:
+        sem = _semaphores.get(host)
+        if sem is None:
+            sem = threading.BoundedSemaphore(HOST_LIMITS.get(host, DEFAULT_HOST_LIMIT))
+            _semaphores[host] = sem
+    return sem
+
+
+def session_for(url: str) -> requests.Session:
+    host = _host(url)
+    with _registry_lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = requests.Session()
+            # Sized to the host's slot count: a connection is only in use while its request holds
+            # a slot (streamed responses hold it until closed), so the pool never outgrows its size.
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=HOST_LIMITS.get(host, DEFAULT_HOST_LIMIT))
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers["Accept-Encoding"] = "gzip, deflate"
+            _sessions[host] = session
+    return session
+
+
+class HostBudget:
+    """
+    Token bucket per (host, credential). Unlimited until the server tells us otherwise: Retry-After
+    blocks the host until the given time, and a low X-RateLimit-Remaining turns on a
+    refill rate that spreads the remaining calls evenly until X-RateLimit-Reset.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.blocked_until = 0.0
+        self.rate = None  # tokens per second; None means unlimited
+        self.tokens = 1.0
+        self.updated_at = time.time()
+
+    def acquire(self):
+        waited = 0.0
+        while True:
+            taken = False
+            with self._lock:
+                now = time.time()
+                if now < self.blocked_until:
+                    wait = self.blocked_until - now
+                elif self.rate is None:
+                    return waited
+                else:
+                    # Take the token now and sleep off any shortfall: callers queue up one refill
+                    # interval apart, and no re-check after sleeping can come up a rounding error short.
+                    self.tokens = min(1.0, self.tokens + (now - self.updated_at) * self.rate) - 1.0
+                    self.updated_at = now
+                    wait = -self.tokens / self.rate
+                    taken = True
+            wait = min(wait, MAX_BUDGET_WAIT - waited)
+            if wait > 0:
+                time.sleep(wait)
+                waited += wait
+            if taken or wait <= 0:
+                return waited
+
+    def observe(self, response: requests.Response):
+        now = time.time()
+        with self._lock:
+            retry_after = _retry_after_seconds(response)
+            if retry_after is not None and response.status_code in (403, 429, 503):
+                self.blocked_until = max(self.blocked_until, now + retry_after)
+
+            remaining = response.headers.get("X-RateLimit-Remaining")
+            reset = response.headers.get("X-RateLimit-Reset")
+            if remaining is None or reset is None or not remaining.isdigit():
+                return
+            remaining, reset = int(remaining), float(reset)
+            if remaining == 0:
+                self.blocked_until = max(self.blocked_until, reset)
+            if remaining < RATE_LIMIT_RESERVE and reset > now:
+                self.rate = max(remaining, 1) / (reset - now)
+                self.tokens = min(self.tokens, 1.0)
+                self.updated_at = now
+            else:
+                self.rate = None
+
+
+def _retry_after_seconds(response: requests.Response):
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _credential(headers) -> Optional[str]:
+    # Rate limits belong to a credential, not a host: GitHub counts each installation token
+    # (and the anonymous per-IP quota) separately. Keyed by a digest, not the token itself.
+    authorization = (headers or {}).get("Authorization")
+    return hashlib.sha256(authorization.encode()).hexdigest()[:16] if authorization else None
+
+
+def _budget(host: str, credential: Optional[str] = None) -> HostBudget:
+    with _registry_lock:
+        if len(_budgets) > MAX_BUDGETS:
+            # Installation tokens rotate hourly; forget budgets that no longer hold anything back.
+            now = time.time()
+            for key in [k for k, b in _budgets.items() if b.rate is None and b.blocked_until <= now]:
+                del _budgets[key]
+        return _budgets.setdefault((host, credential), HostBudget())
+
+
+def _record(host: str, seconds: float, status=None, retried=False, waited=0.0):
+    with _registry_lock:
+        stats = _latency.setdefault(host, {
+            "requests": 0, "errors": 0, "retries": 0, "budget_wait_seconds": 0.0,
+            "status": {}, "samples": deque(maxlen=LATENCY_SAMPLES),
+        })
+        stats["requests"] += 1
+        stats["samples"].append(seconds)
+        stats["budget_wait_seconds"] += waited
+        if retried:
+            stats["retries"] += 1
+        if status is None:
+            stats["errors"] += 1
+        else:
+            stats["status"][status] = stats["status"].get(status, 0) + 1
+
+
+def latency_stats() -> dict:
+    """Per-host request counts, status codes, retries and latency percentiles (seconds)."""
+    report = {}
+    with _registry_lock:
+        items = [(host, dict(stats, samples=sorted(stats["samples"]), status=dict(stats["status"])))
+                 for host, stats in _latency.items()]
+    for host, stats in items:
+        samples = stats["samples"]
+        pick = lambda q: round(samples[min(len(samples) - 1, int(len(samples) * q))], 3) if samples else 0.0
+        report[host] = {
+            "requests": stats["requests"],
+            "errors": stats["errors"],
+            "retries": stats["retries"],
+            "status": stats["status"],
+            "budget_wait_seconds": round(stats["budget_wait_seconds"], 3),
+            "p50": pick(0.5),
+            "p95": pick(0.95),
+            "max": round(samples[-1], 3) if samples else 0.0,
+        }
+    return report
+
+
+def _hold_until_closed(response: requests.Response, slot: threading.BoundedSemaphore):
+    # A streamed body is still being read off its connection after request() returns,
+    # so the host slot is released when the response is closed (or collected), not before.
+    lock, held = threading.Lock(), [True]
+
+    def release():
+        with lock:
+            if not held[0]:
+                return
+            held[0] = False
+        slot.release()
+
+    close = response.close
+
+    def close_and_release():
+        try:
+            close()
+        finally:
+            release()
+
+    response.close = close_and_release
+    weakref.finalize(response, release)
+
+
+def _backoff(attempt: int) -> float:
+    # Full jitter: spreads retries from concurrent scans instead of synchronising them.
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+def request(method: str, url: str, idempotent: bool = None, **kwargs) -> requests.Response:
+    """
+    Send a request through the shared per-host session. GET/HEAD are retried on
+    connection errors and 429/5xx; pass idempotent=True to retry other methods.
+    With stream=True the host slot stays taken until the response is closed.
+    """
+    host = _host(url)
+    kwargs.setdefault("timeout", (CONNECT_TIMEOUT, READ_TIMEOUT))
+    retryable = idempotent if idempotent is not None else method.upper() in ("GET", "HEAD")
+    session = session_for(url)
+    budget = _budget(host, _credential(kwargs.get("headers")))
+    slot = host_slot(url)
+
+    attempt = 0
+    while True:
+        waited = budget.acquire()
+        started = time.time()
+        slot.acquire()
+        try:
+            response = session.request(method, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            slot.release()
+            _record(host, time.time() - started, retried=attempt > 0, waited=waited)
+            if not retryable or attempt >= MAX_RETRIES:
+                raise
+            delay = _backoff(attempt)
+            print(f"🔁 {method} {host} failed ({e.__class__.__name__}), retrying in {delay:.1f}s")
+        except BaseException:
+            slot.release()
+            raise
+        else:
+            if kwargs.get("stream"):
+                _hold_until_closed(response, slot)
+            else:
+                slot.release()
+            _record(host, time.time() - started, response.status_code, retried=attempt > 0, waited=waited)
+            budget.observe(response)
+            if response.status_code not in RETRY_STATUSES or not retryable or attempt >= MAX_RETRIES:
+                return response
+            retry_after = _retry_after_seconds(response)
+            delay = min(retry_after, MAX_BUDGET_WAIT) if retry_after is not None else _backoff(attempt)
+            print(f"🔁 {method} {host} returned {response.status_code}, retrying in {delay:.1f}s")
+            response.close()
+        time.sleep(delay)
+        attempt += 1
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request("POST", url, **kwargs)
@@ -0,0 +1,121 @@
+import os
+import time
+from typing import NamedTuple
+
+from utils.dependency_delta import compute_dependency_delta, render_dependency_delta, COMPARE_FILE_LIMIT
+from utils.dependency_scanner import scan_manifests, render_scan_markdown, is_risky
+from utils.manifest_discovery import discover_manifests, match_manifest
+from utils.scan_scheduler import raise_if_cancelled, record_scan_cost
+from utils.scan_store import scan_store
+
+INCREMENTAL_SCAN = os.getenv("INCREMENTAL_SCAN", "true").lower() != "false"
+
+
+class PullRequestScan(NamedTuple):
+    entries: list  # scan_manifests tuples
+    risky_entries: list
+    markdown: str
+    manifests: dict  # manifest path -> blob SHA
+    reused: bool  # True when the previous scan was reused without scanning
+
+
+def _affects_dependencies(path: str) -> bool:
+    return bool(match_manifest(path)) or path.startswith(".mvn/") or "/.mvn/" in path
+
+
+def _changed_since(repo, previous_head: str, head_sha: str):
+    """
+    Paths changed between two heads of the PR, or None when that can't be told
+    cheaply (force push, history rewritten, or too many files for one compare).
+    """
+    try:
+        comparison = repo.compare(previous_head, head_sha)
+    except Exception as e:
+        print(f"⚠️ Could not compare {previous_head[:7]}...{head_sha[:7]}: {e}")
+        return None
+    if comparison.status not in ("ahead", "identical"):
+        print(f"↪️ Head is {comparison.status} of the last scan, falling back to manifest diff")
+        return None
+    files = list(comparison.files)
+    if len(files) >= COMPARE_FILE_LIMIT:
+        return None
+    paths = set()
+    for changed in files:
+        paths.add(changed.filename)
+        if changed.previous_filename:
+            paths.add(changed.previous_filename)
+    return paths
+
+
+def _manifests_to_rescan(manifests, previous_shas: dict, changed_paths):
+    current = {m.path for m in manifests}
+    changed = {m.path for m in manifests if previous_shas.get(m.path) != m.sha}
+    changed.update(path for path in previous_shas if path not in current)  # removed manifests
+
+    # Poms inherit from each other and resolve as one reactor, so any pom (or
+    # .mvn/ config) change rescans all of them; without a file list, assume one did.
+    maven_changed = changed_paths is None or any(
+        match_manifest(path) == "maven" or ".mvn/" in path for path in changed | changed_paths
+    )
+    # A lockfile decides how the package.json / pyproject.toml next to it is read.
+    changed_dirs = {(match_manifest(path), os.path.dirname(path)) for path in changed}
+
+    return [
+        m for m in manifests
+        if (maven_changed if m.ecosystem == "maven" else (m.ecosystem, os.path.dirname(m.path)) in changed_dirs)
+    ]
+
+
+def _reuse(state: dict) -> PullRequestScan:
+    risky_entries = [entry[1:] for entry in state["entries"] if is_risky(entry[4])]
+    return PullRequestScan(state["entries"], risky_entries, state["markdown"], state["manifests"], True)
+
+
+def scan_pull_request(repo, pr: dict, access_token: str, maven_resolver=None):
+    """
+    Scan a PR head, reusing the previous scan of the same PR where possible:
+    no manifest touched since the last scan -> the last result is reused as is;
+    otherwise only the touched manifests are rescanned and merged with the rest.
+    The report opens with the dependency delta against the merge base with the base branch.
+    The previous scan comes from the scan store; saving this one is up to the caller.
+    """
+    head_sha, base_sha, base_ref = pr["head"]["sha"], pr["base"]["sha"], pr["base"]["ref"]
+    state = scan_store.latest_scan(repo.full_name, pr["number"]) if INCREMENTAL_SCAN else None
+
+    changed_paths = None
+    if state:
+        if state["head_sha"] == head_sha and state["base_sha"] == base_sha:
+            print(f"♻️ PR #{pr['number']} already scanned at {head_sha[:7]}, reusing result")
+            return _reuse(state)
+        changed_paths = _changed_since(repo, state["head_sha"], head_sha)
+        if (state["base_sha"] == base_sha and changed_paths is not None
+                and not any(_affects_dependencies(p) for p in changed_paths)):
+            print(f"♻️ No manifest changed since {state['head_sha'][:7]}, reusing previous result")
+            return _reuse(state)
+
+    started = time.time()
+    manifests = discover_manifests(repo, head_sha)
+    if state:
+        previous_shas = state["manifests"]
+        rescan = _manifests_to_rescan(manifests, previous_shas, changed_paths)
+        rescanned_paths = {m.path for m in rescan}
+        print(f"🔁 Incremental scan: {len(rescan)} of {len(manifests)} manifest(s) changed")
+        fresh = (scan_manifests(repo, rescan, head_sha, access_token, maven_resolver, manifests.build_files)
+                 if rescan else [])
+        order = {m.path: i for i, m in enumerate(manifests)}
+        kept = [e for e in state["entries"] if e[1] in order and e[1] not in rescanned_paths]
+        entries = sorted(kept + fresh, key=lambda e: order.get(e[1], len(order)))
+    else:
+        entries = scan_manifests(repo, manifests, head_sha, access_token, maven_resolver)
+        record_scan_cost(repo.full_name, len(manifests), len(entries), time.time() - started)
+
+    raise_if_cancelled()
+    try:
+        rows = compute_dependency_delta(repo, base_sha, head_sha, entries, access_token, maven_resolver)
+        delta = render_dependency_delta(rows, base_ref)
+    except Exception as e:
+        print(f"⚠️ Could not compute dependency delta against {base_ref}: {e}")
+        delta = None
+
+    risky_entries, markdown = render_scan_markdown(entries, [delta] if delta else ())
+    return PullRequestScan(entries, risky_entries, markdown, {m.path: m.sha for m in manifests}, False)
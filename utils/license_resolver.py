@@ -0,0 +1,88 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+
+from depsdev.maven import query_maven_license
+from depsdev.pypi import query_pypi_license
+from depsdev.npm import query_npm_license
+from depsdev.batch import query_depsdev_licenses_batch
+from depsdev.cache import get_cached_license, store_license, is_exact_version, license_flight_key
+from depsdev.singleflight import license_flights
+
+LOOKUPS = {
+    "maven": query_maven_license,
+    "pypi": query_pypi_license,
+    "npm": query_npm_license,
+}
+
+# Ecosystems whose per-registry lookup starts with deps.dev; these are batched up front.
+BATCHED_ECOSYSTEMS = ("maven", "pypi")
+
+# Per-host limits live in utils.http_client; this only bounds total threads.
+MAX_WORKERS = int(os.getenv("LICENSE_RESOLVER_WORKERS", "32"))
+
+
+def _fetch(ecosystem: str, name: str, version: str, use_depsdev: bool) -> Tuple[list, str]:
+    if ecosystem in BATCHED_ECOSYSTEMS:
+        result = LOOKUPS[ecosystem].uncached(name, version, use_depsdev=use_depsdev)
+    else:
+        result = LOOKUPS[ecosystem].uncached(name, version)
+    store_license(ecosystem, name, version, *result)
+    return result
+
+
+def _flight_key(ecosystem: str, name: str, version: str, use_depsdev: bool = True) -> str:
+    # Same key the decorated query functions use, so both paths share calls.
+    if ecosystem in BATCHED_ECOSYSTEMS:
+        return license_flight_key(ecosystem, name, version, use_depsdev=use_depsdev)
+    return license_flight_key(ecosystem, name, version)
+
+
+def _lookup(ecosystem: str, name: str, version: str, use_depsdev: bool) -> Tuple[list, str]:
+    # Other scans may be fetching the same key right now; share their call.
+    try:
+        return license_flights.do(_flight_key(ecosystem, name, version, use_depsdev),
+                                  _fetch, ecosystem, name, version, use_depsdev)
+    except Exception as e:
+        print(f"⚠️ License lookup failed for {ecosystem}:{name}@{version}: {e}")
+        return [], "Unknown"
+
+
+def resolve_licenses(keys: List[Tuple[str, str, str]]) -> List[Tuple[list, str]]:
+    """
+    Resolve (ecosystem, name, version) keys: cache first, then one deps.dev batch
+    for the misses, then concurrent per-registry fallbacks for what is left.
+    Returns (licenses, source) for each key, in the same order as the input.
+    """
+    unique = list(dict.fromkeys(keys))
+    if not unique:
+        return []
+
+    resolved = {}
+    for key in unique:
+        cached = get_cached_license(*key)
+        if cached is not None:
+            resolved[key] = cached
+
+    misses = [key for key in unique if key not in resolved]
+    # Keys another scan is already fetching skip the batch and join that call in _lookup.
+    batchable = [
+        key for key in misses
+        if key[0] in BATCHED_ECOSYSTEMS and is_exact_version(key[2])
+        and not license_flights.in_flight(_flight_key(*key))
+    ]
+    found, answered = query_depsdev_licenses_batch(batchable) if batchable else ({}, set())
+    for key, licenses in found.items():
+        store_license(*key, licenses, "DepsDev")
+        resolved[key] = (licenses, "DepsDev")
+
+    fallbacks = [key for key in misses if key not in resolved]
+    if fallbacks:
+        print(f"🔎 Resolving {len(fallbacks)} license(s) via registry fallbacks ({len(unique) - len(misses)} cached)")
+        workers = max(1, min(MAX_WORKERS, len(fallbacks)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="license") as pool:
+            futures = {key: pool.submit(_lookup, *key, key not in answered) for key in fallbacks}
+            resolved.update({key: future.result() for key, future in futures.items()})
+
+    print(f"🛬 Single-flight: {license_flights.stats}")
+    return [resolved[key] for key in keys]
@@ -0,0 +1,84 @@
+import os
+import re
+import hashlib
+import threading
+
+import openai
+
+from depsdev.cache import TieredCache
+from utils.risk_classifier import SAFE_LICENSES, RISKY_LICENSES, HIGH_RISK_LICENSES
+
+client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+SUMMARY_MODEL = os.getenv("LICENSE_SUMMARY_MODEL", "gpt-4")
+PREWARM = os.getenv("LICENSE_SUMMARY_PREWARM", "true").lower() != "false"
+
+SUMMARY_PROMPT = """
+    You are a legal-aware assistant that explains open source licenses in simple, accurate terms.
+
+    Summarize the license: {license_id}
+
+    Include:
+    - Whether it's permissive or copyleft
+    - Redistribution obligations
+    - Notable risks or restrictions
+
+    Keep the response under 100 words and markdown-formatted.
+    """
+# Part of the cache key, so editing the prompt refreshes every summary on next use.
+PROMPT_VERSION = hashlib.sha256(SUMMARY_PROMPT.encode()).hexdigest()[:12]
+
+# A license text doesn't change; summaries only go stale when the prompt or model does.
+summary_cache = TieredCache("license_summaries", memory_max_entries=500, default_ttl=365 * 24 * 3600)
+
+KNOWN_LICENSES = [l for l in dict.fromkeys(SAFE_LICENSES + RISKY_LICENSES + HIGH_RISK_LICENSES) if l != "non-standard"]
+_KNOWN_BY_LOWER = {l.lower(): l for l in KNOWN_LICENSES}
+
+
+def canonical_license_id(license_id: str) -> str:
+    """Case- and whitespace-insensitive match against the risk tables' IDs."""
+    cleaned = re.sub(r"\s+", "-", (license_id or "").strip().strip("`'\"")).rstrip(".?!")
+    return _KNOWN_BY_LOWER.get(cleaned.lower(), cleaned)
+
+
+def _cache_key(license_id: str, model: str) -> str:
+    return f"{canonical_license_id(license_id)}:{PROMPT_VERSION}:{model}"
+
+
+def cached_summary(license_id: str, model: str = SUMMARY_MODEL):
+    return summary_cache.get(_cache_key(license_id, model))
+
+
+def summarize_license(license_id: str, model: str = SUMMARY_MODEL) -> str:
+    license_id = canonical_license_id(license_id)
+    if not license_id:
+        return "⚠️ Which license should I summarize?"
+    cached = summary_cache.get(_cache_key(license_id, model))
+    if cached is not None:
+        return cached
+    try:
+        response = client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": SUMMARY_PROMPT.format(license_id=license_id)}],
+            temperature=0
+        )
+        summary = response.choices[0].message.content.strip()
+    except Exception as e:
+        return f"⚠️ Could not summarize {license_id}: {e}"
+    summary_cache.set(_cache_key(license_id, model), summary)
+    return summary
+
+
+def prewarm_license_summaries(model: str = SUMMARY_MODEL):
+    """Summarize every license in the risk tables that has no summary for the current prompt and model."""
+    missing = [l for l in KNOWN_LICENSES if cached_summary(l, model) is None]
+    if not missing:
+        return
+    print(f"📚 Pre-warming {len(missing)} license summaries ({model}, prompt {PROMPT_VERSION})")
+    for license_id in missing:
+        summarize_license(license_id, model)
+
+
+def start_prewarm():
+    if PREWARM and os.getenv("OPENAI_API_KEY"):
+        threading.Thread(target=prewarm_license_summaries, name="license-summary-prewarm", daemon=True).start()
@@ -1,119 +1,221 @@
 import openai
 import os
+import re
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
 from utils.scan_wrapper import scan_risky_licenses
-from auth import APP_SLUG
-from utils.pr_comment_cache import get_cached_scan_result
+from utils.license_summaries import summarize_license, cached_summary, canonical_license_id, KNOWN_LICENSES
+from utils.scan_digest import build_scan_digest, estimate_tokens
 
 client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 # Tool 1: license scanner
-def run_scan_risky_licenses(repo, pr, install, **kwargs):
-    return scan_risky_licenses(repo, pr, install)
-
-# Tool 2: license summarizer
-def summarize_license(license_id: str) -> str:
-    prompt = f"""
-    You are a legal-aware assistant that explains open source licenses in simple, accurate terms.
-
-    Summarize the license: {license_id}
-
-    Include:
-    - Whether it's permissive or copyleft
-    - Redistribution obligations
-    - Notable risks or restrictions
-
-    Keep the response under 100 words and markdown-formatted.
-    """
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0
-        )
-        return response.choices[0].message.content.strip()
-    except Exception as e:
-        return f"⚠️ Could not summarize {license_id}: {e}"
-
-# Tool registry
+def run_scan_risky_licenses(repo, pr, install, filter=None, ecosystem=None, dependency=None, offset=0, **kwargs):
+    return scan_risky_licenses(repo, pr, install, filter=filter, ecosystem=ecosystem, dependency=dependency, offset=offset)
+
+# Tool 2: license summarizer (utils.license_summaries, served from a persistent cache)
+
+# "Explain AGPL", "What is MPL-2.0?" are answered straight from the summary cache.
+_EXPLAIN = re.compile(
+    r"^\W*(?:explain|what(?:'s| is| are)|summari[sz]e|tell me about|describe)\s+(?:the\s+)?"
+    r"(?P<license>[\w.+-]+)(?:\s+licen[cs]es?)?\W*$",
+    re.IGNORECASE,
+)
+# Family names people type -> the table entry to explain.
+_LICENSE_ALIASES = {"agpl": "AGPL-3.0", "gpl": "GPL-3.0", "lgpl": "LGPL-3.0", "apache": "Apache-2.0",
+                    "sspl": "SSPL-1.0", "elastic": "Elastic-2.0", "mpl": "MPL-2.0", "epl": "EPL-2.0"}
+
+
+def answer_from_summary_cache(comment_body: str):
+    match = _EXPLAIN.match(comment_body.strip())
+    if not match:
+        return None
+    license_id = match.group("license")
+    license_id = _LICENSE_ALIASES.get(license_id.lower(), canonical_license_id(license_id))
+    if license_id not in KNOWN_LICENSES:
+        return None
+    summary = cached_summary(license_id)
+    return f"### {license_id}\n\n{summary}" if summary else None
+
+# Tool registry: OpenAI function schemas plus the callable that serves each tool.
 TOOLS = {
     "scan_risky_licenses": {
-        "description": "Scans the pull request for risky open source licenses.",
+        "description": "Lists dependencies from the pull request's license scan, one line each, "
+                       "to drill into the scan digest.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "filter": {
+                    "type": "string",
+                    "description": "Risk level (high, risky, unknown, safe, all) or a license family / SPDX ID "
+                                   "such as GPL or AGPL-3.0. Defaults to risky, or all when dependency is given.",
+                },
+                "ecosystem": {"type": "string", "description": "Only this ecosystem, e.g. npm, pypi, maven."},
+                "dependency": {"type": "string", "description": "Only dependencies whose name contains this."},
+                "offset": {"type": "integer", "description": "Skip this many matches, to page through long results."},
+            },
+        },
         "function": run_scan_risky_licenses
     },
     "summarize_license": {
         "description": "Provides a plain-English explanation of an open source license like AGPL-3.0.",
+        "parameters": {
+            "type": "object",
+            "properties": {"license_id": {"type": "string", "description": "SPDX ID, e.g. AGPL-3.0"}},
+            "required": ["license_id"],
+        },
         "function": lambda repo, pr, install, license_id=None: summarize_license(license_id)
     }
 }
 
-def parse_tool_action(action: str):
-    if not action.startswith("TOOL:"):
-        return None, None
-    try:
-        content = action[5:].strip()
-        if ":" in content:
-            tool_name, arg = content.split(":", 1)
-            return tool_name.strip(), arg.strip()
-        return content.strip(), None
-    except:
-        return None, None
+TOOL_SCHEMAS = [
+    {"type": "function", "function": {"name": name, "description": tool["description"], "parameters": tool["parameters"]}}
+    for name, tool in TOOLS.items()
+]
 
-def handle_governance_comment(comment_body: str, repo_full_name: str, pr_number: int, installation_id: int, repo) -> str:
+AGENT_MODEL = os.getenv("AGENT_MODEL", "gpt-4")
+MAX_STEPS = 3
+MAX_TOOL_WORKERS = 8
 
-    tool_list = "\n".join(f"- {name}: {tool['description']}" for name, tool in TOOLS.items())
 
-    cached_result = get_cached_scan_result(repo, pr_number, APP_SLUG)
+def _stream_step(messages, on_token=None, allow_tools=True):
+    """
+    One streamed model turn. Returns (content, tool_calls, usage, ttft); tool calls
+    arrive as fragments keyed by index and are stitched back together here.
+    Only text of a turn that ends up calling no tools reaches `on_token`: it is
+    streamed live when tools are off, and otherwise held until the turn ends.
+    """
+    started = time.time()
+    ttft = None
+    content, tool_calls, usage = [], {}, None
+    stream = client.chat.completions.create(
+        model=AGENT_MODEL,
+        messages=messages,
+        tools=TOOL_SCHEMAS,
+        tool_choice="auto" if allow_tools else "none",
+        temperature=0,
+        stream=True,
+        stream_options={"include_usage": True},
+    )
+    for chunk in stream:
+        if chunk.usage is not None:
+            usage = chunk.usage
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta
+        if ttft is None and (delta.content or delta.tool_calls):
+            ttft = time.time() - started
+        if delta.content:
+            content.append(delta.content)
+            if on_token and not allow_tools:
+                on_token(delta.content)
+        for fragment in delta.tool_calls or []:
+            call = tool_calls.setdefault(fragment.index, {"id": None, "name": "", "arguments": ""})
+            if fragment.id:
+                call["id"] = fragment.id
+            if fragment.function and fragment.function.name:
+                call["name"] += fragment.function.name
+            if fragment.function and fragment.function.arguments:
+                call["arguments"] += fragment.function.arguments
+    if on_token and allow_tools and not tool_calls:
+        for text in content:
+            on_token(text)
+    return "".join(content), [tool_calls[i] for i in sorted(tool_calls)], usage, ttft
+
+
+def _run_tool(call, repo_full_name, pr_number, installation_id):
+    started = time.time()
+    tool = TOOLS.get(call["name"])
+    if tool is None:
+        result = f"Unknown tool {call['name']}."
+    else:
+        try:
+            arguments = json.loads(call["arguments"] or "{}")
+            result = tool["function"](repo_full_name, pr_number, installation_id, **arguments)
+        except Exception as e:
+            result = f"Tool {call['name']} failed: {e}"
+    return str(result), time.time() - started
+
 
-    context = [
+def handle_governance_comment(comment_body: str, repo_full_name: str, pr_number: int, installation_id: int, repo,
+                              on_token=None) -> str:
+    """
+    Answer a governance comment with a tool-calling loop: each model turn may request
+    several tools, which run in parallel. The final answer is streamed to `on_token`
+    (if given) as it is generated, and returned in full.
+    """
+    cached_answer = answer_from_summary_cache(comment_body)
+    if cached_answer:
+        print("⚡ Answered from the license summary cache.")
+        return cached_answer
+
+    started = time.time()
+    digest = build_scan_digest(repo_full_name, pr_number)
+
+    messages = [
         {
             "role": "system",
             "content": "You are an AI assistant that helps respond to GitHub PR comments related to open source governance. "
-                       "You can use tools, reason step-by-step, and write helpful markdown responses. "
-                       f"Available tools:\n{tool_list}"
+                       "The scan digest below summarizes the PR; call scan_risky_licenses to drill into specific "
+                       "dependencies and summarize_license for license explanations, requesting several tools at once "
+                       "when they are independent. Reply to the user in helpful, concise markdown."
         },
-        {
-            "role": "user",
-            "content": f"A user commented:\n\"\"\"{comment_body}\"\"\"\n\n"
-                       "Think step-by-step and respond with TOOL: <tool_name> or TOOL: <tool_name>:<arg> to run a tool, "
-                       "or FINAL: <your markdown reply> to respond to the user."
-        }
+        {"role": "user", "content": f"A user commented:\n\"\"\"{comment_body}\"\"\""},
     ]
 
-    if cached_result:
-        context.append({
-            "role": "user",
-            "content": f"TOOL_RESULT: {cached_result}"
-        })
-        print("🧠 Injected cached scan result from prior comment.")
+    if digest:
+        messages.insert(1, {"role": "system", "content": f"Digest of this PR's latest license scan:\n{digest}"})
+        print(f"🧠 Injected scan digest (~{estimate_tokens(digest)} tokens).")
 
-    for _ in range(3):  # max 3 reasoning steps
-        try:
-            response = client.chat.completions.create(
-                model="gpt-4",
-                messages=context,
-                temperature=0
-            )
-            action = response.choices[0].message.content.strip()
-            print(f"🧠 LLM action: {action}")
-            if action.startswith("FINAL:"):
-                return action[len("FINAL:"):].strip()
-
-            tool_name, arg = parse_tool_action(action)
-            if tool_name in TOOLS:
-                tool_fn = TOOLS[tool_name]["function"]
-                if tool_name == "summarize_license":
-                    result = tool_fn(repo_full_name, pr_number, installation_id, license_id=arg)
-                else:
-                    result = tool_fn(repo_full_name, pr_number, installation_id)
-
-                context.append({"role": "assistant", "content": action})
-                context.append({"role": "user", "content": f"TOOL_RESULT: {result}"})
-            else:
-                context.append({"role": "assistant", "content": action})
-                context.append({"role": "user", "content": "TOOL_RESULT: Invalid tool or unknown action."})
+    steps = []
+    try:
+        for step_number in range(1, MAX_STEPS + 1):
+            step_started = time.time()
+            # The last turn must answer with what it has rather than ask for more tools.
+            content, tool_calls, usage, ttft = _stream_step(messages, on_token, allow_tools=step_number < MAX_STEPS)
+            step = {
+                "seconds": time.time() - step_started,
+                "ttft": ttft,
+                "prompt_tokens": usage.prompt_tokens if usage else None,
+                "completion_tokens": usage.completion_tokens if usage else None,
+                "tools": [],
+            }
+            steps.append(step)
+            if not tool_calls:
+                return content.strip()
+
+            messages.append({
+                "role": "assistant",
+                "content": content or None,
+                "tool_calls": [
+                    {"id": c["id"], "type": "function", "function": {"name": c["name"], "arguments": c["arguments"]}}
+                    for c in tool_calls
+                ],
+            })
+            with ThreadPoolExecutor(max_workers=min(MAX_TOOL_WORKERS, len(tool_calls)), thread_name_prefix="agent-tool") as pool:
+                results = list(pool.map(lambda c: _run_tool(c, repo_full_name, pr_number, installation_id), tool_calls))
+            for call, (result, seconds) in zip(tool_calls, results):
+                print(f"🛠️ {call['name']}({call['arguments']}) in {seconds:.2f}s")
+                step["tools"].append((call["name"], round(seconds, 3)))
+                messages.append({"role": "tool", "tool_call_id": call["id"], "content": result})
 
-        except Exception as e:
-            print(f"❌ LLM error: {e}")
-            return "⚠️ I encountered an error while trying to reason with this comment."
+    except Exception as e:
+        print(f"❌ LLM error: {e}")
+        return "⚠️ I encountered an error while trying to reason with this comment."
+    finally:
+        _log_accounting(steps, time.time() - started)
 
     return "⚠️ I could not complete reasoning within the allowed steps."
+
+
+def _log_accounting(steps, total_seconds):
+    prompt_tokens = sum(s["prompt_tokens"] or 0 for s in steps)
+    completion_tokens = sum(s["completion_tokens"] or 0 for s in steps)
+    print(f"🧾 Agent: {len(steps)} step(s) in {total_seconds:.2f}s, "
+          f"{prompt_tokens} prompt + {completion_tokens} completion tokens")
+    for i, s in enumerate(steps, 1):
+        ttft = f"{s['ttft']:.2f}s" if s["ttft"] is not None else "-"
+        tools = ", ".join(f"{name} {sec}s" for name, sec in s["tools"]) or "none"
+        print(f"   step {i}: {s['seconds']:.2f}s (first token {ttft}), "
+              f"{s['prompt_tokens']} prompt / {s['completion_tokens']} completion tokens; tools: {tools}")
@@ -0,0 +1,134 @@
+import os
+import base64
+import fnmatch
+import tempfile
+from collections import deque
+from contextlib import contextmanager
+from typing import List, NamedTuple, Optional
+
+from auth import authorized_get
+
+# Manifest file name (or glob) -> ecosystem. Patterns containing "/" are matched
+# against the full path, everything else against the file name.
+# Extra patterns can be added with e.g. MANIFEST_PATTERNS="requirements-*.txt=pypi".
+MANIFEST_PATTERNS = {
+    "pom.xml": "maven",
+    "requirements.txt": "pypi",
+    "pyproject.toml": "pypi",
+    "poetry.lock": "pypi",
+    "uv.lock": "pypi",
+    "Pipfile.lock": "pypi",
+    "package.json": "npm",
+    "package-lock.json": "npm",
+    "npm-shrinkwrap.json": "npm",
+    "yarn.lock": "npm",
+    "pnpm-lock.yaml": "npm",
+}
+
+for _pair in filter(None, os.getenv("MANIFEST_PATTERNS", "").split(",")):
+    _pattern, _, _ecosystem = _pair.partition("=")
+    if _pattern.strip() and _ecosystem.strip():
+        MANIFEST_PATTERNS[_pattern.strip()] = _ecosystem.strip()
+
+
+class Manifest(NamedTuple):
+    path: str
+    name: str
+    sha: str  # git blob SHA
+    ecosystem: str
+
+
+class DiscoveredManifests(list):
+    """
+    discover_manifests' result: the manifests, plus `build_files`, the blob SHAs
+    of build configuration (.mvn/) that changes how the poms resolve.
+    """
+
+    def __init__(self, manifests=(), build_files=None):
+        super().__init__(manifests)
+        self.build_files = build_files or {}
+
+
+def is_build_config(path: str) -> bool:
+    # .mvn/maven.config, .mvn/extensions.xml, .mvn/jvm.config: read by mvn and MavenResolver alike.
+    return path.startswith(".mvn/") or "/.mvn/" in path
+
+
+def register_manifest_pattern(pattern: str, ecosystem: str):
+    MANIFEST_PATTERNS[pattern] = ecosystem
+
+
+def match_manifest(path: str) -> Optional[str]:
+    name = path.rsplit("/", 1)[-1]
+    for pattern, ecosystem in MANIFEST_PATTERNS.items():
+        target = path if "/" in pattern else name
+        if fnmatch.fnmatchcase(target, pattern):
+            return ecosystem
+    return None
+
+
+def _walk_contents(repo, ref, build_files: dict) -> List[Manifest]:
+    # Only used when the recursive tree is truncated (very large repos).
+    manifests = []
+    contents = repo.get_contents("", ref=ref)
+    queue = deque(contents if isinstance(contents, list) else [contents])
+    while queue:
+        item = queue.popleft()
+        if item.type == "dir":
+            queue.extend(repo.get_contents(item.path, ref=ref))
+        else:
+            ecosystem = match_manifest(item.path)
+            if ecosystem:
+                manifests.append(Manifest(item.path, item.name, item.sha, ecosystem))
+            elif is_build_config(item.path):
+                build_files[item.path] = item.sha
+    return manifests
+
+
+def discover_manifests(repo, ref: str) -> DiscoveredManifests:
+    """
+    Find every manifest at `ref` (ideally the PR head SHA) with a single
+    recursive git-tree call. Returns manifests in breadth-first path order,
+    with the .mvn/ build files found in the same listing as `build_files`.
+    """
+    build_files = {}
+    tree = repo.get_git_tree(ref, recursive=True)
+    if tree.raw_data.get("truncated"):
+        print("⚠️ Git tree truncated, falling back to directory walk.")
+        manifests = _walk_contents(repo, ref, build_files)
+    else:
+        manifests = []
+        for element in tree.tree:
+            if element.type != "blob":
+                continue
+            ecosystem = match_manifest(element.path)
+            if ecosystem:
+                manifests.append(Manifest(element.path, element.path.rsplit("/", 1)[-1], element.sha, ecosystem))
+            elif is_build_config(element.path):
+                build_files[element.path] = element.sha
+
+    manifests = list({m.path: m for m in manifests}.values())
+    manifests.sort(key=lambda m: (m.path.count("/"), m.path))
+    print(f"🗂️ Discovered {len(manifests)} manifest(s) at {ref}")
+    return DiscoveredManifests(manifests, build_files)
+
+
+def read_manifest(repo, manifest: Manifest) -> str:
+    blob = repo.get_git_blob(manifest.sha)
+    return base64.b64decode(blob.content).decode()
+
+
+@contextmanager
+def stream_manifest(repo, manifest: Manifest, access_token: str):
+    """
+    Yield a binary file object with the blob's content, streamed to a temp file
+    instead of decoded in memory. Used for lockfiles that can be tens of MB.
+    """
+    headers = {"Accept": "application/vnd.github.raw"}
+    with tempfile.TemporaryFile() as f:
+        with authorized_get(f"{repo.url}/git/blobs/{manifest.sha}", access_token, headers, stream=True) as response:
+            response.raise_for_status()
+            for chunk in response.iter_content(chunk_size=1024 * 1024):
+                f.write(chunk)
+        f.seek(0)
+        yield f
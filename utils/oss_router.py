@@ -1,9 +1,111 @@
 import openai
 import os
+import re
+import hashlib
+
+from auth import APP_SLUG
+from depsdev.cache import TieredCache
+from utils.risk_classifier import SAFE_LICENSES, HIGH_RISK_LICENSES, RISKY_LICENSES
 
 client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
-def is_open_source_governance_question(comment_body: str, context) -> bool:
+
+# Stage 1: a local matcher settles clear-cut comments in microseconds.
+# SPDX IDs are matched case-sensitively so "MIT" doesn't fire on "submit".
+_SPDX_IDS = sorted(
+    set(SAFE_LICENSES + HIGH_RISK_LICENSES + RISKY_LICENSES) - {"non-standard"}
+    | {"GPL", "LGPL", "GPLv2", "GPLv3", "ISC", "Unlicense", "CC0", "CC-BY", "BUSL", "WTFPL", "EUPL", "0BSD"},
+    key=len, reverse=True,
+)
+_LICENSE_IDS = re.compile(r"(?<![\w-])(?:" + "|".join(re.escape(i) for i in _SPDX_IDS) + r")(?:[-.\d]*(?:-only|-or-later)?)(?![\w])")
+# Copyleft family names are unambiguous in any case ("is gpl ok?").
+_LICENSE_FAMILIES = re.compile(r"(?<![\w-])(?:a?gpl|lgpl|mpl|sspl)(?:v?[-.\d]*(?:-only|-or-later)?)(?![\w])", re.IGNORECASE)
+# Any ID in any case; not enough to say yes ("elastic", "isc"), but enough to let the LLM decide.
+_LICENSE_MENTION = re.compile(_LICENSE_IDS.pattern, re.IGNORECASE)
+_GOVERNANCE_TERMS = re.compile(
+    r"\b(licen[cs](e|es|ed|ing)|spdx|copyleft|permissive|open[- ]source|oss governance|attribution|"
+    r"notice file|redistribut\w*|sublicens\w*|gnu general public|lesser general public|affero|"
+    r"mozilla public|apache license|eclipse public|server side public|elastic license|creative commons|"
+    r"risky (package|dependenc|licen)\w*|high[- ]risk)\b",
+    re.IGNORECASE,
+)
+# A license ID alone is not a question ("MIT campus wifi is down", "Elastic search cluster is down"):
+# it needs one of these within CUE_WINDOW characters before the local matcher says yes.
+_LICENSE_CUES = re.compile(
+    r"\?|\b(ok(ay)?|allowed|permitted|safe|compatible|fine|acceptable|approved?|risk\w*|"
+    r"depend\w*|deps?|packages?|librar(y|ies)|libs?|licen[cs]\w*|compliance|legal|obligations?|"
+    r"use|using|usage)\b",
+    re.IGNORECASE,
+)
+CUE_WINDOW = 40
+# Words that make even a short comment worth asking the LLM about ("risky deps?").
+_GOVERNANCE_HINTS = re.compile(
+    r"\b(risk\w*|deps?|dependenc\w*|licen[cs]\w*|legal|compliance|copyright)\b", re.IGNORECASE
+)
+_ACKS = re.compile(
+    r"^\W*(lgtm|looks good( to me)?|approved?|ship ?it|\+1|👍|🚀|🎉|thanks?( you)?|thx|ty|done|fixed|"
+    r"rebased|updated|addressed|nit\b.*|merged?|ok(ay)?|sure|will do|ack|resolved|/\w+.*)\W*$",
+    re.IGNORECASE,
+)
+_LEADING_MENTION = re.compile(r"^\s*@([\w-]+(?:\[bot\])?)")
+SHORT_COMMENT_WORDS = 3
+
+# Stage 2: LLM verdicts for ambiguous comments, cached by normalized comment text.
+verdict_cache = TieredCache("router_verdicts", memory_max_entries=5000)
+ROUTER_PROMPT_VERSION = "2"
+
+
+def _normalize(comment_body: str) -> str:
+    return re.sub(r"\s+", " ", comment_body).strip().lower()
+
+
+def _cued_license_id(text: str) -> bool:
+    for pattern in (_LICENSE_IDS, _LICENSE_FAMILIES):
+        for match in pattern.finditer(text):
+            window = text[max(0, match.start() - CUE_WINDOW):match.end() + CUE_WINDOW]
+            if _LICENSE_CUES.search(window):
+                return True
+    return False
+
+
+def classify_locally(comment_body: str):
+    """True / False when the comment is clear-cut, None when only the LLM can tell."""
+    text = comment_body.strip()
+    if not text:
+        return False
+    mention = _LEADING_MENTION.match(text)
+    if mention and (not APP_SLUG or APP_SLUG.lower() not in mention.group(1).lower()):
+        return False  # addressed to a specific person
+    if _GOVERNANCE_TERMS.search(text) or _cued_license_id(text):
+        return True
+    if _ACKS.match(text):
+        return False
+    if (len(text.split()) <= SHORT_COMMENT_WORDS and not _LICENSE_MENTION.search(text)
+            and not _GOVERNANCE_HINTS.search(text)):
+        return False
+    return None
+
+
+def is_open_source_governance_question(comment_body: str, context=None) -> bool:
+    """
+    Route a PR comment: local rules first, then the verdict cache, then gpt-4.
+    `context` is the recent thread as a list of lines, or a callable returning
+    it, so the thread is only fetched when the LLM actually runs.
+    """
+    verdict = classify_locally(comment_body)
+    if verdict is not None:
+        print(f"⚡ Router matched locally: {'yes' if verdict else 'no'}")
+        return verdict
+
+    cache_key = f"v{ROUTER_PROMPT_VERSION}:" + hashlib.sha256(_normalize(comment_body).encode()).hexdigest()
+    cached = verdict_cache.get(cache_key)
+    if cached is not None:
+        print(f"⚡ Router verdict cached: {'yes' if cached else 'no'}")
+        return cached
+
+    if callable(context):
+        context = context()
+    thread = "\n".join(list(context or []) + [comment_body])
 
     prompt = f"""
     You are an expert AI classifier helping route GitHub pull request comments to the appropriate internal teams.
@@ -22,8 +124,8 @@ def is_open_source_governance_question(comment_body: str, context) -> bool:
 
     Otherwise, if it's a general question not related to licenses — respond with **"No"**.
 
-    Comment:
-    \"\"\"\\n".join({context} + [{comment_body}])\"\"\"
+    Comment (last line), with recent thread for context:
+    \"\"\"{thread}\"\"\"
     """
 
 
@@ -34,7 +136,9 @@ def is_open_source_governance_question(comment_body: str, context) -> bool:
             temperature=0
         )
         print(f"🧠 OpenAI classified as: {response.choices[0].message.content.strip().lower()}")
-        return "yes" in response.choices[0].message.content.strip().lower()
+        verdict = "yes" in response.choices[0].message.content.strip().lower()
     except Exception as e:
         print(f"❌ OpenAI classification error: {e}")
         return False
+    verdict_cache.set(cache_key, verdict)
+    return verdict
@@ -1,3 +1,10 @@
+import os
+import time
+
+# Minimum seconds between edits of a reply that is still being generated; each edit is an API call.
+STREAM_EDIT_INTERVAL = float(os.getenv("REPLY_STREAM_EDIT_INTERVAL", "1.5"))
+
+
 def create_pr_comment(repo, pr_number, comment_body, app_slug):
     pr = repo.get_pull(pr_number)
     comments = pr.get_issue_comments()
@@ -19,3 +26,38 @@ def create_pr_comment(repo, pr_number, comment_body, app_slug):
     pr.create_issue_comment(comment_body)
 
 
+
+
+class StreamingReply:
+    """
+    A PR comment written as the answer is generated: called with each token, it posts the
+    comment on the first one and edits it at most every STREAM_EDIT_INTERVAL seconds after.
+    finish() writes the complete answer, posting it if nothing was streamed.
+    """
+
+    def __init__(self, repo, pr_number):
+        self.repo = repo
+        self.pr_number = pr_number
+        self.comment = None
+        self.tokens = []
+        self.written_at = 0.0
+
+    def __call__(self, token):
+        self.tokens.append(token)
+        text = "".join(self.tokens).strip()
+        if text and time.time() - self.written_at >= STREAM_EDIT_INTERVAL:
+            try:
+                self._write(text + " …")
+            except Exception as e:
+                # The final write retries; a missed intermediate edit only delays the preview.
+                print(f"⚠️ Could not update streamed reply: {e}")
+
+    def _write(self, body):
+        if self.comment is None:
+            self.comment = self.repo.get_pull(self.pr_number).create_issue_comment(body)
+        else:
+            self.comment.edit(body)
+        self.written_at = time.time()
+
+    def finish(self, body):
+        self._write(body)
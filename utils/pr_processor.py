@@ -1,31 +1,17 @@
-import os
 from github import Github
 from datetime import datetime
 from pytz import timezone  # NEW
-import zipfile
-import io
-import uuid
-import requests
-import shutil
-import glob
 from dotenv import load_dotenv
 load_dotenv()
 
-from auth import get_installation_access_token, APP_SLUG
-from parsers.maven_parser import parse_pom_xml, parse_pom_xml_via_maven
-from parsers.python_parser import parse_requirements_txt
-from parsers.node_parser import parse_package_json
-from depsdev.maven import query_maven_license
-from depsdev.pypi import query_pypi_license
-from depsdev.npm import query_npm_license
-from utils.risk_classifier import format_licenses_with_risk, get_risk_sort_weight
-from utils.pr_commenter import create_pr_comment
+from auth import with_installation_token
 from utils.pr_check_decorator import create_pr_check_run
-from utils.dependency_scanner import scan_dependencies_and_render_markdown
+from utils.dependency_scanner import is_risky, maven_resolver_for
+from utils.incremental_scan import scan_pull_request
+from utils.scan_scheduler import raise_if_cancelled
+from utils.scan_store import scan_store
 
 
-GITHUB_TOKEN = os.getenv('GITHUB_TOKEN')
-
 def get_est_timestamp():
     est = timezone('America/New_York')
     now_utc = datetime.utcnow()
@@ -33,45 +19,57 @@ def get_est_timestamp():
     return now_est.strftime("%Y-%m-%d %I:%M %p EST")
 
 def process_pull_request(payload):
-    pr = payload["pull_request"]
-    installation = payload["installation"]
-    installation_id = installation["id"]
+    installation_id = payload["installation"]["id"]
+
+    # A revoked or re-scoped token gets a 401 from GitHub; retry once with a fresh one.
+    with_installation_token(installation_id, lambda access_token: _process_pull_request(payload, access_token))
 
-    access_token = get_installation_access_token(installation_id)
+def _process_pull_request(payload, access_token):
+    pr = payload["pull_request"]
     github_client = Github(access_token)
 
     repo_full_name = pr["base"]["repo"]["full_name"]
     branch_name = pr["head"]["ref"]
     pr_number = pr["number"]
 
+    head_sha = pr["head"]["sha"]
+
     repo = github_client.get_repo(repo_full_name)
 
 
-    risky_entries, final_comment = scan_dependencies_and_render_markdown(repo, branch_name, access_token)
+    # Reuses the PR's previous scan when the push touched no manifest; see utils.incremental_scan.
+    result = scan_pull_request(repo, pr, access_token, maven_resolver_for(repo_full_name))
+    risky_entries, final_comment = result.risky_entries, result.markdown
     # create_pr_comment(repo, pr_number, final_comment, APP_SLUG) # Comment out PR Comments
 
+    # A newer push to this PR may have superseded us while scanning; don't post a stale result.
+    raise_if_cancelled()
+
     # Add PR Decoration
-    head_sha = pr["head"]["sha"]
     conclusion = "failure" if risky_entries else "success"
+    scan_store.save_scan(repo_full_name, pr_number, head_sha, pr["base"]["sha"],
+                         result.entries, result.manifests, final_comment, conclusion)
     create_pr_check_run(repo, head_sha, final_comment, conclusion)
 
-def scan_risky_packages(repo, pr_number):
+def scan_risky_packages(repo, pr: dict, access_token: str):
     """
     Returns a simplified list of (dependency, license_with_risk) for PR merge-based issue creation.
+    Served from the stored scan of the merged head; only a head we never scanned is rescanned.
+    The audit is scheduled after the PR's pending check scan (see app.py), so that scan has landed.
     """
-    pr_obj = repo.get_pull(pr_number)
-    branch_name = pr_obj.head.ref
-
-    # Use GitHub App token from environment
-    access_token = os.getenv('GITHUB_TOKEN') or os.getenv('GITHUB_APP_TOKEN')
-    if not access_token:
-        print("❌ GitHub token not found for scanning.")
-        return []
-
+    repo_full_name, pr_number, head_sha = repo.full_name, pr["number"], pr["head"]["sha"]
     try:
-        risky_entries, _ = scan_dependencies_and_render_markdown(repo, branch_name, access_token)
-        return [(dep, license_with_risk) for _, dep, _, license_with_risk, _ in risky_entries]
+        stored = scan_store.latest_scan(repo_full_name, pr_number, head_sha)
+        if stored:
+            print(f"♻️ Reusing stored scan of {repo_full_name}#{pr_number}@{head_sha[:7]} for merge audit")
+            entries = stored["entries"]
+        else:
+            print(f"🔍 No stored scan for {head_sha[:7]}, scanning merged head")
+            result = scan_pull_request(repo, pr, access_token, maven_resolver_for(repo_full_name))
+            entries = result.entries
+            scan_store.save_scan(repo_full_name, pr_number, head_sha, pr["base"]["sha"], result.entries,
+                                 result.manifests, result.markdown, "failure" if result.risky_entries else "success")
+        return [(dep, license_with_risk) for _, _, dep, _, license_with_risk, _ in entries if is_risky(license_with_risk)]
     except Exception as e:
         print(f"❌ Error scanning risky packages from merged PR: {e}")
         return []
-
@@ -63,3 +63,34 @@ def get_risk_sort_weight(license_with_risk: str) -> int:
         return 3
     return 4  # ❓ Unknown
 
+
+# Short risk names used by the scan store and the agent's filters.
+RISK_LEVELS = {"🔥 High Risk": "high", "⚠️ Risky": "risky", "✅ Safe": "safe", "❓ Unknown": "unknown"}
+
+def risk_level(license_with_risk: str) -> str:
+    """Overall risk of a formatted license string as high / risky / safe / unknown."""
+    overall = license_with_risk.rsplit("Overall:", 1)[-1]
+    for label, level in RISK_LEVELS.items():
+        if label in overall:
+            return level
+    return "unknown"
+
+# Each formatted part ends in its risk label; license names themselves may contain ", ".
+_RISK_LABEL_SPLIT = re.compile(" (?:" + "|".join(re.escape(label) for label in RISK_LEVELS) + ")(?:, |$)")
+
+def split_license_with_risk(license_with_risk: str) -> list:
+    """License IDs back out of format_licenses_with_risk's output."""
+    # Leading space so a bare label (no licenses found) splits to nothing.
+    formatted = " " + license_with_risk.split(" ➔ Overall:", 1)[0]
+    return [name.strip() for name in _RISK_LABEL_SPLIT.split(formatted) if name.strip()]
+
+def license_family(license_id: str) -> str:
+    """
+    SPDX ID (or license name) without version and suffixes: 'AGPL-3.0-only' -> 'AGPL',
+    'Apache-2.0' -> 'Apache', 'The Apache Software License, Version 2.0' -> 'The Apache Software License'.
+    """
+    family = re.sub(r"(?:,?\s*version\s*|[-_ ])?(v?\d[\d.]*)?([-+](only|or-later))?\+?$", "",
+                    license_id.strip(), flags=re.IGNORECASE)
+    if family.upper().startswith("BSD"):
+        return "BSD"  # BSD-2-Clause, BSD-3-Clause, ...
+    return family or license_id.strip()
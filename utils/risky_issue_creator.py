@@ -2,14 +2,39 @@
 
 from uuid import uuid4
 
+# Recent issues checked for an existing audit of the same PR before creating one.
+EXISTING_ISSUE_LOOKBACK = 100
+
+
+def _audit_marker(pr_number):
+    return f"<!-- Risk-Audit-PR: {pr_number} -->"
+
+
+def find_risky_issue(repo, pr_number):
+    """The issue already opened for this PR's merge audit, if any (redeliveries, restarts, other workers)."""
+    marker = _audit_marker(pr_number)
+    for i, issue in enumerate(repo.get_issues(state="all", sort="created", direction="desc")):
+        if i >= EXISTING_ISSUE_LOOKBACK:
+            break
+        if issue.pull_request is None and marker in (issue.body or ""):
+            return issue
+    return None
+
+
 def create_risky_issue(repo, pr_number, risky_packages):
     """
-    Create a GitHub Issue listing risky packages detected in a merged PR.
+    Create a GitHub Issue listing risky packages detected in a merged PR,
+    unless one was already created for that PR.
     risky_packages: list of (dependency, license_with_risk)
     """
     if not risky_packages:
         return  # No risky packages, no issue needed
 
+    existing = find_risky_issue(repo, pr_number)
+    if existing is not None:
+        print(f"🔁 Risk issue #{existing.number} already exists for PR #{pr_number}, not creating another")
+        return existing
+
     issue_title = f"⚠️ Open Source Governance: Risky Packages Detected"
 
     body_lines = []
@@ -26,8 +51,9 @@ def create_risky_issue(repo, pr_number, risky_packages):
     # Add hidden Risk Tracking ID for Phase 2
     risk_id = str(uuid4())
     body_lines.append(f"\n<!-- Risk-Tracking-ID: {risk_id} -->")
+    body_lines.append(_audit_marker(pr_number))
 
-    repo.create_issue(
+    return repo.create_issue(
         title=issue_title,
         body="\n".join(body_lines)
     )
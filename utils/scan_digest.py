@@ -0,0 +1,87 @@
+import os
+
+from utils.scan_store import scan_store
+from utils.risk_classifier import split_license_with_risk
+
+# Ceiling on the scan context handed to the LLM, in (estimated) tokens. The digest
+# carries counts and the riskiest rows; everything else is one drill-down tool call away.
+DIGEST_TOKEN_BUDGET = int(os.getenv("SCAN_DIGEST_TOKEN_BUDGET", "800"))
+# Ceiling on a single drill-down tool result.
+TOOL_TOKEN_BUDGET = int(os.getenv("SCAN_TOOL_TOKEN_BUDGET", "1500"))
+MAX_FAMILIES = 15
+
+RISK_ORDER = {"high": 0, "risky": 1, "unknown": 2, "safe": 3}
+RISK_ICONS = {"high": "🔥", "risky": "⚠️", "unknown": "❓", "safe": "✅"}
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token for English and identifiers; no tokenizer dependency needed for a budget.
+    return len(text) // 4 + 1
+
+
+def format_entry(entry: dict) -> str:
+    """One scan entry as a single compact line."""
+    licenses = " / ".join(split_license_with_risk(entry["license_with_risk"])) or "unknown license"
+    version = f"@{entry['version']}" if entry["version"] else ""
+    return (f"- {entry['ecosystem']} {entry['dependency']}{version}: {licenses} "
+            f"{RISK_ICONS.get(entry['risk'], '❓')} ({entry['file_path']})")
+
+
+def fit_lines(header: list, entries: list, budget: int, more_hint) -> list:
+    """header plus as many formatted entries as fit in `budget` tokens, then `more_hint(shown)` if cut short."""
+    lines = list(header)
+    used = sum(estimate_tokens(line) for line in lines)
+    shown = 0
+    for entry in entries:
+        line = format_entry(entry)
+        cost = estimate_tokens(line)
+        # Keep room for the trailer line.
+        if used + cost > budget - 30:
+            break
+        lines.append(line)
+        used += cost
+        shown += 1
+    if shown < len(entries):
+        lines.append(more_hint(shown))
+    return lines
+
+
+def _families(counts: dict) -> str:
+    ranked = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+    text = ", ".join(f"{family} ({n})" for family, n in ranked[:MAX_FAMILIES])
+    if len(ranked) > MAX_FAMILIES:
+        text += f", +{len(ranked) - MAX_FAMILIES} more"
+    return text or "none"
+
+
+def build_scan_digest(repo_full_name: str, pr_number: int, head_sha: str = None,
+                      budget: int = DIGEST_TOKEN_BUDGET):
+    """
+    Compact summary of the PR's stored scan for the LLM: counts per risk level,
+    deduplicated license families and the risky rows (high first) that fit in
+    `budget` tokens. None when the PR has not been scanned yet.
+    """
+    head_sha = head_sha or scan_store.latest_head(repo_full_name, pr_number)
+    if head_sha is None:
+        return None
+
+    counts = scan_store.risk_counts(repo_full_name, pr_number, head_sha)
+    risky = scan_store.query_entries(repo_full_name, pr_number, head_sha, risk=["high", "risky"])
+    risky.sort(key=lambda e: RISK_ORDER.get(e["risk"], len(RISK_ORDER)))
+
+    header = [
+        f"License scan of {head_sha[:7]}: {sum(counts.values())} dependencies.",
+        "Risk: " + " · ".join(f"{RISK_ICONS[level]} {level} {counts.get(level, 0)}" for level in RISK_ORDER),
+        "Risky license families: " + _families(
+            scan_store.family_counts(repo_full_name, pr_number, head_sha, risk=["high", "risky"])),
+        "All license families: " + _families(scan_store.family_counts(repo_full_name, pr_number, head_sha)),
+    ]
+    if not risky:
+        return "\n".join(header + ["No risky dependencies."])
+
+    header.append("Risky dependencies (high first):")
+    lines = fit_lines(header, risky, budget, lambda shown: (
+        f"…and {len(risky) - shown} more risky; call scan_risky_licenses with filter/ecosystem/dependency "
+        f"or offset={shown} for the rest."
+    ))
+    return "\n".join(lines)
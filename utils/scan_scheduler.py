@@ -0,0 +1,319 @@
+import os
+import time
+import uuid
+import heapq
+import itertools
+import threading
+from collections import OrderedDict, deque
+
+from depsdev.cache import TieredCache
+
+# Fixed pool of workers draining a bounded queue of webhook jobs.
+SCAN_WORKERS = int(os.getenv("SCAN_WORKERS", "4"))
+SCAN_QUEUE_SIZE = int(os.getenv("SCAN_QUEUE_SIZE", "32"))
+# GitHub redelivers on timeouts and from the "Redeliver" button; remember this many delivery IDs.
+DELIVERY_DEDUPE_SIZE = int(os.getenv("DELIVERY_DEDUPE_SIZE", "2000"))
+WAIT_SAMPLES = 200
+# Most jobs one installation may have queued; beyond that it gets 429 while others keep flowing.
+INSTALLATION_QUEUE_LIMIT = int(os.getenv("SCAN_INSTALLATION_QUEUE_LIMIT", str(max(1, SCAN_QUEUE_SIZE // 2))))
+
+# Job classes, most latency-sensitive first. A class's weight is its share of the
+# workers when classes compete; override with e.g. SCAN_CLASS_WEIGHTS="interactive=8,comment=4,audit=1".
+JOB_CLASSES = {"interactive": 8.0, "comment": 4.0, "audit": 1.0}
+for _pair in filter(None, os.getenv("SCAN_CLASS_WEIGHTS", "").split(",")):
+    _name, _, _weight = _pair.partition("=")
+    if _name.strip() in JOB_CLASSES and _weight.strip():
+        JOB_CLASSES[_name.strip()] = float(_weight)
+
+# Cost model, in arbitrary units: roughly one unit per second of scanning.
+DEFAULT_SCAN_COST = float(os.getenv("SCAN_DEFAULT_COST", "30"))
+COMMENT_COST = 2.0
+MANIFEST_COST = 0.5
+DEPENDENCY_COST = 0.02
+
+# Size of each repo's last scan, used to estimate the cost of the next one.
+scan_costs = TieredCache("scan_costs", memory_max_entries=2000)
+
+_local = threading.local()
+
+
+class SchedulerSaturated(Exception):
+    """The queue is full (503), or this installation has too many jobs queued (429)."""
+
+    def __init__(self, message, status_code=503):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class ScanCancelled(Exception):
+    """Raised inside a job that was superseded by a newer event for the same PR."""
+
+
+class ScanJob:
+    def __init__(self, fn, args, coalesce_key=None, delivery_id=None,
+                 installation_id=None, job_class="interactive", cost=DEFAULT_SCAN_COST):
+        self.id = delivery_id or uuid.uuid4().hex
+        self.fn = fn
+        self.args = args
+        self.coalesce_key = coalesce_key
+        self.installation_id = installation_id
+        self.job_class = job_class
+        self.cost = cost
+        self.finish_tag = 0.0
+        self.enqueued_at = time.time()
+        self.started_at = None
+        self.cancelled = threading.Event()
+
+
+def record_scan_cost(repo_full_name: str, manifests: int, dependencies: int, seconds: float):
+    scan_costs.set(repo_full_name, {"manifests": manifests, "dependencies": dependencies, "seconds": round(seconds, 3)})
+
+
+def estimate_cost(repo_full_name: str, job_class: str = "interactive") -> float:
+    """Expected cost of a job from the size of the repo's previous scan; unknown repos get the default."""
+    if job_class == "comment":
+        return COMMENT_COST
+    previous = scan_costs.get(repo_full_name)
+    if not previous:
+        return DEFAULT_SCAN_COST
+    return 1.0 + previous["manifests"] * MANIFEST_COST + previous["dependencies"] * DEPENDENCY_COST
+
+
+def current_job():
+    return getattr(_local, "job", None)
+
+
+def raise_if_cancelled():
+    """Cooperative cancellation point for long-running scans; a no-op outside the scheduler."""
+    job = current_job()
+    if job is not None and job.cancelled.is_set():
+        raise ScanCancelled(f"job {job.id} superseded by a newer event for {job.coalesce_key}")
+
+
+class ScanScheduler:
+    """
+    Runs webhook jobs on a fixed-size worker pool with a bounded queue.
+    Jobs sharing a coalesce key (one PR) collapse: a queued job is replaced by the
+    newer event in place, and a running one is asked to stop at its next
+    raise_if_cancelled() call.
+
+    Dispatch order is self-clocked weighted fair queuing over (installation, job
+    class) flows: a job's finish tag is max(virtual time, its flow's last tag) +
+    cost / class weight, and the smallest tag runs next. A busy installation only delays its
+    own jobs, cheap scans overtake expensive ones, and interactive checks overtake
+    comments and post-merge audits without starving them.
+    """
+
+    def __init__(self, workers: int = SCAN_WORKERS, max_queue: int = SCAN_QUEUE_SIZE):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._queue = []  # heap of (finish_tag, seq, job)
+        self._seq = itertools.count()
+        self._virtual_time = 0.0
+        self._last_tag = {}  # (installation id, job class) -> finish tag of that flow's last queued job
+        self._queued_by_key = {}
+        self._running = {}  # job id -> job
+        self._deferred = {}  # coalesce key -> jobs to queue once nothing with that key is queued or running
+        self._deliveries = OrderedDict()
+        self._cond = threading.Condition()
+        self._threads = []
+        self._waits = deque(maxlen=WAIT_SAMPLES)
+        self.stats = {"accepted": 0, "duplicates": 0, "coalesced": 0, "cancelled": 0,
+                      "rejected": 0, "deferred": 0, "completed": 0, "failed": 0}
+
+    def _start(self):
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._work, name=f"scan-worker-{len(self._threads)}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _seen(self, delivery_id) -> bool:
+        if not delivery_id:
+            return False
+        if delivery_id in self._deliveries:
+            return True
+        self._deliveries[delivery_id] = time.time()
+        while len(self._deliveries) > DELIVERY_DEDUPE_SIZE:
+            self._deliveries.popitem(last=False)
+        return False
+
+    def _queued_for(self, installation_id) -> int:
+        return sum(1 for _, _, job in self._queue if job.installation_id == installation_id)
+
+    def submit(self, fn, *args, coalesce_key=None, delivery_id=None,
+               installation_id=None, job_class="interactive", cost=None) -> str:
+        """
+        Queue fn(*args). Returns "accepted", "coalesced" or "duplicate";
+        raises SchedulerSaturated when the queue or the installation's share of it is full.
+        """
+        if job_class not in JOB_CLASSES:
+            raise ValueError(f"unknown job class {job_class!r}")
+        with self._cond:
+            if self._seen(delivery_id):
+                self.stats["duplicates"] += 1
+                print(f"🔁 Duplicate delivery {delivery_id}, ignoring")
+                return "duplicate"
+
+            job = ScanJob(fn, args, coalesce_key, delivery_id, installation_id, job_class,
+                          DEFAULT_SCAN_COST if cost is None else cost)
+            if coalesce_key is not None:
+                for running in self._running.values():
+                    if running.coalesce_key == coalesce_key and not running.cancelled.is_set():
+                        running.cancelled.set()
+                        self.stats["cancelled"] += 1
+                        print(f"✋ Cancelling running job {running.id} for {coalesce_key}")
+                queued = self._queued_by_key.get(coalesce_key)
+                if queued is not None:
+                    # Keep the queue position (and wait time) of the superseded job, run the newer event.
+                    queued.fn, queued.args, queued.id = fn, args, job.id
+                    self.stats["coalesced"] += 1
+                    print(f"🧬 Coalesced event into queued job for {coalesce_key}")
+                    return "coalesced"
+
+            if len(self._queue) >= self.max_queue:
+                error = SchedulerSaturated(f"scan queue full ({self.max_queue} jobs)", 503)
+            elif installation_id is not None and self._queued_for(installation_id) >= INSTALLATION_QUEUE_LIMIT:
+                error = SchedulerSaturated(
+                    f"installation {installation_id} has {INSTALLATION_QUEUE_LIMIT} jobs queued", 429)
+            else:
+                error = None
+            if error is not None:
+                self.stats["rejected"] += 1
+                if delivery_id:
+                    self._deliveries.pop(delivery_id, None)  # a redelivery should be accepted later
+                raise error
+
+            self._enqueue(job)
+            return "accepted"
+
+    def submit_after(self, after_key, fn, *args, delivery_id=None, installation_id=None,
+                     job_class="interactive", cost=None) -> str:
+        """
+        Queue fn(*args) once no job with coalesce key `after_key` is queued or running, so it
+        sees that job's result without holding a worker while it waits. Returns "accepted",
+        "deferred" or "duplicate"; raises SchedulerSaturated like submit() when queued right away.
+        """
+        if job_class not in JOB_CLASSES:
+            raise ValueError(f"unknown job class {job_class!r}")
+        with self._cond:
+            if not self._pending(after_key):
+                return self.submit(fn, *args, delivery_id=delivery_id, installation_id=installation_id,
+                                   job_class=job_class, cost=cost)
+            if self._seen(delivery_id):
+                self.stats["duplicates"] += 1
+                print(f"🔁 Duplicate delivery {delivery_id}, ignoring")
+                return "duplicate"
+            job = ScanJob(fn, args, None, delivery_id, installation_id, job_class,
+                          DEFAULT_SCAN_COST if cost is None else cost)
+            self._deferred.setdefault(after_key, []).append(job)
+            self.stats["deferred"] += 1
+            print(f"⏸️ Deferred job {job.id} until the pending job for {after_key} finishes")
+            return "deferred"
+
+    def _pending(self, coalesce_key) -> bool:
+        return coalesce_key in self._queued_by_key or any(
+            job.coalesce_key == coalesce_key for job in self._running.values())
+
+    def _enqueue(self, job):
+        flow = (job.installation_id, job.job_class)
+        start = max(self._virtual_time, self._last_tag.get(flow, 0.0))
+        job.finish_tag = start + job.cost / JOB_CLASSES[job.job_class]
+        self._last_tag[flow] = job.finish_tag
+        heapq.heappush(self._queue, (job.finish_tag, next(self._seq), job))
+        if job.coalesce_key is not None:
+            self._queued_by_key[job.coalesce_key] = job
+        self.stats["accepted"] += 1
+        self._start()
+        self._cond.notify()
+
+    def _release_deferred(self, coalesce_key):
+        if coalesce_key not in self._deferred or self._pending(coalesce_key):
+            return
+        for job in self._deferred.pop(coalesce_key):
+            # Admitted when deferred, so not subject to the queue limits again.
+            job.enqueued_at = time.time()
+            self._enqueue(job)
+
+    def _next_job(self):
+        with self._cond:
+            while not self._queue:
+                self._cond.wait()
+            _, _, job = heapq.heappop(self._queue)
+            self._virtual_time = max(self._virtual_time, job.finish_tag)
+            flow = (job.installation_id, job.job_class)
+            if not any((queued.installation_id, queued.job_class) == flow for _, _, queued in self._queue):
+                self._last_tag.pop(flow, None)
+            if job.coalesce_key is not None and self._queued_by_key.get(job.coalesce_key) is job:
+                del self._queued_by_key[job.coalesce_key]
+            job.started_at = time.time()
+            self._waits.append(job.started_at - job.enqueued_at)
+            self._running[job.id] = job
+            return job
+
+    def _work(self):
+        while True:
+            job = self._next_job()
+            _local.job = job
+            outcome = "completed"
+            try:
+                job.fn(*job.args)
+            except ScanCancelled as e:
+                print(f"🛑 {e}")
+                outcome = None  # already counted when cancelled
+            except Exception as e:
+                print(f"❌ Job {job.id} failed: {e}")
+                outcome = "failed"
+            finally:
+                _local.job = None
+                with self._cond:
+                    self._running.pop(job.id, None)
+                    if outcome:
+                        self.stats[outcome] += 1
+                    if job.coalesce_key is not None:
+                        self._release_deferred(job.coalesce_key)
+                    self._cond.notify_all()  # wakes wait_for() callers as well as idle workers
+
+    def wait_for(self, coalesce_key, timeout: float) -> bool:
+        """
+        Block until no job with `coalesce_key` is queued or running (the caller's own
+        job aside). Returns False if one is still pending after `timeout` seconds.
+        """
+        me = current_job()
+        deadline = time.time() + timeout
+        with self._cond:
+            while True:
+                pending = coalesce_key in self._queued_by_key or any(
+                    job.coalesce_key == coalesce_key and job is not me for job in self._running.values()
+                )
+                remaining = deadline - time.time()
+                if not pending or remaining <= 0:
+                    return not pending
+                self._cond.wait(remaining)
+
+    def metrics(self) -> dict:
+        with self._cond:
+            now = time.time()
+            waits = sorted(self._waits)
+            by_class, by_installation = {}, {}
+            for _, _, job in self._queue:
+                by_class[job.job_class] = by_class.get(job.job_class, 0) + 1
+                by_installation[str(job.installation_id)] = by_installation.get(str(job.installation_id), 0) + 1
+            return {
+                "workers": self.workers,
+                "queue_depth": len(self._queue),
+                "queue_capacity": self.max_queue,
+                "running": len(self._running),
+                "deferred_pending": sum(len(jobs) for jobs in self._deferred.values()),
+                "queued_by_class": by_class,
+                "queued_by_installation": by_installation,
+                "oldest_queued_seconds": round(now - min(j.enqueued_at for _, _, j in self._queue), 3) if self._queue else 0.0,
+                "wait_seconds": {
+                    "avg": round(sum(waits) / len(waits), 3) if waits else 0.0,
+                    "p95": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))], 3) if waits else 0.0,
+                    "max": round(waits[-1], 3) if waits else 0.0,
+                },
+                **self.stats,
+            }
+
+
+scan_scheduler = ScanScheduler()
@@ -0,0 +1,201 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from typing import List, Optional
+
+from depsdev.cache import CACHE_DIR
+from utils.risk_classifier import risk_level, split_license_with_risk, license_family
+
+SCAN_STORE_DB = os.getenv("SCAN_STORE_PATH", os.path.join(CACHE_DIR, "scan_results.sqlite"))
+# Scanned heads kept per PR; older ones are pruned on write.
+SCANS_PER_PR = int(os.getenv("SCAN_STORE_HEADS_PER_PR", "5"))
+
+
+class ScanStore:
+    """
+    Structured scan results keyed by (repo, PR, head SHA), written after every
+    PR scan and read by the incremental scanner, the merge audit and the
+    comment agent's tools, so none of them has to rescan or scrape comments.
+    """
+
+    def __init__(self, db_path: str = SCAN_STORE_DB):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._db = None
+
+    def _conn(self):
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(
+                "CREATE TABLE IF NOT EXISTS scans ("
+                " repo TEXT NOT NULL, pr_number INTEGER NOT NULL, head_sha TEXT NOT NULL,"
+                " base_sha TEXT, scanned_at REAL NOT NULL, conclusion TEXT, markdown TEXT,"
+                " manifests TEXT NOT NULL,"
+                " PRIMARY KEY (repo, pr_number, head_sha));"
+                "CREATE TABLE IF NOT EXISTS scan_entries ("
+                " repo TEXT NOT NULL, pr_number INTEGER NOT NULL, head_sha TEXT NOT NULL, position INTEGER NOT NULL,"
+                " ecosystem TEXT NOT NULL, file_path TEXT NOT NULL, dependency TEXT NOT NULL, version TEXT,"
+                " license_with_risk TEXT NOT NULL, source TEXT, risk TEXT NOT NULL, families TEXT NOT NULL,"
+                " PRIMARY KEY (repo, pr_number, head_sha, position));"
+                "CREATE INDEX IF NOT EXISTS idx_scan_entries_risk ON scan_entries (repo, pr_number, head_sha, risk);"
+            )
+            self._db.commit()
+        return self._db
+
+    def save_scan(self, repo_full_name: str, pr_number: int, head_sha: str, base_sha: Optional[str],
+                  entries, manifests: dict, markdown: str, conclusion: str):
+        """`entries` are scan_manifests tuples; `manifests` maps manifest path -> blob SHA."""
+        key = (repo_full_name, pr_number, head_sha)
+        rows = []
+        for position, (ecosystem, path, name, version, license_with_risk, source) in enumerate(entries):
+            # The column is comma-delimited, so commas inside license names are flattened.
+            families = sorted({license_family(l).replace(",", " ") for l in split_license_with_risk(license_with_risk)})
+            rows.append(key + (position, ecosystem, path, name, version, license_with_risk, source,
+                               risk_level(license_with_risk), "," + ",".join(families) + ","))
+        with self._lock:
+            db = self._conn()
+            try:
+                db.execute("DELETE FROM scan_entries WHERE repo = ? AND pr_number = ? AND head_sha = ?", key)
+                db.execute(
+                    "INSERT OR REPLACE INTO scans (repo, pr_number, head_sha, base_sha, scanned_at, conclusion, markdown, manifests)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    key + (base_sha, time.time(), conclusion, markdown, json.dumps(manifests))
+                )
+                db.executemany("INSERT INTO scan_entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+                stale = db.execute(
+                    "SELECT head_sha FROM scans WHERE repo = ? AND pr_number = ?"
+                    " ORDER BY scanned_at DESC LIMIT -1 OFFSET ?",
+                    (repo_full_name, pr_number, SCANS_PER_PR)
+                ).fetchall()
+                for (old_sha,) in stale:
+                    for table in ("scans", "scan_entries"):
+                        db.execute(f"DELETE FROM {table} WHERE repo = ? AND pr_number = ? AND head_sha = ?",
+                                   (repo_full_name, pr_number, old_sha))
+                db.commit()
+            except sqlite3.Error as e:
+                db.rollback()
+                print(f"⚠️ Scan store write failed: {e}")
+                return
+        print(f"🗄️ Stored scan of {repo_full_name}#{pr_number}@{head_sha[:7]} ({len(rows)} entries)")
+
+    def latest_scan(self, repo_full_name: str, pr_number: int, head_sha: str = None) -> Optional[dict]:
+        """The PR's most recent scan (or its scan of `head_sha`), with entries, or None."""
+        query = "SELECT head_sha, base_sha, scanned_at, conclusion, markdown, manifests FROM scans WHERE repo = ? AND pr_number = ?"
+        params = [repo_full_name, pr_number]
+        if head_sha:
+            query += " AND head_sha = ?"
+            params.append(head_sha)
+        with self._lock:
+            try:
+                row = self._conn().execute(query + " ORDER BY scanned_at DESC LIMIT 1", params).fetchone()
+            except sqlite3.Error as e:
+                print(f"⚠️ Scan store read failed: {e}")
+                return None
+        if row is None:
+            return None
+        scan = dict(zip(("head_sha", "base_sha", "scanned_at", "conclusion", "markdown"), row[:5]))
+        scan["manifests"] = json.loads(row[5])
+        scan["entries"] = [
+            (e["ecosystem"], e["file_path"], e["dependency"], e["version"], e["license_with_risk"], e["source"])
+            for e in self.query_entries(repo_full_name, pr_number, scan["head_sha"])
+        ]
+        return scan
+
+    def scan_of_commit(self, repo_full_name: str, head_sha: str) -> Optional[dict]:
+        """The most recent scan of `head_sha` by any PR of the repo (e.g. a PR based on another PR's branch), or None."""
+        with self._lock:
+            try:
+                row = self._conn().execute(
+                    "SELECT pr_number FROM scans WHERE repo = ? AND head_sha = ? ORDER BY scanned_at DESC LIMIT 1",
+                    (repo_full_name, head_sha)
+                ).fetchone()
+            except sqlite3.Error as e:
+                print(f"⚠️ Scan store read failed: {e}")
+                return None
+        return self.latest_scan(repo_full_name, row[0], head_sha) if row else None
+
+    def query_entries(self, repo_full_name: str, pr_number: int, head_sha: str = None,
+                      risk=None, family: str = None, ecosystem: str = None,
+                      dependency: str = None, limit: int = None) -> List[dict]:
+        """
+        Entries of the PR's latest scan (or of `head_sha`), filtered by risk level
+        ("high", "risky", ... or a list of them), license family ("GPL", "AGPL"),
+        ecosystem, or a substring of the dependency name.
+        """
+        if head_sha is None:
+            latest = self.latest_head(repo_full_name, pr_number)
+            if latest is None:
+                return []
+            head_sha = latest
+        query = ("SELECT ecosystem, file_path, dependency, version, license_with_risk, source, risk FROM scan_entries"
+                 " WHERE repo = ? AND pr_number = ? AND head_sha = ?")
+        params = [repo_full_name, pr_number, head_sha]
+        if risk:
+            levels = [risk] if isinstance(risk, str) else list(risk)
+            query += f" AND risk IN ({','.join('?' * len(levels))})"
+            params.extend(levels)
+        if family:
+            query += " AND lower(families) LIKE ?"
+            params.append(f"%,{family.lower()},%")
+        if ecosystem:
+            query += " AND ecosystem = ?"
+            params.append(ecosystem)
+        if dependency:
+            query += " AND lower(dependency) LIKE ?"
+            params.append(f"%{dependency.lower()}%")
+        query += " ORDER BY position"
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        columns = ("ecosystem", "file_path", "dependency", "version", "license_with_risk", "source", "risk")
+        with self._lock:
+            try:
+                return [dict(zip(columns, row)) for row in self._conn().execute(query, params).fetchall()]
+            except sqlite3.Error as e:
+                print(f"⚠️ Scan store read failed: {e}")
+                return []
+
+    def latest_head(self, repo_full_name: str, pr_number: int) -> Optional[str]:
+        with self._lock:
+            row = self._conn().execute(
+                "SELECT head_sha FROM scans WHERE repo = ? AND pr_number = ? ORDER BY scanned_at DESC LIMIT 1",
+                (repo_full_name, pr_number)
+            ).fetchone()
+        return row[0] if row else None
+
+    def risk_counts(self, repo_full_name: str, pr_number: int, head_sha: str = None) -> dict:
+        head_sha = head_sha or self.latest_head(repo_full_name, pr_number)
+        if head_sha is None:
+            return {}
+        with self._lock:
+            rows = self._conn().execute(
+                "SELECT risk, COUNT(*) FROM scan_entries WHERE repo = ? AND pr_number = ? AND head_sha = ? GROUP BY risk",
+                (repo_full_name, pr_number, head_sha)
+            ).fetchall()
+        return dict(rows)
+
+    def family_counts(self, repo_full_name: str, pr_number: int, head_sha: str = None, risk=None) -> dict:
+        """Dependencies per license family in the scan, optionally only for the given risk levels."""
+        head_sha = head_sha or self.latest_head(repo_full_name, pr_number)
+        if head_sha is None:
+            return {}
+        query = "SELECT families FROM scan_entries WHERE repo = ? AND pr_number = ? AND head_sha = ?"
+        params = [repo_full_name, pr_number, head_sha]
+        if risk:
+            levels = [risk] if isinstance(risk, str) else list(risk)
+            query += f" AND risk IN ({','.join('?' * len(levels))})"
+            params.extend(levels)
+        with self._lock:
+            rows = self._conn().execute(query, params).fetchall()
+        counts = {}
+        for (families,) in rows:
+            for family in filter(None, families.split(",")):
+                counts[family] = counts.get(family, 0) + 1
+        return counts
+
+
+scan_store = ScanStore()
@@ -1,22 +1,49 @@
 # utils/scan_wrapper.py
 
-import os
-from github import Github
-from utils.dependency_scanner import scan_dependencies_and_render_markdown
+from utils.scan_store import scan_store
+from utils.risk_classifier import license_family
+from utils.scan_digest import fit_lines, RISK_ORDER, TOOL_TOKEN_BUDGET
 
-def scan_risky_licenses(repo_full, pr_num, installation_id):
+# Words the agent may pass as a filter that mean a risk level rather than a license family.
+RISK_FILTERS = {
+    "high": ["high"], "high-risk": ["high"], "high risk": ["high"],
+    "risky": ["high", "risky"], "risk": ["high", "risky"],
+    "unknown": ["unknown"], "safe": ["safe"], "all": None,
+}
 
-    token = os.getenv('GITHUB_TOKEN') or os.getenv('GITHUB_APP_TOKEN')
-    if not token:
-        return "❌ GitHub token not found."
 
-    gh = Github(token)
-    repo = gh.get_repo(repo_full)
-    pr = repo.get_pull(pr_num)
-    branch = pr.head.ref
+def scan_risky_licenses(repo_full, pr_num, installation_id, filter=None, ecosystem=None, dependency=None, offset=0):
+    """
+    Dependencies from the PR's stored scan; never rescans. `filter` is a risk level
+    (high, risky, unknown, safe, all) or a license family / SPDX ID (GPL, AGPL-3.0);
+    `ecosystem` and `dependency` (name substring) narrow it further. Results are
+    one line per dependency, paged by `offset` to stay within TOOL_TOKEN_BUDGET.
+    """
+    head_sha = scan_store.latest_head(repo_full, pr_num)
+    if head_sha is None:
+        return "ℹ️ No scan stored for this PR yet; results appear once the license check run completes."
 
-    risky_entries, markdown = scan_dependencies_and_render_markdown(repo, branch, token)
-    if not risky_entries:
-        return "✅ No risky licenses found in PR."
+    key = (filter or ("all" if dependency else "risky")).strip().lower()
+    query = {"ecosystem": ecosystem or None, "dependency": dependency or None}
+    if key in RISK_FILTERS:
+        entries = scan_store.query_entries(repo_full, pr_num, head_sha, risk=RISK_FILTERS[key], **query)
+        label = key
+    else:
+        family = license_family(key)
+        entries = scan_store.query_entries(repo_full, pr_num, head_sha, family=family, **query)
+        label = f"license family {family.upper()}"
+    label += "".join(f", {name} {value}" for name, value in query.items() if value)
 
-    return f"<!-- cache:scan_risky_licenses -->\n{markdown}"
+    if not entries:
+        return f"✅ No dependencies match `{label}` in the scan of {head_sha[:7]}."
+
+    entries.sort(key=lambda e: RISK_ORDER.get(e["risk"], len(RISK_ORDER)))
+    offset = max(0, int(offset or 0))
+    page = entries[offset:]
+    if not page:
+        return f"No more results: `{label}` has {len(entries)} matches in the scan of {head_sha[:7]}."
+    header = [f"Scan of {head_sha[:7]}: {len(entries)} dependencies match `{label}`"
+              + (f" (from #{offset + 1})." if offset else ".")]
+    return "\n".join(fit_lines(header, page, TOOL_TOKEN_BUDGET, lambda shown: (
+        f"…{len(page) - shown} more; call again with offset={offset + shown}."
+    )))
@@ -0,0 +1,172 @@
+import os
+import time
+import uuid
+import shutil
+import zipfile
+import threading
+from contextlib import contextmanager
+from auth import authorized_get
+from utils.manifest_discovery import match_manifest
+
+WORKSPACE_ROOT = os.getenv("SCAN_WORKSPACE_ROOT", "/tmp/oss-workspaces")
+MAX_WORKSPACES = int(os.getenv("SCAN_WORKSPACE_MAX", "8"))
+
+# Disk budget for the downloaded archive and for the extracted build files; the
+# download itself is streamed, so memory stays around one chunk.
+MAX_ARCHIVE_BYTES = int(os.getenv("SCAN_ARCHIVE_MAX_BYTES", str(2 * 1024 ** 3)))
+MAX_EXTRACTED_BYTES = int(os.getenv("SCAN_EXTRACT_MAX_BYTES", str(256 * 1024 ** 2)))
+DOWNLOAD_CHUNK_BYTES = int(os.getenv("SCAN_DOWNLOAD_CHUNK_BYTES", str(1024 ** 2)))
+
+# Only what the resolvers read is extracted: manifests, lockfiles, Maven wrapper/config.
+BUILD_FILE_NAMES = {
+    "pom.xml", "mvnw", "mvnw.cmd",
+    "package.json", "package-lock.json", "npm-shrinkwrap.json", "yarn.lock", "pnpm-lock.yaml",
+    "requirements.txt", "pyproject.toml", "poetry.lock", "Pipfile", "Pipfile.lock", "uv.lock",
+}
+BUILD_DIR_PREFIXES = (".mvn/",)
+
+_COMPLETE_MARKER = ".complete"
+
+
+class WorkspaceBudgetExceeded(Exception):
+    pass
+
+
+def is_build_file(rel_path: str) -> bool:
+    if not rel_path:
+        return False
+    if any(rel_path.startswith(p) or f"/{p}" in rel_path for p in BUILD_DIR_PREFIXES):
+        return True
+    name = rel_path.rsplit("/", 1)[-1]
+    return name in BUILD_FILE_NAMES or match_manifest(rel_path) is not None
+
+
+def _is_safe_entry(filename: str) -> bool:
+    # zipfile.extract would rewrite these into the extract dir, where they could
+    # pose as the archive's top-level directory; skip them outright.
+    parts = filename.replace("\\", "/").split("/")
+    return not filename.startswith(("/", "\\")) and ".." not in parts and ":" not in parts[0]
+
+
+class WorkspaceManager:
+    """
+    Extracted repository archives on disk, one per (repo, commit SHA).
+    The archive is downloaded once and shared by every module of a scan; the
+    most recently used workspaces are kept so a re-run on the same SHA skips
+    the download. Workspaces in use are never evicted.
+    """
+
+    def __init__(self, root: str = WORKSPACE_ROOT, max_workspaces: int = MAX_WORKSPACES):
+        self.root = root
+        self.max_workspaces = max_workspaces
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._in_use = {}
+
+    def _workspace_dir(self, repo_full_name: str, sha: str) -> str:
+        return os.path.join(self.root, f"{repo_full_name.replace('/', '__')}__{sha}")
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _download(self, repo, sha: str, access_token: str, workspace_dir: str):
+        archive_url = repo.get_archive_link("zipball", ref=sha)
+        staging_dir = f"{workspace_dir}.{uuid.uuid4().hex}.tmp"
+        os.makedirs(staging_dir, exist_ok=True)
+        archive_path = os.path.join(staging_dir, "archive.zip")
+        try:
+            # Stream to disk so peak memory is one chunk, not the whole repository.
+            downloaded = 0
+            with authorized_get(archive_url, access_token, stream=True) as zip_resp:
+                zip_resp.raise_for_status()
+                with open(archive_path, "wb") as f:
+                    for chunk in zip_resp.iter_content(chunk_size=DOWNLOAD_CHUNK_BYTES):
+                        downloaded += len(chunk)
+                        if downloaded > MAX_ARCHIVE_BYTES:
+                            raise WorkspaceBudgetExceeded(
+                                f"archive exceeds {MAX_ARCHIVE_BYTES} bytes"
+                            )
+                        f.write(chunk)
+
+            extract_dir = os.path.join(staging_dir, "extract")
+            extracted, skipped = 0, 0
+            extracted_bytes = 0
+            with zipfile.ZipFile(archive_path) as zip_file:
+                for info in zip_file.infolist():
+                    # Entries look like "<owner>-<repo>-<sha>/path/in/repo".
+                    rel_path = info.filename.split("/", 1)[-1] if "/" in info.filename else ""
+                    if info.is_dir() or not is_build_file(rel_path) or not _is_safe_entry(info.filename):
+                        skipped += 1
+                        continue
+                    extracted_bytes += info.file_size
+                    if extracted_bytes > MAX_EXTRACTED_BYTES:
+                        raise WorkspaceBudgetExceeded(
+                            f"build files exceed {MAX_EXTRACTED_BYTES} bytes"
+                        )
+                    zip_file.extract(info, extract_dir)
+                    extracted += 1
+            os.remove(archive_path)
+            print(f"📦 Extracted {extracted} build file(s), skipped {skipped} ({downloaded} bytes downloaded)")
+
+            top_level = os.listdir(extract_dir) if os.path.isdir(extract_dir) else []
+            os.makedirs(workspace_dir, exist_ok=True)
+            if top_level:
+                os.rename(os.path.join(extract_dir, top_level[0]), os.path.join(workspace_dir, "repo"))
+            else:
+                os.makedirs(os.path.join(workspace_dir, "repo"), exist_ok=True)
+            open(os.path.join(workspace_dir, _COMPLETE_MARKER), "w").close()
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+    def _evict(self):
+        if not os.path.isdir(self.root):
+            return
+        candidates = []
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if name.endswith(".tmp") or not os.path.isdir(path):
+                continue
+            marker = os.path.join(path, _COMPLETE_MARKER)
+            last_used = os.path.getmtime(marker) if os.path.exists(marker) else 0
+            candidates.append((last_used, path))
+
+        candidates.sort()
+        with self._lock:
+            in_use = {path for path, count in self._in_use.items() if count > 0}
+        overflow = len(candidates) - self.max_workspaces
+        for _, path in candidates:
+            if overflow <= 0:
+                break
+            if path in in_use:
+                continue
+            print(f"🧹 Evicting workspace: {path}")
+            shutil.rmtree(path, ignore_errors=True)
+            overflow -= 1
+
+    @contextmanager
+    def checkout(self, repo, sha: str, access_token: str):
+        """Yield the extracted repository root for `repo` at commit `sha`."""
+        workspace_dir = self._workspace_dir(repo.full_name, sha)
+        with self._lock:
+            self._in_use[workspace_dir] = self._in_use.get(workspace_dir, 0) + 1
+        try:
+            with self._key_lock(workspace_dir):
+                marker = os.path.join(workspace_dir, _COMPLETE_MARKER)
+                if os.path.exists(marker):
+                    print(f"♻️ Reusing workspace: {workspace_dir}")
+                    os.utime(marker, (time.time(), time.time()))
+                else:
+                    shutil.rmtree(workspace_dir, ignore_errors=True)
+                    print(f"📥 Downloading {repo.full_name}@{sha} into {workspace_dir}")
+                    self._download(repo, sha, access_token, workspace_dir)
+            self._evict()
+            yield os.path.join(workspace_dir, "repo")
+        finally:
+            with self._lock:
+                self._in_use[workspace_dir] -= 1
+                if not self._in_use[workspace_dir]:
+                    del self._in_use[workspace_dir]
+
+
+workspaces = WorkspaceManager()